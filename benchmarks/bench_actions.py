@@ -0,0 +1,335 @@
+"""
+End-to-end benchmark of the launcher actions against the simulated Windows backend.
+
+Runs every App.action_*, get_native_resolution and a config export headless (no Tk,
+no pywin32) and compares each scenario with benchmarks/bench_actions_baseline.json:
+  - spawned: processes started (taskkill/net/timeout/launches); must not grow
+  - simulated_ms: modelled Windows time (service restarts, waits, mode changes); deterministic
+  - wall_ms: median real time of the Python path, allowed WALL_TOLERANCE x the baseline
+
+Run from the repository root:
+    python -m benchmarks.bench_actions [--repeat N] [--only NAME ...] [--update-baseline]
+Exits non-zero if a scenario fails or regresses.
+"""
+import argparse
+import getpass
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Keep config/log/history writes out of the real %APPDATA% (constants read it at import)
+_WORK_DIR = tempfile.mkdtemp(prefix="osu-launch-bench-")
+os.environ["APPDATA"] = _WORK_DIR
+
+from src import app
+from src import config_discovery
+from src import constants
+from src import launch_profiles
+from src import platform_backend
+from src import state_journal
+from src import structured_log
+from src import utils
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "bench_actions_baseline.json")
+WALL_TOLERANCE = 3.0  # Real time is noisy across machines; the simulated numbers are exact
+WALL_SLACK_MS = 20.0
+SIMULATED_SLACK_MS = 0.5
+EXPORT_CONFIG_COUNT = 40
+EXPORT_CONFIG_LINES = 400
+PROFILES = {
+    "tournament": {"Driver": "otd", "Resolution": "1280x720@144", "Priority": "high", "Prefetch": "true"},
+    "desktop": {"Driver": "wacom", "Resolution": "native", "LaunchOsu": "false"},
+}
+
+
+class _Value:
+    """Stands in for a Tk variable."""
+    def __init__(self, value):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+
+class HeadlessApp:
+    """The parts of App the actions use (paths, resolution fields, log, status) without Tk."""
+    read_action_inputs = app.App.read_action_inputs
+    _validate_paths_for_action = app.App._validate_paths_for_action
+    _check_paths_on_ui = app.App._check_paths_on_ui
+    action_run_osu_with_otd = app.App.action_run_osu_with_otd
+    action_run_osu_only = app.App.action_run_osu_only
+    action_run_otd_only = app.App.action_run_otd_only
+    action_enable_wacom = app.App.action_enable_wacom
+    action_downscale_resolution = app.App.action_downscale_resolution
+    action_restore_resolution = app.App.action_restore_resolution
+    action_restore_previous_state = app.App.action_restore_previous_state
+    action_go_to_osu_folder = app.App.action_go_to_osu_folder
+    action_run_profile = app.App.action_run_profile
+    _sync_osu_config = app.App._sync_osu_config
+    process_config_export = app.App.process_config_export
+
+    def __init__(self, osu_dir, otd_dir):
+        self.osu_path = _Value(osu_dir)
+        self.otd_path = _Value(otd_dir)
+        self.is_osu_valid = utils.is_valid_osu_path(osu_dir)
+        self.is_otd_valid = utils.is_valid_otd_path(otd_dir)
+        self.res_x_var = _Value("1280")
+        self.res_y_var = _Value("720")
+        self.native_res_x, self.native_res_y = 1920, 1080
+        self.sync_osu_config_var = _Value(False)
+        self.mode_change_var = _Value(constants.MODE_CHANGE_LABELS[constants.MODE_CHANGE_PERSISTENT])
+        self.config_index = config_discovery.ConfigIndex() # Never started: configs are listed on demand
+        self.launch_profiles = {name: launch_profiles.parse_profile(name, values) for name, values in PROFILES.items()}
+        self.plan_cache = launch_profiles.PlanCache() # Shared across runs, as in the app
+        self.state_journal = None # A fresh journal per run (see run_scenario)
+        self.errors = []
+
+    def log_message(self, message, level="INFO"):
+        if level == "ERROR":
+            self.errors.append(message)
+
+    def update_status(self, message, step=None, total=None):
+        pass
+
+    def call_on_ui(self, callback):
+        pass # Dialogs scheduled on the UI thread are not shown
+
+
+# --- Fixtures ---
+
+def make_install_dirs(root):
+    osu_dir = os.path.join(root, "osu!")
+    otd_dir = os.path.join(root, "OpenTabletDriver")
+    os.makedirs(osu_dir, exist_ok=True)
+    os.makedirs(otd_dir, exist_ok=True)
+    for path in (os.path.join(osu_dir, constants.OSU_EXECUTABLE),
+                 os.path.join(otd_dir, constants.OTD_EXECUTABLES[0])):
+        open(path, "wb").close()
+    return osu_dir, otd_dir
+
+
+def make_configs(osu_dir):
+    """EXPORT_CONFIG_COUNT osu!.<user>.cfg files of EXPORT_CONFIG_LINES lines each."""
+    names = []
+    for i in range(EXPORT_CONFIG_COUNT):
+        name = f"osu!.player{i}.cfg"
+        lines = ["# osu! configuration for player", "# IMPORTANT: DO NOT SHARE THIS FILE WITH OTHERS", "",
+                 f"Username = player{i}", "Password = 0123456789abcdef"]
+        lines.extend(f"Setting{n} = {n * i}" for n in range(EXPORT_CONFIG_LINES - len(lines)))
+        with open(os.path.join(osu_dir, name), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        names.append(name)
+    return names
+
+
+# --- Scenarios ---
+# name -> (SimulatedBackend keyword arguments, function(harness, run_dir))
+
+def _export(harness, run_dir):
+    export_path = os.path.join(run_dir, "export")
+    os.makedirs(export_path)
+    harness.process_config_export(harness.osu_path.get(), harness.config_names, export_path)
+
+
+def _restore_previous_state(harness, run_dir):
+    """A crashed session left the display downscaled and Wacom stopped."""
+    harness.state_journal.begin(state_journal.KIND_DISPLAY, {"width": 1920, "height": 1080, "refresh_rate": 144})
+    harness.state_journal.begin(state_journal.KIND_DRIVER, "wacom")
+    harness.action_restore_previous_state(harness.read_action_inputs())
+    if harness.state_journal.open_entries():
+        harness.errors.append("journal entries left open after restore")
+
+
+def _run_osu_only_sync_config(harness, run_dir):
+    """Launch with the desktop downscaled and SyncOsuConfig on: the user's cfg gets the desktop mode, no other cfg changes."""
+    osu_dir, _ = make_install_dirs(run_dir)
+    cfg_path = os.path.join(osu_dir, f"osu!.{getpass.getuser()}.cfg")
+    other_path = os.path.join(osu_dir, "osu!.someone-else.cfg")
+    for path in (cfg_path, other_path):
+        with open(path, "wb") as f:
+            f.write(b"# osu! configuration\r\nWidth = 1920\r\nHeight = 1080\r\nWidthFullscreen = 1920\r\n"
+                    b"HeightFullscreen = 1080\r\nFullscreen = 1\r\n")
+    saved = harness.osu_path, harness.sync_osu_config_var
+    harness.osu_path, harness.sync_osu_config_var = _Value(osu_dir), _Value(True)
+    try:
+        harness.action_run_osu_only(harness.read_action_inputs())
+    finally:
+        harness.osu_path, harness.sync_osu_config_var = saved
+    with open(cfg_path, "rb") as f:
+        if f.read() != (b"# osu! configuration\r\nWidth = 1280\r\nHeight = 720\r\nWidthFullscreen = 1280\r\n"
+                        b"HeightFullscreen = 720\r\nFullscreen = 1\r\n"):
+            harness.errors.append("osu! config not updated to the desktop mode")
+    with open(other_path, "rb") as f:
+        if b"Width = 1920" not in f.read():
+            harness.errors.append("another user's osu! config was changed")
+
+
+def _run_otd_only_wacom_stopped(harness, run_dir):
+    """Switch to OTD with the Wacom services already stopped: nothing to restore, so nothing journaled."""
+    harness.action_run_otd_only(harness.read_action_inputs())
+    if harness.state_journal.open_entries():
+        harness.errors.append("stopped Wacom services were journaled")
+
+
+def _session_mode_round_trip(harness, run_dir):
+    """Downscale for this session only, then restore: a revert to the saved mode, nothing journaled."""
+    saved = harness.mode_change_var
+    harness.mode_change_var = _Value(constants.MODE_CHANGE_LABELS[constants.MODE_CHANGE_SESSION])
+    try:
+        harness.action_downscale_resolution(harness.read_action_inputs())
+        if harness.state_journal.open_entries():
+            harness.errors.append("session-scoped change was journaled")
+        harness.action_restore_resolution(harness.read_action_inputs())
+    finally:
+        harness.mode_change_var = saved
+    backend = platform_backend.get_backend()
+    if backend.current_mode != backend.registry_mode or utils.session_mode_active():
+        harness.errors.append("session-scoped change not reverted")
+
+
+def _session_mode_made_persistent(harness, run_dir):
+    """Downscale for this session, then again to the same mode as a persistent change: it must stop being temporary."""
+    saved = harness.mode_change_var
+    harness.mode_change_var = _Value(constants.MODE_CHANGE_LABELS[constants.MODE_CHANGE_SESSION])
+    try:
+        harness.action_downscale_resolution(harness.read_action_inputs())
+    finally:
+        harness.mode_change_var = saved
+    harness.action_downscale_resolution(harness.read_action_inputs())
+    if utils.session_mode_active():
+        harness.errors.append("mode still session-scoped after a persistent change")
+    if not harness.state_journal.get_open(state_journal.KIND_DISPLAY):
+        harness.errors.append("persistent change not journaled")
+
+
+def _native_resolution(harness, run_dir):
+    if utils.get_native_resolution() != (1920, 1080):
+        harness.errors.append("wrong native resolution")
+
+
+def _action(name, *args):
+    """Scenario running harness.<name> with the inputs the UI thread would read."""
+    return lambda harness, run_dir: getattr(harness, name)(harness.read_action_inputs(), *args)
+
+
+SCENARIOS = {
+    "action_run_osu_with_otd": ({}, _action("action_run_osu_with_otd")),
+    "action_run_osu_only": ({}, _action("action_run_osu_only")),
+    "action_run_osu_sync_config": ({"current_mode": (1280, 720, 144)}, _run_osu_only_sync_config),
+    "action_run_otd_only": ({}, _action("action_run_otd_only")),
+    "action_run_otd_only_wacom_stopped": ({"services": {"WTabletServicePro": False, "WTabletServiceCon": False}},
+                                          _run_otd_only_wacom_stopped),
+    "action_enable_wacom": ({"processes": set(constants.OTD_PROCESSES)}, _action("action_enable_wacom")),
+    "action_downscale_resolution": ({"current_mode": (1920, 1080, 144)}, _action("action_downscale_resolution")),
+    "action_restore_resolution": ({"current_mode": (1280, 720, 144)}, _action("action_restore_resolution")),
+    "action_session_mode_round_trip": ({"current_mode": (1920, 1080, 144)}, _session_mode_round_trip),
+    "action_session_mode_made_persistent": ({"current_mode": (1920, 1080, 144)}, _session_mode_made_persistent),
+    "action_restore_previous_state": ({"current_mode": (1280, 720, 60), "processes": set(constants.OTD_PROCESSES)},
+                                      _restore_previous_state),
+    "action_go_to_osu_folder": ({}, lambda harness, run_dir: harness.action_go_to_osu_folder()),
+    "action_run_profile_tournament": ({"current_mode": (1920, 1080, 144)}, _action("action_run_profile", "tournament")),
+    "action_run_profile_desktop": ({"current_mode": (1280, 720, 144)}, _action("action_run_profile", "desktop")),
+    "get_native_resolution": ({}, _native_resolution),
+    "config_export": ({}, _export),
+}
+
+
+def run_scenario(name, repeat, harness):
+    backend_kwargs, scenario = SCENARIOS[name]
+    wall = []
+    simulated = spawned = 0.0
+    errors = []
+    for i in range(repeat):
+        backend = platform_backend.SimulatedBackend(**backend_kwargs)
+        previous = platform_backend.set_backend(backend)
+        run_dir = os.path.join(_WORK_DIR, "runs", f"{name}-{i}")
+        os.makedirs(run_dir)
+        harness.state_journal = state_journal.StateJournal(os.path.join(run_dir, "state_journal.log"))
+        state_journal.set_journal(harness.state_journal)
+        utils._session_mode = None # A new backend is a new display session
+        harness.errors = []
+        start = time.perf_counter()
+        try:
+            scenario(harness, run_dir)
+        except Exception as e:
+            harness.errors.append(f"{type(e).__name__}: {e}")
+        finally:
+            wall.append((time.perf_counter() - start) * 1000)
+            platform_backend.set_backend(previous)
+        errors.extend(harness.errors)
+        simulated = max(simulated, backend.elapsed * 1000)
+        spawned = max(spawned, backend.spawned)
+    return {"wall_ms": round(statistics.median(wall), 2), "simulated_ms": round(simulated, 2),
+            "spawned": int(spawned)}, errors
+
+
+def check(result, baseline):
+    """Regression messages for one scenario (empty if within its baseline)."""
+    if baseline is None:
+        return []
+    problems = []
+    if result["spawned"] > baseline["spawned"]:
+        problems.append(f"spawned {result['spawned']} processes (baseline {baseline['spawned']})")
+    if result["simulated_ms"] > baseline["simulated_ms"] + SIMULATED_SLACK_MS:
+        problems.append(f"simulated {result['simulated_ms']:.1f} ms (baseline {baseline['simulated_ms']:.1f} ms)")
+    wall_limit = baseline["wall_ms"] * WALL_TOLERANCE + WALL_SLACK_MS
+    if result["wall_ms"] > wall_limit:
+        problems.append(f"wall {result['wall_ms']:.1f} ms (limit {wall_limit:.1f} ms)")
+    return problems
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f).get("scenarios", {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results):
+    with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+        json.dump({"scenarios": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark launcher actions on the simulated backend.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", choices=sorted(SCENARIOS), help="Scenarios to run (default: all)")
+    parser.add_argument("--update-baseline", action="store_true", help=f"Record results to {BASELINE_PATH}")
+    options = parser.parse_args(argv)
+
+    structured_log.start("ERROR", echo=False) # Scenario errors are reported below
+    osu_dir, otd_dir = make_install_dirs(_WORK_DIR)
+    harness = HeadlessApp(osu_dir, otd_dir)
+    harness.config_names = make_configs(osu_dir)
+
+    baseline = load_baseline()
+    results = {}
+    failed = False
+    print(f"{'Scenario':<30} {'wall ms':>9} {'sim ms':>9} {'spawned':>8}")
+    for name in options.only or SCENARIOS:
+        result, errors = run_scenario(name, options.repeat, harness)
+        results[name] = result
+        problems = errors + ([] if options.update_baseline else check(result, baseline.get(name)))
+        status = "FAIL" if problems else ("new" if name not in baseline else "ok")
+        print(f"{name:<30} {result['wall_ms']:>9.1f} {result['simulated_ms']:>9.1f} {result['spawned']:>8} {status}")
+        for problem in problems:
+            print(f"    {problem}")
+        failed = failed or bool(problems)
+
+    if options.update_baseline and not failed:
+        save_baseline(dict(baseline, **results))
+        print(f"Baseline written to {BASELINE_PATH}")
+    structured_log.stop()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
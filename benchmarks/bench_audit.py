@@ -0,0 +1,155 @@
+"""
+Credential audit throughput on a tree of synthetic osu! configs.
+
+Compares the mmap byte scan with decoding every file and running it through the
+export's redaction rules, and fails unless the scan is faster. Checks that the windowed
+prefilter finds a keyword that straddles two windows, that exactly the leaking files are
+reported, then fixes the flagged osu! configs in place (as the app does after asking)
+and checks that a second audit only reports another program's cfg, which must be left
+unchanged, and that the fixed files only lost the flagged lines.
+
+Run from the repository root:
+    python -m benchmarks.bench_audit [file_count]
+Exits non-zero on failure.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from src import config_export, constants, credential_audit
+
+LINES_PER_FILE = 400
+FOLDERS = 40
+FOREIGN_CONFIG = b"[server]\r\npassword = hunter2\r\n" # Another program's cfg: reported, never fixed
+
+
+def make_config(rng, i, kind):
+    """(file bytes, bytes expected after a fix) for one synthetic config."""
+    header = [b"# osu! configuration for player%d" % i, b"# last updated on Monday, 1 January 2024", b"#"]
+    leaked = []
+    if kind == "comment":
+        leaked.append(b"# IMPORTANT: DO NOT SHARE THIS FILE WITH OTHERS")
+    body = [b"Username = player%d" % i]
+    if kind == "password":
+        leaked.append(b"Password = %016x" % rng.getrandbits(64))
+    elif kind == "token":
+        leaked.append(b"LegacyAuthToken = %032x" % rng.getrandbits(128))
+    elif kind == "empty_password":
+        body.append(b"Password = ")
+    body.extend(b"Setting%d = %d" % (n, rng.randrange(1000)) for n in range(LINES_PER_FILE))
+    lines = header + ([leaked[0]] if kind == "comment" else []) + body[:1] + \
+            ([leaked[0]] if kind in ("password", "token") else []) + body[1:]
+    clean = [line for line in lines if line not in leaked]
+    return b"\r\n".join(lines) + b"\r\n", b"\r\n".join(clean) + b"\r\n"
+
+
+def make_tree(root, count):
+    rng = random.Random(1)
+    expected = {}
+    for i in range(count):
+        kind = rng.choices(["clean", "password", "comment", "token", "empty_password", "safe"],
+                           [80, 8, 4, 2, 4, 2])[0]
+        folder = os.path.join(root, f"inbox-{i % FOLDERS}", f"ticket-{i // FOLDERS}")
+        os.makedirs(folder, exist_ok=True)
+        name = f"{constants.SAFE_CONFIG_PREFIX}osu!.player{i}.cfg" if kind == "safe" else f"osu!.player{i}.cfg"
+        data, fixed = make_config(rng, i, "clean" if kind == "safe" else kind)
+        path = os.path.join(folder, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        expected[path] = fixed if kind in ("password", "comment", "token") else None
+    foreign_path = os.path.join(root, "inbox-0", "otherapp.cfg")
+    with open(foreign_path, "wb") as f:
+        f.write(FOREIGN_CONFIG)
+    return expected, foreign_path
+
+
+def decode_audit(root):
+    """The text path: decode each file and check every line with the export's rule set."""
+    ruleset = config_export.get_default_ruleset()
+    flagged = []
+    for path in credential_audit.iter_config_paths(root):
+        with open(path, "rb") as f:
+            lines = config_export.decode_config_lines(f.read())
+        for line in lines:
+            key, sep, value = line.partition("=")
+            key = key.strip()
+            if key[:1] == "#":
+                leaked = ruleset.is_sensitive_comment(line)
+            else:
+                rule = ruleset.match_key(key) if sep else None
+                leaked = rule is not None and rule[1] == constants.REDACTION_ACTION_DROP and bool(value.strip())
+            if leaked:
+                flagged.append(path)
+                break
+    return flagged
+
+
+def check_windows():
+    """The prefilter folds fixed windows; a keyword split across two of them must still be found."""
+    matcher = credential_audit.AuditMatcher()
+    data = b"x" * 1020 + b"PassWord = secret\r\n" + b"y" * 3000
+    return matcher.may_match(data, window=1024) and not matcher.may_match(b"x" * 5000, window=1024)
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main(count=3000):
+    failures = []
+    root = tempfile.mkdtemp(prefix="osu-audit-bench-")
+    try:
+        expected, foreign_path = make_tree(root, count)
+        fixable = sorted(path for path, fixed in expected.items() if fixed is not None)
+        leaking = sorted(fixable + [foreign_path])
+        count += 1
+        total_mb = sum(os.path.getsize(path) for path in expected) / 1e6
+        print(f"{count} configs, {total_mb:.1f} MB, {len(leaking)} leaking")
+
+        if not check_windows():
+            failures.append("windowed prefilter missed a keyword across a window boundary")
+        flagged_text, text_seconds = timed(decode_audit, root)
+        (scanned, flagged, errors), scan_seconds = timed(credential_audit.audit_tree, root)
+        for label, seconds in (("decode + redaction rules", text_seconds), ("mmap scan", scan_seconds)):
+            print(f"{label:<28} {seconds * 1000:>8.1f} ms  {count / seconds:>8.0f} files/s  {total_mb / seconds:>6.1f} MB/s")
+        if scan_seconds >= text_seconds:
+            failures.append(f"mmap scan ({scan_seconds * 1000:.0f} ms) is not faster than decoding ({text_seconds * 1000:.0f} ms)")
+
+        if scanned != count or errors:
+            failures.append(f"scanned {scanned} of {count} files, {len(errors)} error(s)")
+        if [result["path"] for result in flagged] != leaking:
+            failures.append(f"flagged {len(flagged)} files, expected {len(leaking)}")
+        if sorted(flagged_text) != leaking:
+            failures.append(f"decode audit flagged {len(flagged_text)} files, expected {len(leaking)}")
+
+        if [result["path"] for result in flagged if result["osu_config"]] != fixable:
+            failures.append("audit did not tell the osu! configs from the other cfg")
+        (_, fixed, _), fix_seconds = timed(credential_audit.fix_files, fixable)
+        print(f"{'fix in place':<28} {fix_seconds * 1000:>8.1f} ms  ({sum(r['fixed'] for r in fixed)} files rewritten)")
+        (_, flagged_after, _) = credential_audit.audit_tree(root, fix=True) # Must still leave the other cfg alone
+        if [result["path"] for result in flagged_after] != [foreign_path] or flagged_after[0]["fixed"]:
+            failures.append(f"{len(flagged_after)} file(s) flagged after the fix, expected only the other program's cfg")
+        with open(foreign_path, "rb") as f:
+            if f.read() != FOREIGN_CONFIG:
+                failures.append("another program's cfg was changed")
+        for path in fixable:
+            with open(path, "rb") as f:
+                if f.read() != expected[path]:
+                    failures.append(f"{path}: fixed file differs beyond the removed lines")
+                    break
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("OK" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000))
@@ -0,0 +1,133 @@
+"""
+Fleet rollout against several agents on localhost ports.
+
+Each agent simulates a machine that takes a different time to apply the action; one
+never answers in time, one has the wrong token and one port has no agent at all.
+Checks that every machine gets its own result and that the rollout takes about as long
+as the slowest machine (bounded by the per-host timeout), not the sum. Then sends
+tampered requests (changed body, path, time or nonce, a forged or missing signature, the
+wrong token), replays a captured request and sends a stale one, which the agent must all
+reject; a rejected request must not use up its nonce.
+
+Run from the repository root:
+    python -m benchmarks.fleet_localhost [agent_count]
+Exits non-zero on failure.
+"""
+import json
+import socket
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from src import fleet
+
+TOKEN = "bench-token"
+HOST_TIMEOUT = 1.5
+
+
+def make_handler(seconds, ok=True):
+    def handler(action, profile):
+        time.sleep(seconds)
+        return ok, f"{action} applied" if ok else f"{action} failed"
+    return handler
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def post_status(port, body, headers):
+    """HTTP status of one POST /run to the agent on port."""
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/run", method="POST", data=body,
+                                     headers={"Content-Type": "application/json", **headers})
+    try:
+        with urllib.request.urlopen(request, timeout=HOST_TIMEOUT) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def check_replay(port):
+    """A captured request must not run twice, and an old one not at all. Returns failures."""
+    body = json.dumps({"action": "enable_wacom", "profile": None}).encode("utf-8")
+    headers = fleet.signed_headers(TOKEN, "POST", "/run", body)
+    failures = []
+    for attempt, want in (("original", 200), ("replay", 403)):
+        status = post_status(port, body, headers)
+        if status != want:
+            failures.append(f"{attempt} request: expected HTTP {want}, got {status}")
+    timestamp, nonce = f"{time.time() - 2 * fleet.constants.FLEET_SIGNATURE_WINDOW:.3f}", "stale-nonce"
+    stale = {fleet.TIME_HEADER: timestamp, fleet.NONCE_HEADER: nonce,
+             fleet.SIGNATURE_HEADER: fleet.sign(TOKEN, "POST", "/run", timestamp, nonce, body)}
+    status = post_status(port, body, stale)
+    if status != 403:
+        failures.append(f"stale request: expected HTTP 403, got {status}")
+    return failures
+
+
+def check_tampering(port):
+    """Requests whose signature does not match must be refused. Returns failures."""
+    body = json.dumps({"action": "enable_wacom", "profile": None}).encode("utf-8")
+    other_body = json.dumps({"action": "disable_wacom", "profile": None}).encode("utf-8")
+    def tampered(**changes):
+        headers = fleet.signed_headers(TOKEN, "POST", "/run", body)
+        headers.update(changes)
+        return headers
+    cases = [
+        ("changed body", other_body, fleet.signed_headers(TOKEN, "POST", "/run", body)),
+        ("signed for another path", body, fleet.signed_headers(TOKEN, "POST", "/status", body)),
+        ("wrong token", body, fleet.signed_headers("other-token", "POST", "/run", body)),
+        ("forged signature", body, tampered(**{fleet.SIGNATURE_HEADER: "0" * 64})),
+        ("missing signature", body, tampered(**{fleet.SIGNATURE_HEADER: ""})),
+        ("changed time", body, tampered(**{fleet.TIME_HEADER: f"{time.time() + 1:.3f}"})),
+        ("changed nonce", body, tampered(**{fleet.NONCE_HEADER: "other-nonce"})),
+    ]
+    failures = []
+    for name, sent_body, headers in cases:
+        status = post_status(port, sent_body, headers)
+        if status != 403:
+            failures.append(f"{name}: expected HTTP 403, got {status}")
+    # The rejected "changed body" request must not have used up its nonce
+    original = cases[0][2]
+    status = post_status(port, body, original)
+    if status != 200:
+        failures.append(f"untampered request after a tampered copy: expected HTTP 200, got {status}")
+    return failures
+
+
+def main(agent_count=8):
+    delays = [0.1 + 0.05 * i for i in range(agent_count)]
+    agents = [fleet.FleetAgent(make_handler(delay, ok=i != 1), TOKEN, host="127.0.0.1", port=0)
+              for i, delay in enumerate(delays)]
+    agents.append(fleet.FleetAgent(make_handler(HOST_TIMEOUT * 3), TOKEN, host="127.0.0.1", port=0)) # Hangs
+    agents.append(fleet.FleetAgent(make_handler(0), "other-token", host="127.0.0.1", port=0))
+    hosts = [("127.0.0.1", agent.start()) for agent in agents] + [("127.0.0.1", free_port())] # Nobody listening
+
+    start = time.perf_counter()
+    rows = fleet.run_on_fleet(hosts, "run_profile", TOKEN, profile="tournament", timeout=HOST_TIMEOUT)
+    elapsed = time.perf_counter() - start
+    print(fleet.format_results(rows))
+    print(f"Rollout: {elapsed:.2f}s for {len(hosts)} hosts "
+          f"(slowest answering machine {max(delays):.2f}s, timeout {HOST_TIMEOUT}s, sum of delays {sum(delays):.2f}s)")
+
+    expected = ([fleet.RESULT_OK if i != 1 else fleet.RESULT_FAILED for i in range(agent_count)] +
+                [fleet.RESULT_TIMEOUT, fleet.RESULT_REJECTED, fleet.RESULT_UNREACHABLE])
+    failures = [f"{row['host']}: expected {want}, got {row['result']}"
+                for row, want in zip(rows, expected) if row["result"] != want]
+    if elapsed > HOST_TIMEOUT + fleet.constants.FLEET_DEADLINE_GRACE:
+        failures.append(f"rollout took {elapsed:.2f}s, longer than the per-host timeout allows")
+    failures.extend(check_tampering(hosts[0][1]))
+    failures.extend(check_replay(hosts[0][1]))
+    for agent in agents:
+        agent.stop()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("OK" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 8))
@@ -0,0 +1,135 @@
+"""
+Install discovery on a synthetic tree of real and decoy executables.
+
+Builds three roots, most likely first: an osu! folder with the real osu!.exe (and an older
+copy one level down), a Downloads-like root with the OpenTabletDriver install, a stray
+osu!.exe, a folder named osu!.exe and decoys below skipped or too deep folders, and a large
+drive-like root with another stray osu!.exe. Checks the ranking, that _MatchCollector stops
+the search before the large root is walked, and that get_installations answers a second
+call from its cache until a root or a cached executable changes.
+
+Run from the repository root:
+    python -m benchmarks.install_discovery_tree
+Exits non-zero on failure.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from src import constants, install_discovery, structured_log
+
+OSU = install_discovery.TARGET_OSU
+OTD = install_discovery.TARGET_OTD
+LARGE_ROOT_FOLDERS = 300
+
+
+def write_exe(folder, name, mtime=None):
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(b"MZ" + os.urandom(64))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def make_tree(base):
+    """Returns (roots, paths) where paths names the interesting executables."""
+    install_root = os.path.join(base, "Local", "osu!")
+    downloads = os.path.join(base, "Downloads")
+    drive = os.path.join(base, "D")
+    now = time.time()
+    paths = {
+        "osu": write_exe(install_root, constants.OSU_EXECUTABLE),
+        "osu_backup": write_exe(os.path.join(install_root, "backup"), constants.OSU_EXECUTABLE, now - 86400),
+        "otd": write_exe(os.path.join(downloads, "OpenTabletDriver"), constants.OTD_EXECUTABLES[0]),
+        "otd_daemon": write_exe(os.path.join(downloads, "OpenTabletDriver"), constants.OTD_EXECUTABLES[1]),
+        "osu_stray": write_exe(os.path.join(downloads, "osu-old"), constants.OSU_EXECUTABLE, now - 2 * 86400),
+        "osu_skipped": write_exe(os.path.join(downloads, "node_modules", "osu"), constants.OSU_EXECUTABLE),
+        "osu_too_deep": write_exe(os.path.join(downloads, *"abcdefgh"), constants.OSU_EXECUTABLE),
+        "osu_drive": write_exe(os.path.join(drive, "Games", "osu!"), constants.OSU_EXECUTABLE),
+    }
+    os.makedirs(os.path.join(downloads, "fake", constants.OSU_EXECUTABLE)) # A folder, not an executable
+    for i in range(LARGE_ROOT_FOLDERS):
+        os.makedirs(os.path.join(drive, f"folder{i:03}", "sub"))
+    return [install_root, downloads, drive], paths
+
+
+def exes(results, target):
+    return [candidate["exe"] for candidate in results.get(target, [])]
+
+
+def check_collector(check):
+    collector = install_discovery._MatchCollector([OSU, OTD])
+    collector.add({"target": OSU, "root_index": 0})
+    collector.add({"target": OTD, "root_index": 1})
+    collector.root_done(1)
+    stopped_early = collector.stop_event.is_set()
+    collector.root_done(0)
+    check(not stopped_early and collector.stop_event.is_set() and collector.is_complete(3),
+          "collector stops only once every root up to the best match is walked")
+
+
+def main():
+    structured_log.start("ERROR", echo=False)
+    failures = []
+    def check(condition, message):
+        print(("ok   " if condition else "FAIL ") + message)
+        if not condition:
+            failures.append(message)
+
+    base = tempfile.mkdtemp(prefix="osu-discovery-bench-")
+    try:
+        roots, paths = make_tree(base)
+        check_collector(check)
+
+        # One worker walks the roots in order, so the early stop is deterministic
+        start = time.perf_counter()
+        results, complete = install_discovery.discover_installations(roots, max_workers=1)
+        sequential_ms = (time.perf_counter() - start) * 1000
+        check(complete, "search is complete")
+        check(exes(results, OSU) == [paths["osu"], paths["osu_backup"], paths["osu_stray"]],
+              "osu! ranked by root, then depth (skipped, too deep and non-file decoys ignored)")
+        check(exes(results, OTD) == [paths["otd"]], "OpenTabletDriver folder listed once, preferred executable first")
+        check(paths["osu_drive"] not in exes(results, OSU), f"large root never walked ({sequential_ms:.1f} ms)")
+
+        results, complete = install_discovery.discover_installations(roots)
+        check(complete and exes(results, OSU)[:2] == [paths["osu"], paths["osu_backup"]]
+              and exes(results, OTD) == [paths["otd"]], "parallel search ranks the same best candidates")
+
+        # --- Cache ---
+        cache_path = os.path.join(base, "install_cache.json")
+        def lookup(search_roots=roots):
+            return install_discovery.get_installations(search_roots, cache_path=cache_path, max_workers=1)
+        fresh, from_cache = lookup()
+        check(not from_cache and os.path.isfile(cache_path), "first call searches and writes the cache")
+        cached, from_cache = lookup()
+        check(from_cache and cached == fresh, "second call is answered from the cache")
+
+        root_mtime = os.stat(roots[1]).st_mtime + 5
+        os.utime(roots[1], (root_mtime, root_mtime))
+        _, from_cache = lookup()
+        check(not from_cache, "a changed root folder invalidates the cache")
+        _, from_cache = lookup()
+        check(from_cache, "the re-searched result is cached again")
+
+        with open(paths["osu"], 'ab') as f:
+            f.write(b"update")
+        updated, from_cache = lookup()
+        check(not from_cache and updated[OSU][0]["size"] == os.path.getsize(paths["osu"]),
+              "a changed executable invalidates the cache")
+
+        _, from_cache = lookup(roots[:2])
+        check(not from_cache, "different roots invalidate the cache")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    structured_log.stop()
+    print("OK" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
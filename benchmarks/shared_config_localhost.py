@@ -0,0 +1,134 @@
+"""
+Shared config baseline served by a local stand-in HTTP server.
+
+Checks that the baseline is fetched once and then revalidated with ETag (304, no body),
+that a changed baseline is picked up, that an unreachable or slow source never blocks
+(the cached copy is used), that a file source is revalidated by mtime, and that
+config.ini values override the baseline while saving never copies baseline values
+into config.ini. The stand-in server speaks plain HTTP on 127.0.0.1, which
+shared_config.get_source accepts for loopback hosts only; that http:// to another host is
+refused is checked too, as is that the baseline cannot set folder paths or fleet settings.
+
+Run from the repository root:
+    python -m benchmarks.shared_config_localhost
+Exits non-zero on failure.
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src import config_manager, constants, shared_config, structured_log
+
+BASELINE = ("[Resolution]\nDownscaleX = 1280\nDownscaleY = 960\n\n[Profile: lan]\nDriver = otd\nResolution = 1280x960\n\n"
+            "[Paths]\nOsuPath = C:\\Games\\osu!\n\n[Fleet]\nHosts = pc1, pc2\nTimeoutSeconds = 20\n")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.delay)
+        body = server.body.encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            server.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        server.full += 1
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(body, delay=0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.body, server.delay, server.full, server.not_modified = body, delay, 0, 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/baseline.ini"
+
+
+def main():
+    structured_log.start("ERROR", echo=False)
+    failures = []
+    def check(condition, message):
+        print(("ok   " if condition else "FAIL ") + message)
+        if not condition:
+            failures.append(message)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # --- HTTP source ---
+        server, url = serve(BASELINE)
+        check(shared_config.get_source("http://server/baseline.ini") is None
+              and shared_config.get_source("https://server/baseline.ini") is not None
+              and shared_config.get_source("http://localhost/baseline.ini") is not None
+              and shared_config.get_source("http://[::1]/baseline.ini") is not None,
+              "plain http is only accepted for loopback hosts")
+        constants.SHARED_CONFIG_CACHE_FILE_PATH = os.path.join(tmp, "http_cache.json")
+        source = shared_config.get_source(url)
+        check(source is not None and source.location == url, "the local http source is accepted")
+        check(source.cached_text() is None, "no cached copy before the first fetch")
+        check(source.refresh() and source.cached_text() == BASELINE, "first refresh downloads the baseline")
+        check(not source.refresh() and server.not_modified == 1 and server.full == 1, "second refresh is a 304")
+        server.body = BASELINE.replace("pc2", "pc3")
+        check(source.refresh() and "pc3" in source.cached_text(), "a changed baseline is downloaded")
+        server.shutdown()
+        server.server_close()
+        check(not source.refresh() and "pc3" in source.cached_text(), "unreachable source keeps the cached copy")
+        reopened = shared_config.SharedConfigSource(url, cache_path=source.cache_path)
+        check(reopened.cached_text() == source.cached_text(), "cached copy survives a restart")
+
+        slow_server, slow_url = serve(BASELINE, delay=3.0)
+        slow = shared_config.SharedConfigSource(slow_url, cache_path=os.path.join(tmp, "slow_cache.json"), timeout=1.0)
+        start = time.perf_counter()
+        slow.start()
+        slow.cached_text()
+        check(time.perf_counter() - start < 0.1, "starting the refresh does not wait for a slow source")
+        slow_server.shutdown()
+        slow_server.server_close()
+
+        # --- File source ---
+        baseline_path = os.path.join(tmp, "baseline.ini")
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            f.write(BASELINE)
+        file_source = shared_config.SharedConfigSource(baseline_path, cache_path=os.path.join(tmp, "file_cache.json"))
+        check(file_source.refresh() and not file_source.refresh(), "file source is revalidated by mtime and size")
+        with open(baseline_path, 'a', encoding='utf-8') as f:
+            f.write("\n[Metrics]\nEnabled = true\n")
+        check(file_source.refresh(), "a changed file is re-read")
+
+        # --- Layering in config_manager ---
+        constants.CONFIG_FILE_PATH = os.path.join(tmp, "config.ini")
+        constants.SHARED_CONFIG_CACHE_FILE_PATH = os.path.join(tmp, "layered_cache.json")
+        with open(constants.CONFIG_FILE_PATH, 'w', encoding='utf-8') as f:
+            f.write(f"[SharedConfig]\nSource = {baseline_path}\nRefreshSeconds = 0\n\n"
+                    "[Resolution]\nDownscaleY = 720\n\n[Fleet]\nTimeoutSeconds = 45\n")
+        check(config_manager.get_resolution_config() == (None, 720), "nothing from the baseline before it was fetched")
+        config_manager.start_shared_config_refresh()._thread.join(5)
+        check("lan" in config_manager.get_launch_profiles(), "baseline values apply after the refresh")
+        check(config_manager.get_resolution_config() == (1280, 720), "config.ini overrides the baseline")
+        fleet_settings = config_manager.get_fleet_settings()
+        check(config_manager.get_osu_path() is None and fleet_settings["timeout"] == 45 and not fleet_settings["hosts"],
+              "the baseline cannot set folder paths or fleet settings")
+        config_manager.set_otd_path("D:\\OTD")
+        with open(constants.CONFIG_FILE_PATH, encoding='utf-8') as f:
+            local_text = f.read()
+        check("D:\\OTD" in local_text and "1280" not in local_text and "lan" not in local_text,
+              "saving writes only local values to config.ini")
+
+    structured_log.stop()
+    print("OK" if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
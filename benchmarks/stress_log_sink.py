@@ -0,0 +1,79 @@
+"""
+Stress test for the log sink: 100k messages from several threads while a simulated
+UI thread drains once per frame, as App._flush_log does.
+
+Run from the repository root:
+    python -m benchmarks.stress_log_sink [total_messages] [threads]
+Exits non-zero if any message is lost or reordered within a producer thread.
+"""
+import sys
+import threading
+import time
+
+from src import constants
+from src.log_sink import LogSink
+
+
+def run(total_messages, thread_count, max_pending, frame_interval):
+    sink = LogSink(max_pending)
+    per_thread = total_messages // thread_count
+    producers_done = threading.Event()
+
+    def produce(thread_idx):
+        for i in range(per_thread):
+            sink.append(f"t{thread_idx} {i}", "DEBUG")
+
+    threads = [threading.Thread(target=produce, args=(t,)) for t in range(thread_count)]
+    drained = []
+    dropped_total = 0
+    frames = 0
+    start = time.perf_counter()
+    for t in threads: t.start()
+
+    def join_all():
+        for t in threads: t.join()
+        producers_done.set()
+    threading.Thread(target=join_all).start()
+
+    while not producers_done.is_set() or sink.has_pending():
+        entries, dropped = sink.drain(constants.LOG_MAX_BATCH)
+        drained.extend(entries)
+        dropped_total += dropped
+        frames += 1
+        time.sleep(frame_interval)
+    elapsed = time.perf_counter() - start
+
+    # Per-producer order must be preserved in what reached the display
+    last_seen = {}
+    for _ts, _level, _action, message in drained:
+        thread_tag, index = message.split()
+        index = int(index)
+        if index <= last_seen.get(thread_tag, -1):
+            return False, f"out of order: {message}"
+        last_seen[thread_tag] = index
+
+    expected = per_thread * thread_count
+    print(f"  {expected} messages, {thread_count} threads, buffer {max_pending}: "
+          f"{len(drained)} displayed, {dropped_total} reported dropped, {frames} frames, {elapsed:.2f}s")
+    if max_pending >= expected and len(drained) != expected:
+        return False, f"only {len(drained)} of {expected} messages displayed although the buffer could hold them all"
+    actually_dropped = expected - len(drained)
+    if dropped_total != actually_dropped:
+        return False, f"reported {dropped_total} dropped, expected {actually_dropped}"
+    return True, ""
+
+
+def main(total_messages=100_000, thread_count=8):
+    ok = True
+    for max_pending, frame_interval in ((total_messages, 0.0), (constants.LOG_MAX_PENDING, constants.LOG_FLUSH_INTERVAL_MS / 1000)):
+        passed, reason = run(total_messages, thread_count, max_pending, frame_interval)
+        if not passed:
+            print(f"FAIL: {reason}")
+            ok = False
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    sys.exit(main(*args))
@@ -1,13 +1,16 @@
 import customtkinter as ctk
 import sys
 import os
-from src import app, utils, config_manager
+from src import app, utils, config_manager, metrics, structured_log, tracing
 from tkinter import messagebox
 
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
 
 def main():
+    structured_log.start(config_manager.get_log_file_level())
+    config_manager.start_shared_config_refresh() # Uses the cached baseline now; changes apply from the next read
+    tracing.configure(config_manager.get_tracing_enabled())
     if not utils.request_admin_elevation():
         try:
             root_tk = ctk.CTk()
@@ -16,15 +19,21 @@ def main():
                                  "This application requires administrator privileges.\nPlease restart as administrator.")
             root_tk.destroy()
         except Exception as e:
-            print(f"Could not show error message box: {e}")
-            print("ADMIN PRIVILEGES REQUIRED. EXITING.")
+            structured_log.error(f"Could not show error message box: {e}")
+            structured_log.error("ADMIN PRIVILEGES REQUIRED. EXITING.")
         sys.exit(1)
 
-    print("Running with sufficient privileges.")
+    structured_log.info("Running with sufficient privileges.")
+
+    if config_manager.get_metrics_enabled():
+        try:
+            metrics.start_server(config_manager.get_metrics_port())
+        except OSError as e:
+            structured_log.error(f"Could not start the metrics endpoint: {e}")
 
     config_file = config_manager.get_config_path()
     if not os.path.exists(config_file):
-        print(f"Config file not found at {config_file}. Will be created/used by app.")
+        structured_log.info(f"Config file not found at {config_file}. Will be created/used by app.")
 
     main_app = app.App()
     main_app.mainloop()
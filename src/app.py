@@ -1,33 +1,71 @@
 import customtkinter as ctk
-from tkinter import filedialog, Text, END, Scrollbar, messagebox
+from tkinter import filedialog, Text, END, Scrollbar, Menu, messagebox
+import bisect
+import itertools
 import os
+import queue
 import threading
 import time
 import traceback
 import re # For parsing config
-from datetime import datetime
+import struct
+from array import array
 
 # Import modules from our package
 from . import config_manager
 from . import utils
 from . import constants
+from . import config_export
+from . import config_compare
+from . import credential_audit
+from . import config_discovery
+from . import ui_state
+from . import install_discovery
+from . import log_sink
+from . import log_store
+from . import status_channel
+from . import tracing
+from . import fleet
+from . import latency_history
+from . import launch_profiles
+from . import metrics
+from . import osu_config
+from . import stall_watchdog
+from . import state_journal
+from . import structured_log
+
+class ActionError(Exception):
+    """An action cannot run or failed in a way the user should see (shown in a dialog on the UI thread)."""
+    def __init__(self, message, title="Error", status=None):
+        super().__init__(message)
+        self.title = title
+        self.status = status # Status bar text (default: STATUS_ERROR)
+
 
 # --- Custom Export Dialog ---
 class ExportConfigDialog(ctk.CTkToplevel):
     """Modal dialog for selecting osu! configs and export destination."""
-    def __init__(self, parent, config_files):
+    def __init__(self, parent, config_files, config_dir=None, mtimes=None):
         super().__init__(parent)
 
         self.parent = parent
         self.config_files = config_files
+        self.config_dir = config_dir # Used to stat files lazily when sorting by last-modified
         self.selected_configs = []
+        self.selected_set = set(config_files) if len(config_files) == 1 else set() # Pre-check a lone config
+        self.usernames = {f: config_export.get_original_username(f).lower() for f in config_files}
+        self.mtimes = mtimes # filename -> mtime; stat'ed on first sort by last-modified if not given
+        self.view = sorted(config_files, key=str.lower) # Filtered + sorted filenames currently listed
+        self.last_query = ""
+        self.top_index = 0 # Index into self.view of the first visible row
         self.export_path = ctk.StringVar(value=utils.get_desktop_path())
-        self.result = None # Stores (selected_files, export_path) or None
+        self.bundle_var = ctk.BooleanVar(value=False)
+        self.result = None # Stores (selected_files, export_path, bundle) or None
 
         self.title(constants.TITLE_EXPORT_CONFIG_DIALOG)
         self.lift() # Bring window to front
         self.attributes("-topmost", True) # Keep on top
-        self.geometry("500x400") # Adjust size as needed
+        self.geometry("500x480") # Adjust size as needed
         self.resizable(False, False)
         self.protocol("WM_DELETE_WINDOW", self._on_cancel) # Handle window close
 
@@ -37,38 +75,66 @@ class ExportConfigDialog(ctk.CTkToplevel):
 
         # --- Widgets ---
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure(1, weight=1) # Allow scrollable frame to expand
+        self.grid_rowconfigure(2, weight=1) # Allow list frame to expand
 
         # Info Label
         ctk.CTkLabel(self, text=constants.LABEL_SELECT_CONFIGS, anchor="w").grid(
             row=0, column=0, padx=10, pady=(10, 5), sticky="w")
 
-        scroll_frame = ctk.CTkScrollableFrame(self, label_text="")
-        scroll_frame.grid(row=1, column=0, padx=10, pady=5, sticky="nsew")
-
-        self.checkbox_vars = {}
-        for i, cfg_file in enumerate(config_files):
-            var = ctk.StringVar(value="off")
-            # Pre-check the first one if it's the only config file
-            if len(config_files) == 1:
-                var.set(cfg_file) # Use filename as the 'on' value
-            cb = ctk.CTkCheckBox(scroll_frame, text=cfg_file, variable=var, onvalue=cfg_file, offvalue="off")
+        # Search / Select / Sort Frame
+        tools_frame = ctk.CTkFrame(self, fg_color="transparent")
+        tools_frame.grid(row=1, column=0, padx=10, pady=0, sticky="ew")
+        tools_frame.grid_columnconfigure(0, weight=1)
+        # No textvariable: CTkEntry only shows its placeholder without one; typing is picked up on key release
+        self.search_entry = ctk.CTkEntry(tools_frame, placeholder_text=constants.PLACEHOLDER_EXPORT_SEARCH)
+        self.search_entry.grid(row=0, column=0, padx=(0, 5), pady=2, sticky="ew")
+        self.search_entry.bind("<KeyRelease>", lambda _event: self._apply_filter())
+        ctk.CTkButton(tools_frame, text=constants.BUTTON_SELECT_ALL, width=50, command=lambda: self._select_visible(True)).grid(
+            row=0, column=1, padx=2, pady=2)
+        ctk.CTkButton(tools_frame, text=constants.BUTTON_SELECT_NONE, width=50, command=lambda: self._select_visible(False)).grid(
+            row=0, column=2, padx=2, pady=2)
+        self.sort_button = ctk.CTkSegmentedButton(tools_frame, values=[constants.SORT_EXPORT_BY_NAME, constants.SORT_EXPORT_BY_MODIFIED],
+                                                  command=lambda _value: self._apply_filter(force=True))
+        self.sort_button.set(constants.SORT_EXPORT_BY_NAME)
+        self.sort_button.grid(row=1, column=0, columnspan=2, padx=(0, 5), pady=2, sticky="w")
+        self.selection_label = ctk.CTkLabel(tools_frame, text="", anchor="e")
+        self.selection_label.grid(row=1, column=1, columnspan=2, padx=2, pady=2, sticky="e")
+
+        # Virtualized list: a fixed pool of row checkboxes re-bound to whatever part of the view is visible,
+        # so the widget count (and open time) does not depend on how many configs exist.
+        list_frame = ctk.CTkFrame(self)
+        list_frame.grid(row=2, column=0, padx=10, pady=5, sticky="nsew")
+        list_frame.grid_columnconfigure(0, weight=1)
+        self.row_vars = []
+        self.row_checkboxes = []
+        for i in range(constants.EXPORT_DIALOG_VISIBLE_ROWS):
+            var = ctk.BooleanVar(value=False)
+            cb = ctk.CTkCheckBox(list_frame, text="", variable=var, onvalue=True, offvalue=False,
+                                 command=lambda row=i: self._on_row_toggled(row))
             cb.grid(row=i, column=0, padx=5, pady=2, sticky="w")
-            self.checkbox_vars[cfg_file] = var
+            cb.bind("<MouseWheel>", self._on_mouse_wheel)
+            self.row_vars.append(var)
+            self.row_checkboxes.append(cb)
+        list_frame.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.scrollbar = ctk.CTkScrollbar(list_frame, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, rowspan=constants.EXPORT_DIALOG_VISIBLE_ROWS, padx=(0, 2), pady=2, sticky="ns")
+        self._render_rows()
 
         # Export Path Frame
         path_frame = ctk.CTkFrame(self)
-        path_frame.grid(row=2, column=0, padx=10, pady=5, sticky="ew")
+        path_frame.grid(row=3, column=0, padx=10, pady=5, sticky="ew")
         path_frame.grid_columnconfigure(1, weight=1)
 
         ctk.CTkLabel(path_frame, text=constants.LABEL_EXPORT_PATH).grid(row=0, column=0, padx=(5,0), pady=5, sticky="w")
         ctk.CTkEntry(path_frame, textvariable=self.export_path).grid(row=0, column=1, padx=5, pady=5, sticky="ew")
         ctk.CTkButton(path_frame, text=constants.BUTTON_BROWSE_EXPORT_PATH, width=80, command=self._browse_export_path).grid(
             row=0, column=2, padx=5, pady=5)
+        ctk.CTkCheckBox(path_frame, text=constants.CHECKBOX_EXPORT_BUNDLE, variable=self.bundle_var).grid(
+            row=1, column=0, columnspan=3, padx=5, pady=(0, 5), sticky="w")
 
         # Action Buttons Frame
         action_frame = ctk.CTkFrame(self, fg_color="transparent")
-        action_frame.grid(row=3, column=0, padx=10, pady=(5, 10), sticky="e")
+        action_frame.grid(row=4, column=0, padx=10, pady=(5, 10), sticky="e")
 
         ctk.CTkButton(action_frame, text=constants.BUTTON_EXPORT_CANCEL, width=100, command=self._on_cancel).grid(
             row=0, column=0, padx=5)
@@ -87,8 +153,98 @@ class ExportConfigDialog(ctk.CTkToplevel):
              y = parent_y + (parent_h // 2) - (dialog_h // 2)
              self.geometry(f"+{x}+{y}") # Position relative to parent
         else:
-             print("Warning: Could not parse parent geometry to center dialog.")
+             structured_log.warning("Could not parse parent geometry to center dialog.")
+
+    # --- Virtualized List ---
+
+    def _visible_count(self):
+        return len(self.row_checkboxes)
+
+    def _max_top_index(self):
+        return max(0, len(self.view) - self._visible_count())
+
+    def _render_rows(self):
+        """Re-binds the row pool to view[top_index:top_index + rows] and updates the scrollbar."""
+        self.top_index = max(0, min(self.top_index, self._max_top_index()))
+        for i, (cb, var) in enumerate(zip(self.row_checkboxes, self.row_vars)):
+            idx = self.top_index + i
+            if idx < len(self.view):
+                filename = self.view[idx]
+                cb.configure(text=filename)
+                var.set(filename in self.selected_set)
+                cb.grid()
+            else:
+                cb.grid_remove()
+        total = len(self.view)
+        if total:
+            self.scrollbar.set(self.top_index / total, min(1.0, (self.top_index + self._visible_count()) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.selection_label.configure(text=constants.LABEL_EXPORT_SELECTION.format(len(self.selected_set), len(self.config_files)))
+
+    def _scroll_to(self, top_index):
+        top_index = max(0, min(int(top_index), self._max_top_index()))
+        if top_index != self.top_index:
+            self.top_index = top_index
+            self._render_rows()
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self._scroll_to(float(args[0]) * len(self.view))
+        elif action == "scroll":
+            amount, unit = int(args[0]), args[1]
+            step = self._visible_count() if unit == "pages" else 1
+            self._scroll_to(self.top_index + amount * step)
+
+    def _on_mouse_wheel(self, event):
+        self._scroll_to(self.top_index + (-1 if event.delta > 0 else 1) * 3)
+
+    def _on_row_toggled(self, row):
+        idx = self.top_index + row
+        if idx >= len(self.view): return
+        filename = self.view[idx]
+        if self.row_vars[row].get():
+            self.selected_set.add(filename)
+        else:
+            self.selected_set.discard(filename)
+        self.selection_label.configure(text=constants.LABEL_EXPORT_SELECTION.format(len(self.selected_set), len(self.config_files)))
 
+    def _select_visible(self, selected):
+        """Select all/none applies to every config matching the current filter."""
+        if selected:
+            self.selected_set.update(self.view)
+        else:
+            self.selected_set.difference_update(self.view)
+        self._render_rows()
+
+    def _get_mtimes(self):
+        if self.mtimes is None:
+            self.mtimes = {}
+            for filename in self.config_files:
+                try:
+                    self.mtimes[filename] = os.path.getmtime(os.path.join(self.config_dir or "", filename))
+                except OSError:
+                    self.mtimes[filename] = 0
+        return self.mtimes
+
+    def _apply_filter(self, force=False):
+        """Filters by username as you type; narrowing a query only re-filters the current view."""
+        query = self.search_entry.get().strip().lower()
+        if not force and query == self.last_query:
+            return
+        narrowing = not force and self.last_query and query.startswith(self.last_query)
+        candidates = self.view if narrowing else self.config_files
+        view = [f for f in candidates if query in self.usernames[f]] if query else list(candidates)
+        if not narrowing:
+            if self.sort_button.get() == constants.SORT_EXPORT_BY_MODIFIED:
+                mtimes = self._get_mtimes()
+                view.sort(key=lambda f: mtimes[f], reverse=True) # Newest first
+            else:
+                view.sort(key=str.lower)
+        self.view = view
+        self.last_query = query
+        self.top_index = 0
+        self._render_rows()
 
     def _browse_export_path(self):
         directory = filedialog.askdirectory(initialdir=self.export_path.get() or "/", title=constants.TITLE_SELECT_EXPORT_FOLDER)
@@ -97,7 +253,7 @@ class ExportConfigDialog(ctk.CTkToplevel):
 
     def _on_ok(self):
         """Handles OK button click, validates selection, and closes."""
-        self.selected_configs = [var.get() for var in self.checkbox_vars.values() if var.get() != "off"]
+        self.selected_configs = [f for f in self.config_files if f in self.selected_set]
         export_dest = self.export_path.get()
 
         if not self.selected_configs:
@@ -107,7 +263,7 @@ class ExportConfigDialog(ctk.CTkToplevel):
             messagebox.showwarning("Invalid Path", "Please select a valid export destination folder.", parent=self)
             return
 
-        self.result = (self.selected_configs, export_dest)
+        self.result = (self.selected_configs, export_dest, self.bundle_var.get())
         self.grab_release()
         self.destroy()
 
@@ -122,6 +278,367 @@ class ExportConfigDialog(ctk.CTkToplevel):
         return self.result
 
 
+# --- Export Progress Dialog ---
+class ExportProgressDialog(ctk.CTkToplevel):
+    """Non-modal dialog showing overall export progress and per-file status."""
+    def __init__(self, parent, config_files):
+        super().__init__(parent)
+
+        self.parent = parent
+        self.total = len(config_files)
+        self.finished = 0
+        self.status_labels = {}
+
+        self.title(constants.TITLE_EXPORT_PROGRESS_DIALOG)
+        self.lift()
+        self.attributes("-topmost", True)
+        self.geometry("500x350")
+        self.resizable(False, False)
+        self.transient(parent)
+        self.protocol("WM_DELETE_WINDOW", lambda: None) # Closed by the app once export finishes
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(2, weight=1)
+
+        self.progress_label = ctk.CTkLabel(self, text=constants.LABEL_EXPORT_PROGRESS.format(0, self.total), anchor="w")
+        self.progress_label.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="w")
+        self.progress_bar = ctk.CTkProgressBar(self)
+        self.progress_bar.grid(row=1, column=0, padx=10, pady=5, sticky="ew")
+        self.progress_bar.set(0)
+
+        scroll_frame = ctk.CTkScrollableFrame(self, label_text="")
+        scroll_frame.grid(row=2, column=0, padx=10, pady=(5, 10), sticky="nsew")
+        scroll_frame.grid_columnconfigure(0, weight=1)
+
+        pending_text = constants.EXPORT_FILE_STATUS_TEXT[config_export.FILE_STATUS_PENDING]
+        for i, cfg_file in enumerate(config_files):
+            ctk.CTkLabel(scroll_frame, text=cfg_file, anchor="w").grid(row=i, column=0, padx=5, pady=2, sticky="w")
+            status_label = ctk.CTkLabel(scroll_frame, text=pending_text, anchor="e")
+            status_label.grid(row=i, column=1, padx=5, pady=2, sticky="e")
+            self.status_labels[cfg_file] = status_label
+
+    def set_file_status(self, filename, status):
+        """Updates one file's status label and the overall progress (UI thread only)."""
+        label = self.status_labels.get(filename)
+        if label is None or not self.winfo_exists(): return
+        label.configure(text=constants.EXPORT_FILE_STATUS_TEXT.get(status, status))
+        if status in (config_export.FILE_STATUS_DONE, config_export.FILE_STATUS_UP_TO_DATE, config_export.FILE_STATUS_ERROR):
+            self.finished += 1
+            self.progress_bar.set(self.finished / self.total if self.total else 1)
+            self.progress_label.configure(text=constants.LABEL_EXPORT_PROGRESS.format(self.finished, self.total))
+
+    def close(self):
+        if self.winfo_exists():
+            self.destroy()
+
+
+class LogViewer(ctk.CTkFrame):
+    """
+    Log panel backed by a log_store index. Only the visible rows are ever inserted into
+    the Text widget, so scrolling, filtering and searching cost the same for 50 or 50,000
+    entries. Previous sessions' log files can be opened from the source menu; they are
+    indexed in the background and their messages read lazily.
+    """
+    def __init__(self, parent, store, font, bg, fg):
+        super().__init__(parent, fg_color="transparent")
+        self.session_store = store
+        self.source = store # The session store or a log_store.LogFileReader
+        self.view = array('q') # Ids of entries matching the filters
+        self.view_filters = None # (level, action, text, time window) the view was built with
+        self.scanned_id = 0 # Entries before this id have been matched against the filters
+        self.top_index = 0 # Index into self.view of the first visible row
+        self.follow = True # Keep the newest entries in view as they arrive
+        self.known_actions = []
+        self.log_files = {} # Source menu label -> log file path
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        # Filter toolbar
+        toolbar = ctk.CTkFrame(self, fg_color="transparent")
+        toolbar.grid(row=0, column=0, columnspan=2, padx=5, pady=(5, 0), sticky="ew")
+        toolbar.grid_columnconfigure(3, weight=1)
+        # No textvariable, so the placeholder shows (see ExportConfigDialog)
+        self.search_entry = ctk.CTkEntry(toolbar, placeholder_text=constants.PLACEHOLDER_LOG_SEARCH)
+        self.search_entry.grid(row=0, column=0, columnspan=4, padx=(0, 5), pady=2, sticky="ew")
+        self.search_entry.bind("<KeyRelease>", lambda _event: self.refresh())
+        self.count_label = ctk.CTkLabel(toolbar, text="", anchor="e")
+        self.count_label.grid(row=0, column=4, padx=2, pady=2, sticky="e")
+        self.level_menu = ctk.CTkOptionMenu(toolbar, values=constants.LOG_VIEW_LEVEL_OPTIONS, width=100,
+                                            command=lambda _value: self.refresh())
+        self.level_menu.grid(row=1, column=0, padx=(0, 5), pady=2, sticky="w")
+        self.action_menu = ctk.CTkOptionMenu(toolbar, values=[constants.LOG_VIEW_ALL_ACTIONS], width=150,
+                                             command=lambda _value: self.refresh())
+        self.action_menu.grid(row=1, column=1, padx=(0, 5), pady=2, sticky="w")
+        self.time_menu = ctk.CTkOptionMenu(toolbar, values=list(constants.LOG_VIEW_TIME_WINDOWS), width=110,
+                                           command=lambda _value: self.refresh())
+        self.time_menu.grid(row=1, column=2, padx=(0, 5), pady=2, sticky="w")
+        self.source_menu = ctk.CTkOptionMenu(toolbar, values=[constants.LOG_VIEW_CURRENT_SESSION], width=170,
+                                             command=self._on_source_selected)
+        self.source_menu.grid(row=1, column=4, padx=2, pady=2, sticky="e")
+        self._load_log_file_list()
+
+        # Rows
+        self.textbox = Text(self, height=constants.LOG_VIEW_ROWS, wrap="word", state="disabled",
+                            bg=bg, fg=fg, relief="flat", bd=0, font=font)
+        self.textbox.grid(row=1, column=0, padx=(5, 0), pady=5, sticky="nsew")
+        for level, color in constants.LOG_VIEW_LEVEL_COLORS.items():
+            self.textbox.tag_configure(level, foreground=color)
+        self.textbox.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.scrollbar = Scrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, padx=(0, 5), pady=5, sticky="ns")
+        self.refresh()
+
+    # --- Filtering ---
+
+    def _get_filters(self):
+        level = self.level_menu.get()
+        action = self.action_menu.get()
+        return (None if level == constants.LOG_VIEW_ALL_LEVELS else level,
+                None if action == constants.LOG_VIEW_ALL_ACTIONS else action,
+                self.search_entry.get().strip(), self.time_menu.get())
+
+    def refresh(self, force=False):
+        """Rebuilds the view from the index; typing more of the same search only re-filters the current view."""
+        filters = self._get_filters()
+        if not force and filters == self.view_filters:
+            return
+        level, action, text, time_window = filters
+        previous = self.view_filters
+        if not force and previous and previous[:2] == filters[:2] and previous[3] == time_window and \
+           previous[2] and text.lower().startswith(previous[2].lower()):
+            self.view = self.source.narrow(self.view, text)
+        else:
+            window = constants.LOG_VIEW_TIME_WINDOWS.get(time_window)
+            newest = self.source.last_timestamp()
+            since = newest - window if window and newest is not None else None
+            self.view = self.source.query(level, action, text, since)
+        self.view_filters = filters
+        self.scanned_id = self.source.end_id
+        self.follow = True
+        self._render()
+
+    def on_entries_added(self, trimmed=False):
+        """Called after the session store grew: matches only the new entries (UI thread)."""
+        if self.source is not self.session_store:
+            return
+        store = self.session_store
+        if trimmed:
+            cut = bisect.bisect_left(self.view, store.first_id)
+            del self.view[:cut]
+            self.top_index = max(0, self.top_index - cut)
+        level, action, text, _time_window = self.view_filters
+        self.view.extend(store.query(level, action, text, start_id=self.scanned_id))
+        self.scanned_id = store.end_id
+        self._update_action_menu()
+        self._render()
+
+    def _update_action_menu(self):
+        actions = self.source.actions()
+        if actions != self.known_actions:
+            self.known_actions = actions
+            self.action_menu.configure(values=[constants.LOG_VIEW_ALL_ACTIONS] + actions)
+
+    # --- Sources (this session / previous log files) ---
+
+    def _load_log_file_list(self):
+        self.log_files = {}
+        for path in log_store.list_log_files():
+            try:
+                modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(os.path.getmtime(path)))
+            except OSError:
+                continue
+            self.log_files[constants.LOG_VIEW_FILE_LABEL.format(os.path.basename(path), modified)] = path
+        self.source_menu.configure(values=[constants.LOG_VIEW_CURRENT_SESSION] + list(self.log_files))
+
+    def _on_source_selected(self, label):
+        path = self.log_files.get(label)
+        if path is None:
+            self._set_source(self.session_store)
+            return
+        reader = log_store.LogFileReader(path)
+        errors = []
+        def build_index():
+            try:
+                reader.build()
+            except OSError as e:
+                errors.append(str(e))
+        thread = threading.Thread(target=build_index, name="log-file-index", daemon=True)
+        thread.start()
+        self.count_label.configure(text=constants.LABEL_LOG_VIEW_LOADING)
+        self._wait_for_reader(label, thread, reader, errors)
+
+    def _wait_for_reader(self, label, thread, reader, errors):
+        if thread.is_alive():
+            self.after(constants.LOG_VIEW_LOAD_POLL_MS, lambda: self._wait_for_reader(label, thread, reader, errors))
+            return
+        if self.source_menu.get() != label:
+            return # Another source was picked meanwhile
+        if errors:
+            structured_log.warning(f"Could not open log file {reader.path}: {errors[0]}")
+            self.source_menu.set(constants.LOG_VIEW_CURRENT_SESSION)
+            self._set_source(self.session_store)
+            return
+        self._set_source(reader)
+
+    def _set_source(self, source):
+        self.source = source
+        self.action_menu.set(constants.LOG_VIEW_ALL_ACTIONS)
+        self._update_action_menu()
+        self.refresh(force=True)
+
+    # --- Virtualized Rows ---
+
+    def _max_top_index(self):
+        return max(0, len(self.view) - constants.LOG_VIEW_ROWS)
+
+    def _render(self):
+        """Re-renders view[top_index:top_index + rows] and updates the scrollbar and counter."""
+        if self.follow:
+            self.top_index = self._max_top_index()
+        self.top_index = max(0, min(self.top_index, self._max_top_index()))
+        rows = self.view[self.top_index:self.top_index + constants.LOG_VIEW_ROWS]
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", END)
+        for i, entry_id in enumerate(rows):
+            entry = self.source.entry(entry_id)
+            self.textbox.insert(END, ("\n" if i else "") + log_store.format_entry(entry), entry[1])
+        self.textbox.configure(state="disabled")
+        if self.follow:
+            self.textbox.see(END) # Wrapped rows may not all fit; keep the newest visible
+        total = len(self.view)
+        if total:
+            self.scrollbar.set(self.top_index / total, min(1.0, (self.top_index + constants.LOG_VIEW_ROWS) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.count_label.configure(text=constants.LABEL_LOG_VIEW_COUNT.format(total, len(self.source)))
+
+    def _scroll_to(self, top_index):
+        top_index = max(0, min(int(top_index), self._max_top_index()))
+        self.follow = top_index >= self._max_top_index()
+        if top_index != self.top_index:
+            self.top_index = top_index
+            self._render()
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self._scroll_to(float(args[0]) * len(self.view))
+        elif action == "scroll":
+            amount, unit = int(args[0]), args[1]
+            step = constants.LOG_VIEW_ROWS if unit == "pages" else 1
+            self._scroll_to(self.top_index + amount * step)
+
+    def _on_mouse_wheel(self, event):
+        self._scroll_to(self.top_index + (-1 if event.delta > 0 else 1) * 3)
+        return "break"
+
+
+class LatencyStatsDialog(ctk.CTkToplevel):
+    """Read-only table of action/step timings (p50, p95, max in ms) from the latency history."""
+    def __init__(self, parent, rows):
+        super().__init__(parent)
+        self.title(constants.TITLE_LATENCY_STATS.format(constants.LATENCY_STATS_RUNS))
+        self.geometry("640x360")
+        self.transient(parent)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        textbox = ctk.CTkTextbox(self, wrap="none", font=("Consolas", 13))
+        textbox.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="nsew")
+        header = f"{'Action / step':<44}{'runs':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}\n"
+        lines = [header, "-" * (len(header) - 1) + "\n"]
+        for row in rows:
+            label = row["action"] if row["step"] is None else f"  {row['step']}"
+            if row["step"] is None and len(lines) > 2:
+                lines.append("\n")
+            lines.append(f"{label[:43]:<44}{row['runs']:>6}{row['p50'] * 1000:>10.0f}"
+                         f"{row['p95'] * 1000:>10.0f}{row['max'] * 1000:>10.0f}\n")
+        textbox.insert("1.0", "".join(lines))
+        textbox.configure(state="disabled")
+        ctk.CTkButton(self, text="Close", width=100, command=self.destroy).grid(row=1, column=0, padx=10, pady=(5, 10), sticky="e")
+        self.lift()
+
+
+class StallReportDialog(ctk.CTkToplevel):
+    """Read-only report of this session's UI stalls: duration histogram, top sites and recent stacks."""
+    def __init__(self, parent, stats, threshold_ms):
+        super().__init__(parent)
+        self.title(constants.TITLE_STALL_REPORT)
+        self.geometry("720x480")
+        self.transient(parent)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        textbox = ctk.CTkTextbox(self, wrap="none", font=("Consolas", 13))
+        textbox.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="nsew")
+        lines = [f"{stats['stalls']} stall(s) of {threshold_ms:.0f} ms or more\n\n", "Duration\n"]
+        lines.extend(f"  {label:<16}{count:>6}\n" for label, count in stats["histogram"])
+        if stats["sites"]:
+            lines.append("\nCaught at\n")
+            lines.extend(f"  {count:>4}  {site}\n" for site, count in stats["sites"])
+        for report in stats["reports"]:
+            duration = f"{report['duration_ms']} ms" if report["duration_ms"] is not None else "ongoing"
+            lines.append(f"\n--- {time.strftime('%H:%M:%S', time.localtime(report['time']))} ({duration}) {report['site']}\n")
+            lines.append(report["stack"])
+        textbox.insert("1.0", "".join(lines))
+        textbox.configure(state="disabled")
+        ctk.CTkButton(self, text="Close", width=100, command=self.destroy).grid(row=1, column=0, padx=10, pady=(5, 10), sticky="e")
+        self.lift()
+
+
+class FleetDialog(ctk.CTkToplevel):
+    """Sends an action or launch profile to every [Fleet] host at once and shows each machine's result."""
+    def __init__(self, parent, hosts, token, timeout, profile_names):
+        super().__init__(parent)
+        self.parent = parent
+        self.hosts = hosts
+        self.token = token
+        self.timeout = timeout
+        self.title(constants.TITLE_FLEET)
+        self.geometry("760x420")
+        self.transient(parent)
+        self.grid_columnconfigure(1, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        choices = [action for action in constants.FLEET_ACTIONS if action != "run_profile"]
+        choices += [constants.FLEET_PROFILE_PREFIX + name for name in profile_names]
+        self.action_menu = ctk.CTkOptionMenu(self, values=choices, width=220)
+        self.action_menu.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="w")
+        ctk.CTkLabel(self, text=constants.LABEL_FLEET_HOSTS.format(len(hosts))).grid(row=0, column=1, padx=5, pady=(10, 5), sticky="w")
+        self.run_button = ctk.CTkButton(self, text=constants.BUTTON_FLEET_RUN, command=self._start)
+        self.run_button.grid(row=0, column=2, padx=10, pady=(10, 5), sticky="e")
+        self.textbox = ctk.CTkTextbox(self, wrap="none", font=("Consolas", 13), state="disabled")
+        self.textbox.grid(row=1, column=0, columnspan=3, padx=10, pady=(5, 10), sticky="nsew")
+        self.lift()
+
+    def _start(self):
+        choice = self.action_menu.get()
+        if choice.startswith(constants.FLEET_PROFILE_PREFIX):
+            action, profile = "run_profile", choice[len(constants.FLEET_PROFILE_PREFIX):]
+        else:
+            action, profile = choice, None
+        self.run_button.configure(state="disabled")
+        self.parent.update_status(constants.STATUS_FLEET_RUNNING.format(len(self.hosts)))
+        threading.Thread(target=self._rollout, args=(action, profile), name="fleet-rollout", daemon=True).start()
+
+    def _rollout(self, action, profile):
+        start = time.perf_counter()
+        rows = fleet.run_on_fleet(self.hosts, action, self.token, profile, self.timeout)
+        elapsed = time.perf_counter() - start
+        ok = sum(1 for row in rows if row["result"] == fleet.RESULT_OK)
+        self.parent.update_status(constants.STATUS_FLEET_DONE.format(ok, len(rows), elapsed))
+        self.parent.call_on_ui(lambda: self._show(rows))
+
+    def _show(self, rows):
+        if not self.winfo_exists():
+            return
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", END)
+        self.textbox.insert("1.0", fleet.format_results(rows))
+        self.textbox.configure(state="disabled")
+        self.run_button.configure(state="normal")
+
+
 # --- Main App Class ---
 class App(ctk.CTk):
     def __init__(self):
@@ -132,7 +649,15 @@ class App(ctk.CTk):
 
         self.title(f"{constants.APP_NAME} v{constants.APP_VERSION}")
         self.resizable(False, False)
-        self.center_window(650, 610)
+        self.center_window(650, 680)
+
+        # --- Log Sink (any thread appends; the UI flushes batches once per frame into the store) ---
+        self.log_sink = log_sink.LogSink(constants.LOG_MAX_PENDING)
+        self.log_store = log_store.LogStore(config_manager.get_log_max_lines())
+        # --- Status Channel (any thread publishes; the UI shows the latest once per frame) ---
+        self.status_channel = status_channel.StatusChannel(constants.STATUS_READY)
+        # --- UI Calls (workers queue callbacks; the UI runs them once per frame, so workers never touch Tk) ---
+        self._ui_calls = queue.SimpleQueue()
 
         # --- Path Variables ---
         self.osu_path = ctk.StringVar(value=config_manager.get_osu_path() or "")
@@ -146,18 +671,60 @@ class App(ctk.CTk):
         self.res_y_var = ctk.StringVar(value=str(saved_res_y) if saved_res_y else "")
         self.native_res_x = None
         self.native_res_y = None
+        self.sync_osu_config_var = ctk.BooleanVar(value=config_manager.get_sync_osu_config())
+        self.mode_change_var = ctk.StringVar(value=constants.MODE_CHANGE_LABELS[config_manager.get_mode_change()])
+        self.state_journal = state_journal.get_journal() # Original display mode/driver state until restored
+
+        # --- Config Discovery (background scan + folder watcher) ---
+        self.config_index = config_discovery.ConfigIndex()
+        self.discovered_installs = {} # install_discovery target -> ranked candidates
+        self.latency_history = latency_history.LatencyHistory()
+
+        # --- Launch Profiles (compiled to plans on first run, cached until their inputs change) ---
+        self.launch_profiles = launch_profiles.load_profiles(config_manager.get_launch_profiles())
+        self.plan_cache = launch_profiles.PlanCache()
+
+        # --- Fleet (agent accepts actions from a coordinator; this instance can coordinate too) ---
+        self.fleet_settings = config_manager.get_fleet_settings()
+        self.fleet_agent = None
+
+        # --- UI Stall Watchdog (heartbeats come from _flush_ui) ---
+        stall_threshold_ms = config_manager.get_stall_threshold_ms()
+        self.stall_watchdog = stall_watchdog.StallWatchdog(
+            threading.get_ident(), constants.LOG_FLUSH_INTERVAL_MS, stall_threshold_ms) if stall_threshold_ms else None
+
+        # --- UI State (button states are derived from these flags) ---
+        self.ui_state = ui_state.UIStateStore(
+            is_admin=utils.is_admin(), # Cached once; elevation cannot change while running
+            osu_valid=False, otd_valid=False, native_res_available=False,
+            display_journaled=self.state_journal.get_open(state_journal.KIND_DISPLAY) is not None,
+            session_mode=utils.session_mode_active(),
+            res_x_valid=self._is_int(self.res_x_var.get()), res_y_valid=self._is_int(self.res_y_var.get()),
+            task_running=False, export_scanning=False, profiles_available=bool(self.launch_profiles))
 
         # --- GUI Elements ---
         self.create_widgets()
+        self._bind_widget_states()
+        self._flush_ui()
 
         # --- Initial State ---
         self.validate_paths_on_startup()
+        if self.is_osu_valid:
+            self.config_index.start(self.osu_path.get())
+        if not self.is_osu_valid or not self.is_otd_valid:
+            self.discover_installations_async()
         self.fetch_native_resolution_async() 
         self.update_button_states() 
-        self.res_x_var.trace_add("write", self._on_res_entry_change)
-        self.res_y_var.trace_add("write", self._on_res_entry_change)
+        self.res_x_var.trace_add("write", lambda *args: self._on_res_entry_change("res_x_valid", self.res_x_var))
+        self.res_y_var.trace_add("write", lambda *args: self._on_res_entry_change("res_y_valid", self.res_y_var))
 
         config_manager.ensure_config_exists() # Ensure config dir exists
+        if self.stall_watchdog:
+            self.stall_watchdog.start()
+        if self.fleet_settings["agent_enabled"]:
+            self.start_fleet_agent()
+        if self.state_journal.open_entries():
+            self.after(0, self.offer_state_restore)
 
     def center_window(self, width=600, height=400):
         screen_width = self.winfo_screenwidth()
@@ -171,6 +738,21 @@ class App(ctk.CTk):
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(4, weight=1) # Log area row index is now 4
 
+        # --- Menu Bar ---
+        menu_bar = Menu(self)
+        diagnostics_menu = Menu(menu_bar, tearoff=0)
+        diagnostics_menu.add_command(label=constants.MENU_SAVE_TRACE.format(constants.TRACE_EXPORT_ACTIONS),
+                                     command=self.save_action_trace)
+        diagnostics_menu.add_command(label=constants.MENU_LATENCY_STATS, command=self.show_latency_stats)
+        diagnostics_menu.add_command(label=constants.MENU_STALL_REPORT, command=self.show_stall_report)
+        diagnostics_menu.add_separator()
+        diagnostics_menu.add_command(label=constants.MENU_AUDIT_CONFIGS, command=self.trigger_audit_configs)
+        menu_bar.add_cascade(label=constants.MENU_DIAGNOSTICS, menu=diagnostics_menu)
+        fleet_menu = Menu(menu_bar, tearoff=0)
+        fleet_menu.add_command(label=constants.MENU_FLEET_RUN, command=self.show_fleet_dialog)
+        menu_bar.add_cascade(label=constants.MENU_FLEET, menu=fleet_menu)
+        self.configure(menu=menu_bar)
+
         # --- Path Selection Frame (Row 0) ---
         path_frame = ctk.CTkFrame(self)
         path_frame.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="ew")
@@ -190,21 +772,27 @@ class App(ctk.CTk):
         button_frame = ctk.CTkFrame(self)
         button_frame.grid(row=1, column=0, padx=10, pady=5, sticky="ew")
         button_frame.grid_columnconfigure((0, 1), weight=1)
-        self.run_osu_otd_btn = ctk.CTkButton(button_frame, text=constants.BUTTON_RUN_OSU_OTD, command=lambda: self.run_task(self.action_run_osu_with_otd))
+        self.run_osu_otd_btn = ctk.CTkButton(button_frame, text=constants.BUTTON_RUN_OSU_OTD, command=lambda: self.run_action(self.action_run_osu_with_otd))
         self.run_osu_otd_btn.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
-        self.run_osu_only_btn = ctk.CTkButton(button_frame, text=constants.BUTTON_RUN_OSU_ONLY, command=lambda: self.run_task(self.action_run_osu_only))
+        self.run_osu_only_btn = ctk.CTkButton(button_frame, text=constants.BUTTON_RUN_OSU_ONLY, command=lambda: self.run_action(self.action_run_osu_only))
         self.run_osu_only_btn.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
-        self.run_otd_only_btn = ctk.CTkButton(button_frame, text=constants.BUTTON_RUN_OTD_ONLY, command=lambda: self.run_task(self.action_run_otd_only))
+        self.run_otd_only_btn = ctk.CTkButton(button_frame, text=constants.BUTTON_RUN_OTD_ONLY, command=lambda: self.run_action(self.action_run_otd_only))
         self.run_otd_only_btn.grid(row=1, column=0, padx=5, pady=5, sticky="ew")
-        self.enable_wacom_btn = ctk.CTkButton(button_frame, text=constants.BUTTON_ENABLE_WACOM, command=lambda: self.run_task(self.action_enable_wacom))
+        self.enable_wacom_btn = ctk.CTkButton(button_frame, text=constants.BUTTON_ENABLE_WACOM, command=lambda: self.run_action(self.action_enable_wacom))
         self.enable_wacom_btn.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
+        profile_names = list(self.launch_profiles) or [constants.LABEL_NO_PROFILES]
+        self.profile_menu = ctk.CTkOptionMenu(button_frame, values=profile_names)
+        self.profile_menu.grid(row=2, column=0, padx=5, pady=5, sticky="ew")
+        self.run_profile_btn = ctk.CTkButton(button_frame, text=constants.BUTTON_RUN_PROFILE,
+                                             command=lambda: self.run_action(self.action_run_profile, self.profile_menu.get()))
+        self.run_profile_btn.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
 
         # --- Resolution Control Frame (Row 2) ---
         res_frame = ctk.CTkFrame(self)
         res_frame.grid(row=2, column=0, padx=10, pady=5, sticky="ew")
         res_frame.grid_columnconfigure(0, weight=1) # Downscale button space
         res_frame.grid_columnconfigure(5, weight=1) # Restore button space
-        self.downscale_btn = ctk.CTkButton(res_frame, text=constants.BUTTON_DOWNSCALE, command=lambda: self.run_task(self.action_downscale_resolution))
+        self.downscale_btn = ctk.CTkButton(res_frame, text=constants.BUTTON_DOWNSCALE, command=lambda: self.run_action(self.action_downscale_resolution))
         self.downscale_btn.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
         ctk.CTkLabel(res_frame, text=constants.LABEL_RES_X, width=20).grid(row=0, column=1, padx=(5,0), pady=5, sticky="e")
         self.res_x_entry = ctk.CTkEntry(res_frame, textvariable=self.res_x_var, width=60)
@@ -212,31 +800,34 @@ class App(ctk.CTk):
         ctk.CTkLabel(res_frame, text=constants.LABEL_RES_Y, width=20).grid(row=0, column=3, padx=(5,0), pady=5, sticky="e")
         self.res_y_entry = ctk.CTkEntry(res_frame, textvariable=self.res_y_var, width=60)
         self.res_y_entry.grid(row=0, column=4, padx=(0,5), pady=5)
-        self.restore_res_btn = ctk.CTkButton(res_frame, text=constants.BUTTON_RESTORE_NATIVE, command=lambda: self.run_task(self.action_restore_resolution))
+        self.restore_res_btn = ctk.CTkButton(res_frame, text=constants.BUTTON_RESTORE_NATIVE, command=lambda: self.run_action(self.action_restore_resolution))
         self.restore_res_btn.grid(row=0, column=5, padx=5, pady=5, sticky="ew")
+        ctk.CTkCheckBox(res_frame, text=constants.CHECKBOX_SYNC_OSU_CONFIG, variable=self.sync_osu_config_var,
+                        command=lambda: config_manager.set_sync_osu_config(self.sync_osu_config_var.get())).grid(
+            row=1, column=0, columnspan=3, padx=5, pady=(0, 5), sticky="w")
+        ctk.CTkSegmentedButton(res_frame, values=list(constants.MODE_CHANGE_LABELS.values()), variable=self.mode_change_var,
+                               command=self._on_mode_change).grid(row=1, column=3, columnspan=3, padx=5, pady=(0, 5), sticky="e")
 
         # --- Utility Frame (Row 3) 
         utility_frame = ctk.CTkFrame(self)
         utility_frame.grid(row=3, column=0, padx=10, pady=5, sticky="ew")
-        utility_frame.grid_columnconfigure((0, 1), weight=1) # Give buttons equal space
+        utility_frame.grid_columnconfigure((0, 1, 2), weight=1) # Give buttons equal space
         self.go_to_osu_btn = ctk.CTkButton(utility_frame, text=constants.BUTTON_GO_TO_OSU_FOLDER, command=self.action_go_to_osu_folder)
         self.go_to_osu_btn.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
         self.export_config_btn = ctk.CTkButton(utility_frame, text=constants.BUTTON_EXPORT_CONFIG, command=self.trigger_export_config) # Doesn't use run_task directly
         self.export_config_btn.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        self.compare_configs_btn = ctk.CTkButton(utility_frame, text=constants.BUTTON_COMPARE_CONFIGS, command=self.trigger_compare_configs)
+        self.compare_configs_btn.grid(row=0, column=2, padx=5, pady=5, sticky="ew")
 
         # --- Logging Frame (Row 4) 
         log_frame = ctk.CTkFrame(self)
         log_frame.grid(row=4, column=0, padx=10, pady=(5, 10), sticky="nsew")
         log_frame.grid_rowconfigure(0, weight=1)
         log_frame.grid_columnconfigure(0, weight=1)
-        self.log_textbox = Text(log_frame, height=10, wrap="word", state="disabled",
-                        bg=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkFrame"]["fg_color"][1]),
-                        fg=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkLabel"]["text_color"]),
-                        relief="flat", bd=0, font=("Consolas", 20))
-        scrollbar = Scrollbar(log_frame, command=self.log_textbox.yview)
-        self.log_textbox['yscrollcommand'] = scrollbar.set
-        self.log_textbox.grid(row=0, column=0, padx=(5,0), pady=5, sticky="nsew")
-        scrollbar.grid(row=0, column=1, padx=(0,5), pady=5, sticky="ns")
+        self.log_viewer = LogViewer(log_frame, self.log_store, font=("Consolas", 20),
+                                    bg=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkFrame"]["fg_color"][1]),
+                                    fg=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkLabel"]["text_color"]))
+        self.log_viewer.grid(row=0, column=0, sticky="nsew")
 
         # --- Status Bar (Row 5) 
         self.status_label = ctk.CTkLabel(self, text=constants.STATUS_READY, anchor="w")
@@ -249,51 +840,93 @@ class App(ctk.CTk):
             self.update_status(constants.STATUS_CONFIG_MISSING)
 
     def log_message(self, message, level="INFO"):
-        """Appends a message to the log text box."""
-        timestamp = time.strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp} {level}] {message}\n"
-        self.log_textbox.configure(state="normal")
-        self.log_textbox.insert(END, formatted_message)
-        self.log_textbox.configure(state="disabled")
-        self.log_textbox.see(END) # Scroll to the bottom
+        """Queues a message for the log view and the log file. Safe to call from any thread."""
+        self.log_sink.append(message, level, structured_log.current_action())
+        structured_log.log(message, level, source="ui")
+
+    def call_on_ui(self, callback):
+        """Runs callback() on the UI thread at the next frame. Safe to call from any thread."""
+        self._ui_calls.put(callback)
+
+    def _flush_ui(self):
+        """Per-frame UI update: watchdog heartbeat, queued UI calls, pending log entries and the latest status (UI thread)."""
+        if self.stall_watchdog:
+            self.stall_watchdog.beat()
+        # Schedule the next frame first: a callback may open a modal dialog, whose nested event
+        # loop keeps running these frames (and the heartbeat) until it is closed
+        self.after(constants.LOG_FLUSH_INTERVAL_MS, self._flush_ui)
+        while True:
+            try:
+                callback = self._ui_calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback()
+            except Exception as e:
+                structured_log.exception(f"Error in UI callback: {e}")
+        self._flush_log()
+        status_text = self.status_channel.take_changed()
+        if status_text is not None:
+            self.status_label.configure(text=status_text)
+
+    def _flush_log(self):
+        """Moves pending log entries into the store in one batch and refreshes the view."""
+        if self.log_sink.has_pending():
+            entries, dropped = self.log_sink.drain(constants.LOG_MAX_BATCH)
+            if dropped:
+                entries.insert(0, (time.time(), "WARN", None, f"{dropped} log line(s) dropped (logging faster than the display)."))
+            trimmed = self.log_store.extend(entries)
+            self.log_viewer.on_entries_added(trimmed)
         
-    def update_status(self, message):
-        """Updates the bottom status bar label."""
-        self.status_label.configure(text=message)
-        self.update_idletasks() # Force GUI update
-
-    def _on_res_entry_change(self, *args):
-        """Callback when resolution entry text changes."""
-        self.update_button_states()
-
-    def update_button_states(self):
-        """Enables or disables action buttons based on validity and state."""
-        # Assume admin rights were obtained if app is running
-        is_admin_ok = utils.is_admin()
-
-        # Path-based buttons
-        main_state = "normal" if (self.is_osu_valid and self.is_otd_valid and is_admin_ok) else "disabled"
-        osu_only_state = "normal" if self.is_osu_valid else "disabled" # Doesn't need admin technically
-        otd_only_state = "normal" if self.is_otd_valid and is_admin_ok else "disabled"
-        wacom_enable_state = "normal" if is_admin_ok else "disabled"
-
-        self.run_osu_otd_btn.configure(state=main_state)
-        self.run_osu_only_btn.configure(state=osu_only_state)
-        self.run_otd_only_btn.configure(state=otd_only_state)
-        self.enable_wacom_btn.configure(state=wacom_enable_state)
+    def update_status(self, message, step=None, total=None):
+        """Publishes a status bar message (optionally step n of total). Safe to call from any thread."""
+        self.status_channel.publish(message, step, total)
+
+    @staticmethod
+    def _is_int(text):
+        try: int(text); return True
+        except ValueError: return False
+
+    def _on_res_entry_change(self, state_key, variable):
+        """Callback when one resolution entry's text changes; only that entry is re-parsed."""
+        self.ui_state.set(**{state_key: self._is_int(variable.get())})
+
+    def _bind_widget_states(self):
+        """Derives each button's state from the UI state store (reconfigured only on change)."""
+        def bind_button(button, keys, predicate):
+            self.ui_state.bind(keys, lambda state: "normal" if predicate(state) else "disabled",
+                               lambda value: button.configure(state=value))
+
+        # Path-based buttons (disabled while a task runs)
+        bind_button(self.run_osu_otd_btn, ("osu_valid", "otd_valid", "is_admin", "task_running"),
+                    lambda s: s["osu_valid"] and s["otd_valid"] and s["is_admin"] and not s["task_running"])
+        bind_button(self.run_osu_only_btn, ("osu_valid", "task_running"), # Doesn't need admin technically
+                    lambda s: s["osu_valid"] and not s["task_running"])
+        bind_button(self.run_otd_only_btn, ("otd_valid", "is_admin", "task_running"),
+                    lambda s: s["otd_valid"] and s["is_admin"] and not s["task_running"])
+        bind_button(self.enable_wacom_btn, ("is_admin", "task_running"),
+                    lambda s: s["is_admin"] and not s["task_running"])
+        bind_button(self.run_profile_btn, ("profiles_available", "is_admin", "task_running"),
+                    lambda s: s["profiles_available"] and s["is_admin"] and not s["task_running"])
 
         # Resolution buttons
-        try: int(self.res_x_var.get()); int(self.res_y_var.get()); num_valid = True
-        except ValueError: num_valid = False
-        downscale_state = "normal" if is_admin_ok and num_valid else "disabled"
-        restore_state = "normal" if is_admin_ok and self.native_res_x is not None else "disabled"
-        self.downscale_btn.configure(state=downscale_state)
-        self.restore_res_btn.configure(state=restore_state)
+        bind_button(self.downscale_btn, ("is_admin", "res_x_valid", "res_y_valid", "task_running"),
+                    lambda s: s["is_admin"] and s["res_x_valid"] and s["res_y_valid"] and not s["task_running"])
+        bind_button(self.restore_res_btn, ("is_admin", "native_res_available", "display_journaled", "session_mode", "task_running"),
+                    lambda s: s["is_admin"] and (s["native_res_available"] or s["display_journaled"] or s["session_mode"])
+                    and not s["task_running"])
 
         # Utility buttons (don't require admin)
-        utility_state = "normal" if self.is_osu_valid else "disabled"
-        self.go_to_osu_btn.configure(state=utility_state)
-        self.export_config_btn.configure(state=utility_state)
+        bind_button(self.go_to_osu_btn, ("osu_valid",), lambda s: s["osu_valid"])
+        bind_button(self.export_config_btn, ("osu_valid", "export_scanning"),
+                    lambda s: s["osu_valid"] and not s["export_scanning"])
+
+    def update_button_states(self):
+        """Pushes the app's validity flags into the UI state store (UI thread only)."""
+        self.ui_state.set(osu_valid=self.is_osu_valid, otd_valid=self.is_otd_valid,
+                          native_res_available=self.native_res_x is not None,
+                          display_journaled=self.state_journal.get_open(state_journal.KIND_DISPLAY) is not None,
+                          session_mode=utils.session_mode_active())
 
     def validate_paths_on_startup(self):
         """Validates paths loaded from config on startup."""
@@ -341,18 +974,67 @@ class App(ctk.CTk):
 
         self.update_button_states() 
 
+    def _get_discovered_folder(self, target):
+        candidates = self.discovered_installs.get(target) or []
+        return candidates[0]["folder"] if candidates else None
+
     def browse_osu_path(self):
-        default_osu = os.path.join(os.getenv('LOCALAPPDATA', ''), 'osu!')
+        default_osu = self._get_discovered_folder(install_discovery.TARGET_OSU) or \
+                      os.path.join(os.getenv('LOCALAPPDATA', ''), 'osu!')
         self.browse_path(self.osu_path, constants.TITLE_SELECT_OSU_FOLDER,
                          utils.is_valid_osu_path, config_manager.set_osu_path, 'is_osu_valid',
                          default_suggestion=default_osu)
+        if self.is_osu_valid and not self.config_index.is_watching(self.osu_path.get()):
+            self.config_index.start(self.osu_path.get())
 
     def browse_otd_path(self):
-        default_otd = os.path.join(os.path.expanduser('~'), 'Downloads') 
+        default_otd = self._get_discovered_folder(install_discovery.TARGET_OTD) or \
+                      os.path.join(os.path.expanduser('~'), 'Downloads')
         self.browse_path(self.otd_path, constants.TITLE_SELECT_OTD_FOLDER,
                          utils.is_valid_otd_path, config_manager.set_otd_path, 'is_otd_valid',
                          default_suggestion=default_otd)
 
+    # --- Installation Auto-Discovery ---
+    def discover_installations_async(self):
+        self.log_message("Searching for osu! and OpenTabletDriver installations...")
+        thread = threading.Thread(target=self._discover_installations_task, daemon=True)
+        thread.start()
+
+    def _discover_installations_task(self):
+        start = time.perf_counter()
+        try:
+            results, from_cache = install_discovery.get_installations()
+        except Exception as e:
+            self.log_message(f"Installation search failed: {e}", level="WARN")
+            return
+        elapsed = time.perf_counter() - start
+        self.call_on_ui(lambda: self._apply_discovered_installations(results, from_cache, elapsed))
+
+    def _apply_discovered_installations(self, results, from_cache, elapsed):
+        """Fills in missing/invalid paths with the best discovered candidates (UI thread)."""
+        self.discovered_installs = results
+        source = "cache" if from_cache else "search"
+        self.log_message(f"Installation search finished in {elapsed:.2f}s ({source}).")
+
+        osu_folder = self._get_discovered_folder(install_discovery.TARGET_OSU)
+        if not self.is_osu_valid and osu_folder and utils.is_valid_osu_path(osu_folder):
+            self.osu_path.set(osu_folder)
+            config_manager.set_osu_path(osu_folder)
+            self.is_osu_valid = True
+            self.config_index.start(osu_folder)
+            self.log_message(f"Auto-detected osu! folder: {osu_folder}")
+
+        otd_folder = self._get_discovered_folder(install_discovery.TARGET_OTD)
+        if not self.is_otd_valid and otd_folder and utils.is_valid_otd_path(otd_folder):
+            self.otd_path.set(otd_folder)
+            config_manager.set_otd_path(otd_folder)
+            self.is_otd_valid = True
+            self.log_message(f"Auto-detected OpenTabletDriver folder: {otd_folder}")
+
+        if not self.is_osu_valid or not self.is_otd_valid:
+            self.log_message(constants.STATUS_CONFIG_MISSING, level="WARN")
+        self.update_button_states()
+
     # --- Native Resolution Fetching ---
     def fetch_native_resolution_async(self):
         self.log_message("Fetching native screen resolution...")
@@ -364,139 +1046,281 @@ class App(ctk.CTk):
         """Task to get native resolution."""
         native_x, native_y = utils.get_native_resolution()
         if native_x and native_y:
-            self.native_res_x = native_x
-            self.native_res_y = native_y
-            self.after(0, lambda: self.log_message(f"Native resolution detected: {self.native_res_x}x{self.native_res_y}"))
-            self.after(0, lambda: self.update_status(constants.STATUS_READY))
+            self.log_message(f"Native resolution detected: {native_x}x{native_y}")
+            self.update_status(constants.STATUS_READY)
+            self.call_on_ui(lambda: self._set_native_resolution(native_x, native_y))
         else:
-            self.after(0, lambda: self.log_message(constants.STATUS_GET_NATIVE_FAIL, level="ERROR"))
-            self.after(0, lambda: self.update_status(constants.STATUS_GET_NATIVE_FAIL))
-        self.after(100, self.update_button_states)
+            self.log_message(constants.STATUS_GET_NATIVE_FAIL, level="ERROR")
+            self.update_status(constants.STATUS_GET_NATIVE_FAIL)
+
+    def _set_native_resolution(self, native_x, native_y):
+        self.native_res_x = native_x
+        self.native_res_y = native_y
+        self.update_button_states()
 
     # --- Task Running Wrapper ---
+    def read_action_inputs(self):
+        """
+        Snapshot of the Tk variables and flags the actions use (UI thread only). Actions
+        get it as their first argument, so workers never read Tk state.
+        """
+        return {
+            "osu_dir": self.osu_path.get(), "otd_dir": self.otd_path.get(),
+            "osu_valid": self.is_osu_valid, "otd_valid": self.is_otd_valid,
+            "res_x": self.res_x_var.get(), "res_y": self.res_y_var.get(),
+            "temporary": self.mode_change_var.get() == constants.MODE_CHANGE_LABELS[constants.MODE_CHANGE_SESSION],
+            "sync_osu_config": self.sync_osu_config_var.get(),
+            "native_resolution": (self.native_res_x, self.native_res_y),
+        }
+
+    def run_action(self, action_function, *args):
+        """Runs an action_* method as a task with the inputs read now, on the UI thread."""
+        self.run_task(action_function, (self.read_action_inputs(),) + args)
+
     def run_task(self, target_function, args=()):
         """Runs a target function in a separate thread to avoid freezing the GUI."""
         # Disable all action buttons immediately
-        self._set_action_buttons_state("disabled")
-        self.update_status(constants.STATUS_RUNNING)
+        self.ui_state.set(task_running=True)
+        self._begin_task()
         # Pass arguments to the wrapper correctly
         thread = threading.Thread(target=self._task_wrapper, args=(target_function, args), daemon=True)
         thread.start()
 
-    def _task_wrapper(self, target_function, args):
-        """Internal wrapper for threaded tasks."""
+    def _begin_task(self):
+        self.status_channel.start_timer()
+        self.update_status(constants.STATUS_RUNNING)
+
+    def _task_wrapper(self, target_function, args, show_errors=True):
+        """Internal wrapper for threaded tasks. Returns (ok, error message or None)."""
+        # Everything logged by this thread (here and in utils) is tagged with the action name
+        action_name = re.sub(r"^(action|process)_", "", target_function.__name__)
+        start = time.perf_counter()
+        with structured_log.action_scope(action_name), tracing.action(action_name) as action_span:
+            ok, error = self._run_task_function(target_function, args, show_errors)
+        elapsed = time.perf_counter() - start
+        metrics.observe_action(action_name, elapsed, ok)
+        self._record_action_latency(action_name, elapsed, tracing.child_spans(action_span), ok)
+        return ok, error
+
+    def _record_action_latency(self, action_name, total_seconds, steps, ok):
+        try:
+            self.latency_history.append_run(action_name, total_seconds, steps, ok)
+        except (OSError, struct.error) as e:
+            structured_log.warning(f"Could not record action timing: {e}")
+
+    def _run_task_function(self, target_function, args, show_errors=True):
+        """Runs the task and reports errors (in a dialog if show_errors). Returns (ok, error message or None)."""
         try:
             target_function(*args)
-            if self.status_label.cget("text") == constants.STATUS_RUNNING:
-                 self.after(0, lambda: self.update_status(constants.STATUS_READY))
-            self.after(0, lambda: self.log_message("Task completed.", level="INFO"))
+            if self.status_channel.get_message() == constants.STATUS_RUNNING:
+                 self.update_status(constants.STATUS_READY)
+            self.log_message("Task completed.", level="INFO")
+            return True, None
+        except ActionError as e:
+            self.log_message(str(e), level="ERROR")
+            self.update_status(e.status or constants.STATUS_ERROR)
+            if show_errors:
+                self.call_on_ui(lambda: messagebox.showerror(e.title, str(e), parent=self))
+            return False, str(e)
         except Exception as e:
             error_message = f"Error during task execution: {e}"
             traceback_info = traceback.format_exc()
-            self.after(0, lambda: self.log_message(error_message, level="ERROR"))
-            self.after(0, lambda: self.log_message(traceback_info, level="DEBUG"))
-            self.after(0, lambda: self.update_status(constants.STATUS_ERROR))
+            self.log_message(error_message, level="ERROR")
+            self.log_message(traceback_info, level="DEBUG")
+            self.update_status(constants.STATUS_ERROR)
+            return False, error_message
         finally:
-            self.after(100, self.update_button_states)
-
-    def _set_action_buttons_state(self, state):
-        """Sets the state of *most* action buttons (excludes browse/utility)."""
-        buttons = [
-            self.run_osu_otd_btn, self.run_osu_only_btn, self.run_otd_only_btn,
-            self.enable_wacom_btn, self.downscale_btn, self.restore_res_btn
-        ]
-        for btn in buttons:
-            btn.configure(state=state)
-        self.update_idletasks() # Ensure visual update
+            self.status_channel.stop_timer()
+            self.call_on_ui(lambda: (self.ui_state.set(task_running=False), self.update_button_states()))
+
+    # --- Fleet ---
+    def start_fleet_agent(self):
+        """Accepts actions from a fleet coordinator on [Fleet] AgentPort (requires [Fleet] Token)."""
+        settings = self.fleet_settings
+        if not settings["token"]:
+            self.log_message("Fleet agent not started: set Token under [Fleet] in config.ini.", level="ERROR")
+            return
+        try:
+            self.fleet_agent = fleet.FleetAgent(self.run_fleet_action, settings["token"],
+                                                host=settings["agent_host"], port=settings["agent_port"])
+            port = self.fleet_agent.start()
+            self.log_message(f"Fleet agent listening on port {port}.")
+        except OSError as e:
+            self.fleet_agent = None
+            self.log_message(f"Could not start the fleet agent: {e}", level="ERROR")
+
+    def run_fleet_action(self, action, profile=None):
+        """
+        Runs an action sent by a fleet coordinator (agent thread). The UI thread claims the
+        task slot and reads the inputs, as for a button; errors go into the reply instead of
+        a dialog nobody at the machine may see. Returns (ok, final status or error message).
+        """
+        if action not in constants.FLEET_ACTIONS:
+            return False, f"Unknown action '{action}'."
+        request = {"lock": threading.Lock(), "claimed": threading.Event(), "done": threading.Event(), "cancelled": False}
+        self.call_on_ui(lambda: self._start_fleet_task(action, profile, request))
+        if not request["claimed"].wait(constants.FLEET_CLAIM_TIMEOUT):
+            with request["lock"]:
+                if not request["claimed"].is_set():
+                    request["cancelled"] = True # The UI thread must not start it after we replied
+                    return False, "The app did not respond; the action was not run."
+        request["done"].wait()
+        return request["ok"], request["message"]
+
+    def _start_fleet_task(self, action, profile, request):
+        """Claims the task slot for a fleet action and starts it (UI thread, so it cannot race a button)."""
+        with request["lock"]:
+            if request["cancelled"]:
+                return
+            request["claimed"].set()
+        if self.ui_state.get("task_running"):
+            request.update(ok=False, message="Another action is running on this machine.")
+            request["done"].set()
+            return
+        try:
+            args = (self.read_action_inputs(),) + ((str(profile),) if action == "run_profile" else ())
+        except Exception as e:
+            request.update(ok=False, message=f"Could not read the action inputs: {e}")
+            request["done"].set()
+            raise
+        self.log_message(f"Fleet: running {action}" + (f" (profile '{profile}')" if profile else ""))
+        self.ui_state.set(task_running=True)
+        self._begin_task()
+
+        def run():
+            try:
+                ok, error = self._task_wrapper(getattr(self, f"action_{action}"), args, show_errors=False)
+                request.update(ok=ok, message=error or self.status_channel.get_message())
+            except Exception as e:
+                request.update(ok=False, message=str(e))
+            finally:
+                request["done"].set()
+        threading.Thread(target=run, name="fleet-action", daemon=True).start()
+
+    def show_fleet_dialog(self):
+        settings = self.fleet_settings
+        if not settings["hosts"] or not settings["token"]:
+            messagebox.showinfo(constants.MENU_FLEET, "Set Hosts and Token under [Fleet] in config.ini to coordinate a fleet.", parent=self)
+            return
+        FleetDialog(self, settings["hosts"], settings["token"], settings["timeout"], list(self.launch_profiles))
 
     # --- Button Actions ---
-    def _validate_paths_for_action(self, require_osu=False, require_otd=False):
-        """Helper to check needed paths before an action. Returns True if valid."""
-        if require_osu and not self.is_osu_valid:
-            self.log_message("Action failed: Invalid osu! path.", level="ERROR")
-            messagebox.showerror("Error", "Cannot perform action: osu! path is not valid.", parent=self)
-            return False
-        if require_otd and not self.is_otd_valid:
-            self.log_message("Action failed: Invalid OpenTabletDriver path.", level="ERROR")
-            messagebox.showerror("Error", "Cannot perform action: OpenTabletDriver path is not valid.", parent=self)
-            return False
-        return True
-
-    def action_run_osu_with_otd(self):
+    def _validate_paths_for_action(self, inputs, require_osu=False, require_otd=False):
+        """Helper to check needed paths before an action. Raises ActionError if one is not valid."""
+        if require_osu and not inputs["osu_valid"]:
+            raise ActionError("Cannot perform action: osu! path is not valid.")
+        if require_otd and not inputs["otd_valid"]:
+            raise ActionError("Cannot perform action: OpenTabletDriver path is not valid.")
+
+    def action_run_osu_with_otd(self, inputs):
         self.log_message("Action: Run osu! with OpenTabletDriver")
-        if not self._validate_paths_for_action(require_osu=True, require_otd=True): return
+        self._validate_paths_for_action(inputs, require_osu=True, require_otd=True)
 
-        osu_exe = os.path.join(self.osu_path.get(), constants.OSU_EXECUTABLE)
-        otd_folder = self.otd_path.get()
+        osu_exe = os.path.join(inputs["osu_dir"], constants.OSU_EXECUTABLE)
+        otd_folder = inputs["otd_dir"]
         otd_exe = utils.get_otd_executable_path(otd_folder)
 
-        self.update_status(constants.STATUS_DISABLING_WACOM)
+        self.update_status(constants.STATUS_DISABLING_WACOM, 1, 3)
         if not utils.disable_wacom_drivers(): raise Exception("Wacom driver disable failed.")
 
-        self.update_status(constants.STATUS_LAUNCHING_OTD)
+        self.update_status(constants.STATUS_LAUNCHING_OTD, 2, 3)
         otd_launched = utils.launch_process_standard(otd_exe, working_directory=otd_folder)
-        if not otd_launched:
+        if otd_launched:
+            metrics.set_driver_state("otd")
+        else:
              self.log_message("Failed to request OpenTabletDriver launch as standard user (continuing...).", level="WARN")
-        time.sleep(1)
+        with tracing.span("wait for OpenTabletDriver", tracing.CAT_APP):
+            utils.wait(1)
 
-        self.update_status(constants.STATUS_LAUNCHING_OSU)
-        osu_process = utils.launch_process(osu_exe, working_directory=self.osu_path.get())
+        self.update_status(constants.STATUS_LAUNCHING_OSU, 3, 3)
+        self._sync_osu_config(inputs)
+        osu_process = utils.launch_process(osu_exe, working_directory=inputs["osu_dir"])
         if not osu_process: raise Exception("osu! launch failed.")
 
         self.log_message("osu! and OTD launch sequence initiated.")
 
 
-    def action_run_osu_only(self):
+    def _sync_osu_config(self, inputs):
+        """If enabled, writes the desktop mode into the user's osu! cfg so the game starts in it without another mode switch."""
+        if not inputs["sync_osu_config"]:
+            return
+        width, height = utils.get_current_resolution()
+        if not width or not height:
+            self.log_message("Could not read the desktop mode; osu! config left unchanged.", level="WARN")
+            return
+        osu_dir = inputs["osu_dir"]
+        config_mtimes, scan_error = self.config_index.snapshot() if self.config_index.is_ready(osu_dir) else (None, None)
+        osu_config.sync_resolution(osu_dir, width, height, None if scan_error else config_mtimes)
+
+    def action_run_osu_only(self, inputs):
         self.log_message("Action: Run osu! Only")
-        if not self._validate_paths_for_action(require_osu=True): return
+        self._validate_paths_for_action(inputs, require_osu=True)
 
-        osu_exe = os.path.join(self.osu_path.get(), constants.OSU_EXECUTABLE)
+        osu_exe = os.path.join(inputs["osu_dir"], constants.OSU_EXECUTABLE)
         self.update_status(constants.STATUS_LAUNCHING_OSU)
-        if not utils.launch_process(osu_exe, working_directory=self.osu_path.get()):
+        self._sync_osu_config(inputs)
+        if not utils.launch_process(osu_exe, working_directory=inputs["osu_dir"]):
             raise Exception("osu! launch failed.")
         self.log_message("osu! launch initiated.")
 
-    def action_run_otd_only(self):
+    def action_run_otd_only(self, inputs):
         self.log_message("Action: Disable Wacom & Run OTD")
-        if not self._validate_paths_for_action(require_otd=True): return
+        self._validate_paths_for_action(inputs, require_otd=True)
 
-        otd_folder = self.otd_path.get()
+        otd_folder = inputs["otd_dir"]
         otd_exe = utils.get_otd_executable_path(otd_folder)
         if not otd_exe: raise Exception("Could not find OTD executable.")
 
-        self.update_status(constants.STATUS_DISABLING_WACOM)
+        self.update_status(constants.STATUS_DISABLING_WACOM, 1, 2)
         if not utils.disable_wacom_drivers(): raise Exception("Wacom driver disable failed.")
 
-        self.update_status(constants.STATUS_LAUNCHING_OTD)
+        self.update_status(constants.STATUS_LAUNCHING_OTD, 2, 2)
         otd_launched = utils.launch_process_standard(otd_exe, working_directory=otd_folder)
-        if not otd_launched:
+        if otd_launched:
+            metrics.set_driver_state("otd")
+        else:
             self.log_message("Failed to request OpenTabletDriver launch as standard user.", level="WARN")
         self.log_message("OTD launch sequence initiated.")
 
-    def action_enable_wacom(self):
+    def action_enable_wacom(self, inputs):
         self.log_message("Action: Disable OTD & Enable Wacom")
         self.update_status(constants.STATUS_ENABLING_WACOM)
         if not utils.enable_wacom_drivers():
             raise Exception("Wacom driver enable sequence failed.")
         self.log_message("Wacom enable sequence initiated.")
 
-    def action_downscale_resolution(self):
+    def action_run_profile(self, inputs, name):
+        self.log_message(f"Action: Run profile '{name}'")
+        profile = self.launch_profiles.get(name)
+        if profile is None: raise Exception(f"Unknown launch profile '{name}'.")
+
+        plan, cached = self.plan_cache.get(profile, inputs["osu_dir"], inputs["otd_dir"],
+                                           inputs["native_resolution"], inputs["sync_osu_config"])
+        self.log_message(f"{'Cached' if cached else 'Compiled'} plan for '{name}': {plan.describe()}")
+        try:
+            launch_profiles.execute_plan(plan, self.update_status)
+        except Exception:
+            self.plan_cache.invalidate(name) # Revalidate paths and display mode on the next run
+            raise
+        self.log_message(f"Profile '{name}' launch sequence initiated.")
+
+    def _on_mode_change(self, label):
+        """Saves the Downscale mode change choice (UI thread)."""
+        mode_change = next(mode for mode, text in constants.MODE_CHANGE_LABELS.items() if text == label)
+        config_manager.set_mode_change(mode_change)
+
+    def action_downscale_resolution(self, inputs):
         self.log_message("Action: Downscale Resolution")
         try:
-            res_x = int(self.res_x_var.get())
-            res_y = int(self.res_y_var.get())
+            res_x = int(inputs["res_x"])
+            res_y = int(inputs["res_y"])
             if res_x <= 0 or res_y <= 0: raise ValueError("Dimensions must be positive.")
         except ValueError as e:
-            err_msg = f"{constants.STATUS_INVALID_RES_INPUT}: {e}"
-            self.log_message(err_msg, level="ERROR")
-            self.update_status(constants.STATUS_INVALID_RES_INPUT)
-            messagebox.showerror("Invalid Input", f"{err_msg}\nPlease enter positive numbers only.", parent=self)
-            # Use self.after to re-enable buttons correctly after this immediate failure
-            self.after(100, self.update_button_states)
-            return # Stop task processing
+            raise ActionError(f"{constants.STATUS_INVALID_RES_INPUT}: {e}\nPlease enter positive numbers only.",
+                              title="Invalid Input", status=constants.STATUS_INVALID_RES_INPUT)
 
         self.update_status(constants.STATUS_SETTING_RES.format(res_x, res_y))
-        result = utils.set_resolution(res_x, res_y)
+        result = utils.set_resolution(res_x, res_y, temporary=inputs["temporary"])
 
         if result is True:
             self.log_message(f"Successfully set resolution to {res_x}x{res_y}")
@@ -506,22 +1330,34 @@ class App(ctk.CTk):
             self.log_message(constants.STATUS_RES_UNCHANGED)
             self.update_status(constants.STATUS_RES_UNCHANGED)
         else: # False
-            self.log_message(constants.STATUS_SET_RES_FAIL, level="ERROR")
-            self.update_status(constants.STATUS_SET_RES_FAIL)
-            messagebox.showerror("Resolution Error", f"{constants.STATUS_SET_RES_FAIL}\nMode {res_x}x{res_y} might not be supported.", parent=self)
+            raise ActionError(f"{constants.STATUS_SET_RES_FAIL}\nMode {res_x}x{res_y} might not be supported.",
+                              title="Resolution Error", status=constants.STATUS_SET_RES_FAIL)
 
-    def action_restore_resolution(self):
+    def action_restore_resolution(self, inputs):
         self.log_message("Action: Restore Native Resolution")
-        if self.native_res_x is None or self.native_res_y is None:
-            msg = "Cannot restore: Native resolution not determined."
-            self.log_message(msg, level="ERROR")
-            self.update_status(constants.STATUS_GET_NATIVE_FAIL)
-            messagebox.showerror("Resolution Error", msg, parent=self)
-            # Use self.after to re-enable buttons correctly after this immediate failure
-            self.after(100, self.update_button_states)
-            return # Stop task processing
+        if utils.session_mode_active():
+            # A session-scoped mode was never saved: dropping it returns to the desktop mode directly
+            self.update_status(constants.STATUS_REVERTING_RES)
+            if not utils.revert_resolution():
+                raise Exception("Could not revert to the saved desktop mode.")
+            self.log_message("Reverted to the saved desktop mode.")
+            self.update_status(constants.STATUS_COMPLETE)
+            return
+        record = self.state_journal.get_open(state_journal.KIND_DISPLAY)
+        if record is not None:
+            # The mode from before the first change, refresh rate included; no mode scan needed
+            prev = record["prev"]
+            self.update_status(constants.STATUS_RESTORING_RES)
+            if utils.set_resolution(prev["width"], prev["height"], prev.get("refresh_rate")) is False:
+                raise Exception(f"Could not restore {state_journal.describe(record)}.")
+            self.log_message(f"Restored {state_journal.describe(record)}.")
+            self.update_status(f"Resolution ({prev['width']}x{prev['height']}) restored.")
+            return
+        native_x, native_y = inputs["native_resolution"]
+        if native_x is None or native_y is None:
+            raise ActionError("Cannot restore: Native resolution not determined.",
+                              title="Resolution Error", status=constants.STATUS_GET_NATIVE_FAIL)
 
-        native_x, native_y = self.native_res_x, self.native_res_y
         self.update_status(constants.STATUS_RESTORING_RES)
         result = utils.set_resolution(native_x, native_y)
 
@@ -532,15 +1368,53 @@ class App(ctk.CTk):
             self.log_message("Native resolution is already active.")
             self.update_status(constants.STATUS_RES_UNCHANGED)
         else: # False
-            self.log_message("Failed to restore native resolution.", level="ERROR")
-            self.update_status(constants.STATUS_SET_RES_FAIL)
-            messagebox.showerror("Resolution Error", "Failed to restore native resolution.", parent=self)
+            raise ActionError("Failed to restore native resolution.", title="Resolution Error", status=constants.STATUS_SET_RES_FAIL)
+
+    def offer_state_restore(self):
+        """Offers to undo changes an earlier session left open in the state journal (UI thread)."""
+        records = self.state_journal.open_entries()
+        if not records or self.ui_state.get("task_running"):
+            return
+        changes = "\n".join(f"- {state_journal.describe(record)} (changed {time.strftime('%Y-%m-%d %H:%M', time.localtime(record['time']))})"
+                            for record in records)
+        self.log_message(f"The previous session left changes open in the state journal:\n{changes}", level="WARN")
+        if messagebox.askyesno(constants.TITLE_RESTORE_STATE, constants.MSG_RESTORE_STATE.format(changes), parent=self):
+            self.run_action(self.action_restore_previous_state)
+
+    def action_restore_previous_state(self, inputs):
+        self.log_message("Action: Restore Previous State")
+        self.update_status(constants.STATUS_RESTORING_STATE)
+        failed = []
+        for record in self.state_journal.open_entries():
+            if record["kind"] == state_journal.KIND_DISPLAY:
+                prev = record["prev"]
+                ok = utils.set_resolution(prev["width"], prev["height"], prev.get("refresh_rate")) is not False
+            else:
+                ok = utils.enable_wacom_drivers()
+            if ok:
+                self.log_message(f"Restored {state_journal.describe(record)}.")
+            else:
+                failed.append(state_journal.describe(record))
+        if failed:
+            raise Exception(f"Could not restore: {', '.join(failed)}.")
+        self.update_status(constants.STATUS_READY)
 
     # --- Utility Button Actions ---
 
+    def _check_paths_on_ui(self, **required):
+        """Path check for actions that run on the UI thread. Shows the error and returns False if a path is not valid."""
+        try:
+            self._validate_paths_for_action(self.read_action_inputs(), **required)
+        except ActionError as e:
+            self.log_message(f"Action failed: {e}", level="ERROR")
+            messagebox.showerror(e.title, str(e), parent=self)
+            return False
+        return True
+
     def action_go_to_osu_folder(self):
+        """Opens the osu! folder (UI thread: runs as a button command, not a task)."""
         self.log_message(f"Opening osu! folder: {self.osu_path.get()}")
-        if not self._validate_paths_for_action(require_osu=True):
+        if not self._check_paths_on_ui(require_osu=True):
             self.update_status("Cannot open folder: Invalid osu! path.")
             return # Stop if path invalid
 
@@ -548,10 +1422,10 @@ class App(ctk.CTk):
             folder_path = self.osu_path.get()
             if not os.path.isdir(folder_path):
                  raise FileNotFoundError(f"Path is not a valid directory: {folder_path}")
-            os.startfile(folder_path) # Opens folder in explorer
+            utils.open_folder(folder_path)
             self.update_status("osu! folder opened.")
         except FileNotFoundError as fnf_err:
-            self.log_message(f"Error: Folder not found at {self.osu_path.get()}", level="ERROR")
+            self.log_message(f"Folder not found at {self.osu_path.get()}", level="ERROR")
             messagebox.showerror("Error", f"Folder not found:\n{fnf_err}", parent=self)
             self.update_status("Error opening osu! folder.")
         except Exception as e:
@@ -565,134 +1439,267 @@ class App(ctk.CTk):
     def trigger_export_config(self):
         """Starts the config export process (runs on main thread initially)."""
         self.log_message("Initiating osu! config export...")
-        if not self._validate_paths_for_action(require_osu=True):
+        if not self._check_paths_on_ui(require_osu=True):
             self.update_status("Cannot export: Invalid osu! path.")
             return
 
         osu_dir = self.osu_path.get()
-        try:
-            all_files = os.listdir(osu_dir)
-            # Regex to find files like osu!.COMPUTERNAME.cfg (case-insensitive)
-            config_pattern = re.compile(r"^osu!\.(.+)\.cfg$", re.IGNORECASE)
-            user_configs = [f for f in all_files if config_pattern.match(f) and f.lower() != constants.OSU_CONFIG_EXCLUDE.lower()]
-
-            if not user_configs:
-                self.log_message(constants.STATUS_EXPORT_NO_CONFIGS, level="WARN")
-                messagebox.showinfo("No Configs Found", constants.STATUS_EXPORT_NO_CONFIGS, parent=self)
-                self.update_status("Ready.")
-                return
+        if self.config_index.is_ready(osu_dir):
+            self._show_export_dialog(osu_dir)
+            return
 
-            self.log_message(f"Found config files: {user_configs}")
+        # Index still scanning (e.g. slow network drive): wait for it without blocking the UI
+        if not self.config_index.is_watching(osu_dir):
+            self.config_index.start(osu_dir)
+        self.update_status(constants.STATUS_SCANNING_CONFIGS)
+        self.ui_state.set(export_scanning=True)
+        self._wait_for_config_index(osu_dir, 0)
+
+    def _wait_for_config_index(self, osu_dir, waited_ms):
+        if self.config_index.is_ready(osu_dir):
+            self.ui_state.set(export_scanning=False)
+            self._show_export_dialog(osu_dir)
+        elif waited_ms >= constants.CONFIG_INDEX_WAIT_MS:
+            self.ui_state.set(export_scanning=False)
+            self.log_message(f"Timed out scanning osu! folder for configs: {osu_dir}", level="ERROR")
+            messagebox.showerror("Error", f"Timed out listing osu! folder contents:\n{osu_dir}", parent=self)
+            self.update_status("Error during export setup.")
+        else:
+            self.after(constants.CONFIG_INDEX_POLL_MS,
+                       lambda: self._wait_for_config_index(osu_dir, waited_ms + constants.CONFIG_INDEX_POLL_MS))
+
+    def _show_export_dialog(self, osu_dir):
+        """Opens the export dialog from the config index (no disk access on the UI thread)."""
+        config_mtimes, scan_error = self.config_index.snapshot()
+        if scan_error:
+            self.log_message(f"Error finding/listing config files: {scan_error}", level="ERROR")
+            messagebox.showerror("Error", f"Could not list or process osu! folder contents:\n{scan_error}", parent=self)
+            self.update_status("Error during export setup.")
+            return
 
-            # Show the custom dialog (this runs modally on the main thread)
-            dialog = ExportConfigDialog(self, user_configs)
-            result = dialog.get_result() # This waits until the dialog is closed
+        user_configs = sorted(config_mtimes, key=str.lower)
+        if not user_configs:
+            self.log_message(constants.STATUS_EXPORT_NO_CONFIGS, level="WARN")
+            messagebox.showinfo("No Configs Found", constants.STATUS_EXPORT_NO_CONFIGS, parent=self)
+            self.update_status("Ready.")
+            return
 
-            if result:
-                selected_files, export_path = result
-                self.log_message(f"User selected files: {selected_files} for export to {export_path}")
-                # Now run the actual file processing in a background thread
-                # Pass arguments via the args tuple in run_task
-                self.run_task(self.process_config_export, args=(selected_files, export_path))
-            else:
-                self.log_message("Config export cancelled by user.")
-                self.update_status("Ready.")
+        self.log_message(f"Found {len(user_configs)} config file(s).")
 
-        except FileNotFoundError:
-             self.log_message(f"Error finding osu! folder: {osu_dir}", level="ERROR")
-             messagebox.showerror("Error", f"Could not find osu! directory:\n{osu_dir}", parent=self)
-             self.update_status("Error during export setup.")
-        except Exception as e:
-            self.log_message(f"Error finding/listing config files: {e}", level="ERROR")
-            messagebox.showerror("Error", f"Could not list or process osu! folder contents:\n{e}", parent=self)
-            self.update_status("Error during export setup.")
+        # Show the custom dialog (this runs modally on the main thread)
+        dialog = ExportConfigDialog(self, user_configs, config_dir=osu_dir, mtimes=config_mtimes)
+        result = dialog.get_result() # This waits until the dialog is closed
 
+        if result:
+            selected_files, export_path, bundle = result
+            self.log_message(f"User selected files: {selected_files} for export to {export_path}" +
+                             (" (zip bundle)" if bundle else ""))
+            # Now run the actual file processing in a background thread
+            # Pass arguments via the args tuple in run_task
+            progress_dialog = ExportProgressDialog(self, selected_files)
+            self.run_task(self.process_config_export, args=(osu_dir, selected_files, export_path, progress_dialog, bundle))
+        else:
+            self.log_message("Config export cancelled by user.")
+            self.update_status("Ready.")
 
-    def process_config_export(self, selected_files, export_path):
+
+    def process_config_export(self, osu_dir, selected_files, export_path, progress_dialog=None, bundle=False):
         """Processes and exports the selected config files (runs in background thread)."""
         self.update_status(constants.STATUS_EXPORTING_CONFIG)
-        osu_dir = self.osu_path.get() # Get osu! path again within the thread
-        success_count = 0
-        export_errors = []
-
-        for filename in selected_files:
-            source_path = os.path.join(osu_dir, filename)
-            # Add "SAFE_" prefix for the output filename
-            safe_filename = f"{constants.SAFE_CONFIG_PREFIX}{filename}"
-            dest_path = os.path.join(export_path, safe_filename)
+        bundle_path = config_export.get_bundle_path(export_path) if bundle else None
 
-            self.log_message(f"Processing '{filename}' -> '{safe_filename}'...")
-
-            try:
-                with open(source_path, 'r', encoding='utf-8', errors='ignore') as infile: # Ignore potential encoding errors
-                    lines = infile.readlines()
-
-                # Filter out the password line and potentially sensitive comments
-                processed_lines = []
-                password_found = False
-                in_sensitive_header = True # Assume start might be sensitive
-                for line in lines:
-                    line_strip = line.strip()
-                    # Remove password line (case-insensitive check)
-                    if line_strip.lower().startswith("password ="):
-                        password_found = True
-                        continue
-                    # Skip default sensitive comments at the very beginning if they contain keywords
-                    if in_sensitive_header and line_strip.startswith('#'):
-                        if "IMPORTANT: DO NOT SHARE" in line_strip.upper() or \
-                           "LOGIN CREDENTIALS" in line_strip.upper():
-                            continue # Skip this sensitive comment
-                    else:
-                        # Once we hit a non-comment or non-sensitive comment, stop header skipping
-                        in_sensitive_header = False
-
-                    processed_lines.append(line) # Keep other lines
-
-                if password_found:
-                    self.log_message(f"Password line removed from '{filename}'.")
-                else:
-                    self.log_message(f"No password line found in '{filename}'.", level="WARN")
-
-                # Extract original username from filename (osu!.USERNAME.cfg)
-                match = re.match(r"^osu!\.(.+)\.cfg$", filename, re.IGNORECASE)
-                original_username = match.group(1) if match else "Unknown"
-
-                # Prepare the safe header using constants
-                header = constants.SAFE_CONFIG_HEADER.format(
-                    original_username=original_username,
-                    export_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                )
-
-                # Write the processed file
-                with open(dest_path, 'w', encoding='utf-8') as outfile:
-                    outfile.write(header)
-                    outfile.writelines(processed_lines)
-
-                self.log_message(f"Successfully exported '{safe_filename}'")
-                success_count += 1
-
-            except Exception as e:
-                error_msg = f"Failed to process/export '{filename}': {e}"
-                self.log_message(error_msg, level="ERROR")
-                export_errors.append(error_msg)
-                # Also log traceback for detailed debugging
-                self.log_message(traceback.format_exc(), level="DEBUG")
+        finished = itertools.count(1)
+        def on_status(filename, status):
+            if status in (config_export.FILE_STATUS_DONE, config_export.FILE_STATUS_UP_TO_DATE, config_export.FILE_STATUS_ERROR):
+                self.update_status(constants.STATUS_EXPORTING_CONFIG, next(finished), len(selected_files))
+            if progress_dialog:
+                self.call_on_ui(lambda: progress_dialog.set_file_status(filename, status))
 
+        try:
+            success_count, export_errors = config_export.export_configs(
+                osu_dir, selected_files, export_path, log_callback=self.log_message, status_callback=on_status,
+                bundle_path=bundle_path)
+        finally:
+            if progress_dialog:
+                self.call_on_ui(progress_dialog.close)
 
         # --- Final Status Update (Scheduled for main thread) ---
         if success_count == len(selected_files) and not export_errors:
             final_msg = constants.MSG_CONFIRM_EXPORT_BODY.format(export_path)
-            self.after(0, lambda: self.show_export_success_dialog(final_msg, export_path))
-            self.after(0, lambda: self.update_status(constants.STATUS_EXPORT_COMPLETE))
+            self.call_on_ui(lambda: self.show_export_success_dialog(final_msg, export_path))
+            self.update_status(constants.STATUS_EXPORT_COMPLETE)
         elif success_count > 0 and export_errors:
              error_summary = "\n".join(export_errors)
-             self.after(0, lambda: messagebox.showwarning("Export Warning", f"Export completed with {len(export_errors)} error(s):\n\n{error_summary}", parent=self))
-             self.after(0, lambda: self.update_status("Export completed with errors."))
+             self.call_on_ui(lambda: messagebox.showwarning("Export Warning", f"Export completed with {len(export_errors)} error(s):\n\n{error_summary}", parent=self))
+             self.update_status("Export completed with errors.")
         else: # No successes, all errors
             error_summary = "\n".join(export_errors)
-            self.after(0, lambda: messagebox.showerror("Export Error", f"Export failed for all selected files:\n\n{error_summary}", parent=self))
-            self.after(0, lambda: self.update_status(constants.STATUS_EXPORT_FAILED))
+            self.call_on_ui(lambda: messagebox.showerror("Export Error", f"Export failed for all selected files:\n\n{error_summary}", parent=self))
+            self.update_status(constants.STATUS_EXPORT_FAILED)
+
 
+    # --- Diagnostics ---
+
+    def save_action_trace(self):
+        """Saves the spans of the last few actions as a Chrome trace / Perfetto JSON file (for bug reports)."""
+        if not tracing.is_enabled():
+            messagebox.showinfo(constants.MENU_DIAGNOSTICS, "Tracing is disabled ([Tracing] Enabled in config.ini).", parent=self)
+            return
+        if not tracing.action_count():
+            messagebox.showinfo(constants.MENU_DIAGNOSTICS, "No actions have been run yet.", parent=self)
+            return
+        trace_path = filedialog.asksaveasfilename(parent=self, title=constants.TITLE_SAVE_TRACE,
+                                                  initialdir=utils.get_desktop_path(), defaultextension=".json",
+                                                  initialfile=constants.TRACE_FILE_NAME.format(time.strftime("%Y%m%d-%H%M%S")),
+                                                  filetypes=[("Trace JSON", "*.json")])
+        if not trace_path:
+            return
+        try:
+            span_count = tracing.export_chrome_trace(trace_path, constants.TRACE_EXPORT_ACTIONS)
+            self.log_message(f"Saved {span_count} trace span(s) to '{trace_path}' (open in chrome://tracing or ui.perfetto.dev).")
+        except OSError as e:
+            self.log_message(f"Failed to save trace: {e}", level="ERROR")
+            messagebox.showerror("Trace Error", f"Could not save the trace:\n{e}", parent=self)
+
+    def show_latency_stats(self):
+        """Shows p50/p95/max per action and step over the recent runs recorded in the latency history."""
+        try:
+            rows = self.latency_history.compute_stats(constants.LATENCY_STATS_RUNS)
+        except (OSError, struct.error) as e:
+            self.log_message(f"Failed to read action timing history: {e}", level="ERROR")
+            return
+        if not rows:
+            messagebox.showinfo(constants.MENU_DIAGNOSTICS, "No action timings have been recorded yet.", parent=self)
+            return
+        LatencyStatsDialog(self, rows)
+
+    def show_stall_report(self):
+        """Shows the UI stall histogram, the code sites stalls were caught at and their stacks."""
+        if not self.stall_watchdog:
+            messagebox.showinfo(constants.MENU_DIAGNOSTICS, "The UI stall watchdog is disabled ([Watchdog] StallThresholdMs = 0).", parent=self)
+            return
+        StallReportDialog(self, self.stall_watchdog.stats(), self.stall_watchdog.threshold * 1000)
+
+    # --- Config Comparison Logic ---
+
+    def trigger_compare_configs(self):
+        """Asks for the config files and baseline, then compares them in the background."""
+        initial_dir = self.osu_path.get() if self.is_osu_valid else utils.get_desktop_path()
+        paths = filedialog.askopenfilenames(parent=self, title=constants.TITLE_SELECT_COMPARE_CONFIGS,
+                                            initialdir=initial_dir, filetypes=[("osu! config", "*.cfg"), ("All files", "*.*")])
+        if not paths or len(paths) < 2:
+            if paths: messagebox.showinfo("Compare Configs", "Please select at least two config files.", parent=self)
+            self.log_message("Config comparison cancelled.")
+            return
+        paths = list(paths)
+        use_first = messagebox.askyesno(constants.MSG_COMPARE_BASELINE_TITLE,
+                                        constants.MSG_COMPARE_BASELINE_BODY.format(os.path.basename(paths[0])), parent=self)
+        baseline = 0 if use_first else config_compare.BASELINE_MAJORITY
+        self.log_message(f"Comparing {len(paths)} config file(s)...")
+        self.run_task(self.process_config_compare, args=(paths, baseline))
+
+    def process_config_compare(self, paths, baseline):
+        """Parses and compares the configs (runs in background thread)."""
+        self.update_status(constants.STATUS_COMPARING_CONFIGS)
+        start = time.perf_counter()
+        table, errors = config_compare.load_config_table(
+            paths, log_callback=self.log_message)
+        requested_baseline = baseline
+        baseline = config_compare.table_baseline(table, baseline)
+        if baseline is config_compare.BASELINE_MAJORITY and requested_baseline is not config_compare.BASELINE_MAJORITY:
+            self.log_message(f"Baseline file '{os.path.basename(paths[requested_baseline])}' could not be read; "
+                             "comparing against the most common value instead.", level="WARN")
+        rows = config_compare.compute_drift(table, baseline)
+        elapsed = time.perf_counter() - start
+
+        summary = (f"Compared {len(table.files)} file(s), {len(table.keys)} key(s) against "
+                   f"{config_compare.describe_baseline(table, baseline)}: {len(rows)} key(s) differ ({elapsed:.2f}s).")
+        top_rows = rows[:constants.COMPARE_LOG_TOP_KEYS]
+        self.log_message(summary)
+        if errors:
+            self.log_message(f"  {len(errors)} unreadable file(s) excluded: {', '.join(table.excluded)}", level="WARN")
+        for row in top_rows:
+            line = f"  {row['key']}: differs on {len(row['differs'])}/{len(table.files)} (baseline '{row['baseline']}')"
+            self.log_message(line)
+        self.update_status(constants.STATUS_COMPARE_COMPLETE)
+        if rows:
+            self.call_on_ui(lambda: self._save_compare_report(table, rows, baseline))
+
+    def trigger_audit_configs(self):
+        """Asks for a folder (searched recursively) and audits it in the background; fixing is offered afterwards."""
+        initial_dir = self.osu_path.get() if self.is_osu_valid else utils.get_desktop_path()
+        root = filedialog.askdirectory(parent=self, title=constants.TITLE_SELECT_AUDIT_FOLDER, initialdir=initial_dir)
+        if not root:
+            self.log_message("Config audit cancelled.")
+            return
+        self.log_message(f"Auditing configs below {root}...")
+        self.run_task(self.process_config_audit, args=(root,))
+
+    def _log_audit_results(self, flagged):
+        for result in flagged[:constants.AUDIT_LOG_MAX_FILES]:
+            if result["fixed"]:
+                action = "fixed"
+            elif result["osu_config"]:
+                action = "contains"
+            else:
+                action = "contains (not an osu! config, left unchanged)"
+            self.log_message(f"  {result['path']}: {action} {credential_audit.describe_findings(result)}", level="WARN")
+        if len(flagged) > constants.AUDIT_LOG_MAX_FILES:
+            self.log_message(f"  ... and {len(flagged) - constants.AUDIT_LOG_MAX_FILES} more file(s).", level="WARN")
+
+    def process_config_audit(self, root):
+        """Scans every .cfg below root, then offers to fix the flagged osu! configs (runs in background thread)."""
+        self.update_status(constants.STATUS_AUDITING_CONFIGS)
+        start = time.perf_counter()
+        scanned, flagged, errors = credential_audit.audit_tree(root, log_callback=self.log_message)
+        elapsed = time.perf_counter() - start
+
+        self._log_audit_results(flagged)
+        summary = constants.STATUS_AUDIT_DONE.format(len(flagged), scanned)
+        self.log_message(f"{summary} ({len(errors)} unreadable, {elapsed:.2f}s)")
+        self.update_status(summary)
+        fixable = [result["path"] for result in flagged if result["osu_config"]]
+        if fixable:
+            self.call_on_ui(lambda: self._offer_audit_fix(fixable))
+
+    def _offer_audit_fix(self, paths):
+        """Shows the flagged osu! configs and asks whether to remove the lines (UI thread, once the audit task ended)."""
+        if self.ui_state.get("task_running"):
+            self.after(constants.LOG_FLUSH_INTERVAL_MS, lambda: self._offer_audit_fix(paths))
+            return
+        listed = paths[:constants.AUDIT_DIALOG_MAX_FILES]
+        if len(paths) > len(listed):
+            listed = listed + [constants.MSG_AUDIT_FIX_MORE.format(len(paths) - len(listed))]
+        if messagebox.askyesno(constants.MSG_AUDIT_FIX_TITLE,
+                               constants.MSG_AUDIT_FIX_BODY.format(len(paths), "\n".join(listed)), parent=self):
+            self.run_task(self.process_config_audit_fix, args=(paths,))
+        else:
+            self.log_message("Credentials left in place.")
+
+    def process_config_audit_fix(self, paths):
+        """Removes the flagged lines from the osu! configs the user confirmed (runs in background thread)."""
+        self.update_status(constants.STATUS_FIXING_CONFIGS.format(len(paths)))
+        _, flagged, errors = credential_audit.fix_files(paths, log_callback=self.log_message)
+        self._log_audit_results(flagged)
+        summary = constants.STATUS_AUDIT_FIXED.format(sum(1 for result in flagged if result["fixed"]), len(paths))
+        self.log_message(f"{summary} ({len(errors)} could not be fixed)")
+        self.update_status(summary)
+
+    def _save_compare_report(self, table, rows, baseline):
+        """Asks where to save the drift report (CSV or JSON) and writes it (UI thread)."""
+        report_path = filedialog.asksaveasfilename(parent=self, title=constants.TITLE_SAVE_COMPARE_REPORT,
+                                                   initialdir=utils.get_desktop_path(), defaultextension=".csv",
+                                                   initialfile="config-drift.csv",
+                                                   filetypes=[("CSV", "*.csv"), ("JSON", "*.json")])
+        if not report_path:
+            self.log_message("Drift report not saved.")
+            return
+        try:
+            config_compare.write_drift_report(table, rows, report_path, baseline)
+            self.log_message(f"Drift report saved to: {report_path}")
+        except Exception as e:
+            self.log_message(f"Failed to save drift report: {e}", level="ERROR")
+            messagebox.showerror("Error", f"Could not save drift report:\n{e}", parent=self)
 
     def show_export_success_dialog(self, message, export_path):
         """Shows a custom success dialog with an 'Open Folder' button."""
@@ -716,7 +1723,7 @@ class App(ctk.CTk):
             try:
                 if not os.path.isdir(export_path):
                      raise FileNotFoundError(f"Export path no longer exists: {export_path}")
-                os.startfile(export_path)
+                utils.open_folder(export_path)
             except Exception as e:
                  messagebox.showerror("Error", f"Could not open folder:\n{e}", parent=dialog)
             dialog.grab_release()
@@ -0,0 +1,201 @@
+import csv
+import json
+import os
+from array import array
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import config_export
+from . import constants
+
+MISSING = -1 # Value id used when a file does not contain a key
+BASELINE_MAJORITY = None # Compare each key against its most common value
+
+
+# --- Parsing ---
+
+def parse_config_pairs(path):
+    """
+    Reads one osu! config (original or SAFE_ export) and returns its (key, value) pairs.
+    Comments and lines without '=' are ignored; for duplicate keys the last one wins.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    pairs = {}
+    for line in config_export.decode_config_lines(data):
+        key, sep, value = line.partition("=")
+        key = key.strip()
+        if not sep or not key or key.startswith("#"):
+            continue
+        pairs[key] = value.strip()
+    return list(pairs.items())
+
+
+# --- Columnar Table ---
+
+class ConfigTable:
+    """
+    Key -> value table for many configs in a columnar layout. Keys and values are
+    interned once; each key column is an array of value ids with one slot per file,
+    so hundreds of configs cost a few small int arrays rather than per-file dicts.
+    """
+    def __init__(self, file_labels):
+        self.files = list(file_labels)
+        self.source_indices = list(range(len(self.files))) # file index -> index in the loaded paths
+        self.excluded = []      # Labels of files that could not be read
+        self.keys = []          # column id -> key
+        self.key_index = {}     # key -> column id
+        self.values = []        # value id -> value string
+        self.value_index = {}   # value string -> value id
+        self.columns = []       # column id -> array('i') of value ids per file
+
+    def _intern_value(self, value):
+        value_id = self.value_index.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.values.append(value)
+            self.value_index[value] = value_id
+        return value_id
+
+    def _column_for(self, key):
+        column_id = self.key_index.get(key)
+        if column_id is None:
+            column_id = len(self.keys)
+            self.keys.append(key)
+            self.key_index[key] = column_id
+            self.columns.append(array('i', [MISSING]) * len(self.files))
+        return self.columns[column_id]
+
+    def set_file_pairs(self, file_idx, pairs):
+        for key, value in pairs:
+            self._column_for(key)[file_idx] = self._intern_value(value)
+
+    def drop_files(self, file_indices):
+        """Removes files (e.g. unreadable ones) so they neither count as drift nor serve as the baseline."""
+        dropped = set(file_indices)
+        if not dropped:
+            return
+        keep = [i for i in range(len(self.files)) if i not in dropped]
+        self.excluded.extend(self.files[i] for i in sorted(dropped))
+        self.files = [self.files[i] for i in keep]
+        self.source_indices = [self.source_indices[i] for i in keep]
+        self.columns = [array('i', (column[i] for i in keep)) for column in self.columns]
+
+    def value_of(self, value_id):
+        return constants.COMPARE_MISSING_VALUE if value_id == MISSING else self.values[value_id]
+
+
+def make_file_labels(paths):
+    """File names as labels, falling back to full paths where names collide (e.g. one folder per machine)."""
+    names = [os.path.basename(p) for p in paths]
+    counts = Counter(names)
+    return [name if counts[name] == 1 else os.path.normpath(path) for name, path in zip(names, paths)]
+
+
+def load_config_table(paths, labels=None, max_workers=None, log_callback=None):
+    """
+    Parses the given config files in parallel into a ConfigTable.
+    Files that cannot be read are logged and dropped from the table (listed in table.excluded).
+    Returns (table, errors).
+    """
+    table = ConfigTable(labels or make_file_labels(paths))
+    errors = []
+    failed = []
+    if not paths:
+        return table, errors
+    workers = max(1, min(max_workers or constants.COMPARE_MAX_WORKERS, len(paths)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="config-compare") as executor:
+        futures = {executor.submit(parse_config_pairs, path): i for i, path in enumerate(paths)}
+        # Merge as results arrive so only a few parsed files are held at once
+        for future in as_completed(futures):
+            file_idx = futures[future]
+            try:
+                table.set_file_pairs(file_idx, future.result())
+            except Exception as e:
+                error_msg = f"Failed to read '{paths[file_idx]}': {e}"
+                errors.append(error_msg)
+                failed.append(file_idx)
+                if log_callback: log_callback(error_msg, "ERROR")
+    table.drop_files(failed)
+    return table, errors
+
+
+def table_baseline(table, baseline):
+    """
+    Maps a baseline given as an index into the loaded paths to its index in the table.
+    Returns BASELINE_MAJORITY if that file was excluded (or baseline already is the majority).
+    """
+    if baseline is BASELINE_MAJORITY or baseline not in table.source_indices:
+        return BASELINE_MAJORITY
+    return table.source_indices.index(baseline)
+
+
+# --- Drift Matrix ---
+
+def compute_drift(table, baseline=BASELINE_MAJORITY):
+    """
+    Compares every key against a baseline: the file at index `baseline`, or the most
+    common value across all files when baseline is BASELINE_MAJORITY.
+    Returns a list of rows {key, baseline, differs: {file label: value}} for keys
+    that differ on at least one file, most widespread drift first.
+    """
+    rows = []
+    if not table.files:
+        return rows
+    for column_id, column in enumerate(table.columns):
+        if baseline is BASELINE_MAJORITY:
+            base_id = Counter(column).most_common(1)[0][0]
+        else:
+            base_id = column[baseline]
+        differing = [i for i, value_id in enumerate(column) if value_id != base_id]
+        if not differing:
+            continue
+        rows.append({
+            "key": table.keys[column_id],
+            "baseline": table.value_of(base_id),
+            "differs": {table.files[i]: table.value_of(column[i]) for i in differing},
+        })
+    rows.sort(key=lambda row: (-len(row["differs"]), row["key"].lower()))
+    return rows
+
+
+def describe_baseline(table, baseline):
+    return "most common value" if baseline is BASELINE_MAJORITY else table.files[baseline]
+
+
+# --- Reports ---
+
+def write_drift_csv(table, rows, path, baseline=BASELINE_MAJORITY):
+    """One row per drifted key; one column per file (blank where it matches the baseline)."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["key", f"baseline ({describe_baseline(table, baseline)})", "differing", "total"] + table.files)
+        for row in rows:
+            differs = row["differs"]
+            writer.writerow([row["key"], row["baseline"], len(differs), len(table.files)] +
+                            [differs.get(label, "") for label in table.files])
+
+
+def write_drift_json(table, rows, path, baseline=BASELINE_MAJORITY):
+    report = {
+        "tool": constants.APP_NAME,
+        "tool_version": constants.APP_VERSION,
+        "baseline": describe_baseline(table, baseline),
+        "files": table.files,
+        "excluded": table.excluded,
+        "key_count": len(table.keys),
+        "drifted_keys": [
+            {"key": row["key"], "baseline": row["baseline"], "differing": len(row["differs"]), "differs": row["differs"]}
+            for row in rows
+        ],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+
+
+def write_drift_report(table, rows, path, baseline=BASELINE_MAJORITY):
+    """Writes a CSV or JSON report depending on the file extension."""
+    if path.lower().endswith(".json"):
+        write_drift_json(table, rows, path, baseline)
+    else:
+        write_drift_csv(table, rows, path, baseline)
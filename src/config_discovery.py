@@ -0,0 +1,248 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+
+from . import config_export
+from . import constants
+from . import structured_log
+
+# --- Directory Scanning ---
+
+def is_user_config_name(name):
+    return bool(config_export.CONFIG_FILE_PATTERN.match(name)) and name.lower() != constants.OSU_CONFIG_EXCLUDE.lower()
+
+
+def scan_user_configs(osu_dir):
+    """
+    Lists user-specific configs (osu!.<user>.cfg) with their mtimes using os.scandir.
+    Only matching names are stat'ed (on Windows scandir already carries the stat data).
+    Returns {filename: mtime}. Raises OSError if the folder cannot be listed.
+    """
+    configs = {}
+    with os.scandir(osu_dir) as entries:
+        for entry in entries:
+            if not is_user_config_name(entry.name):
+                continue
+            try:
+                if entry.is_file():
+                    configs[entry.name] = entry.stat().st_mtime
+            except OSError:
+                pass # Removed while scanning
+    return configs
+
+
+# --- Config Index ---
+
+class ConfigIndex:
+    """
+    Background-maintained index of the user configs in the osu! folder.
+    A worker thread scans the folder once and then keeps the index current using a
+    filesystem watcher (inotify on Linux, change notifications on Windows, polling
+    otherwise), so the export dialog can open from it without touching the disk.
+    """
+    def __init__(self, on_change=None):
+        self.on_change = on_change # Called from the watcher thread after the index changes
+        self._lock = threading.Lock()
+        self._configs = {}
+        self._osu_dir = None
+        self._ready = threading.Event()
+        self._error = None
+        self._stop_event = None
+        self._thread = None
+
+    def start(self, osu_dir):
+        """(Re)starts scanning and watching osu_dir. Returns immediately."""
+        self.stop()
+        with self._lock:
+            self._osu_dir = osu_dir
+            self._configs = {}
+            self._error = None
+            self._ready.clear()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(osu_dir, self._stop_event),
+                                        name="config-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._stop_event:
+            self._stop_event.set()
+        self._stop_event = None
+        self._thread = None
+
+    def is_ready(self, osu_dir=None):
+        """True once the initial scan of osu_dir (or the current folder) has finished."""
+        if not self._ready.is_set():
+            return False
+        return osu_dir is None or self._same_dir(osu_dir)
+
+    def is_watching(self, osu_dir):
+        """True if a scan/watch of osu_dir is running (ready or not)."""
+        return self._stop_event is not None and self._same_dir(osu_dir)
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def snapshot(self):
+        """Returns (configs {filename: mtime}, error) from the last scan/update."""
+        with self._lock:
+            return dict(self._configs), self._error
+
+    def _same_dir(self, osu_dir):
+        with self._lock:
+            return self._osu_dir is not None and os.path.normcase(os.path.abspath(self._osu_dir)) == \
+                os.path.normcase(os.path.abspath(osu_dir))
+
+    # --- Worker ---
+
+    def _notify(self):
+        if self.on_change:
+            try:
+                self.on_change()
+            except Exception as e:
+                structured_log.error(f"Error in config index change callback: {e}")
+
+    def rescan(self, osu_dir, stop_event):
+        """Full scan; replaces the index unless this worker has been superseded."""
+        try:
+            configs, error = scan_user_configs(osu_dir), None
+        except OSError as e:
+            configs, error = {}, str(e)
+        with self._lock:
+            if stop_event.is_set():
+                return # Superseded by a newer start()
+            changed = configs != self._configs or error != self._error
+            self._configs = configs
+            self._error = error
+            # Under the lock, so a worker superseded after the check above cannot mark the next folder ready
+            self._ready.set()
+        if changed: self._notify()
+
+    def update_entry(self, osu_dir, name, stop_event):
+        """Incremental update for a single changed directory entry."""
+        if not is_user_config_name(name):
+            return
+        try:
+            mtime = os.stat(os.path.join(osu_dir, name)).st_mtime
+        except OSError:
+            mtime = None
+        with self._lock:
+            if stop_event.is_set():
+                return
+            if mtime is None:
+                changed = self._configs.pop(name, None) is not None
+            else:
+                changed = self._configs.get(name) != mtime
+                self._configs[name] = mtime
+        if changed: self._notify()
+
+    def _run(self, osu_dir, stop_event):
+        self.rescan(osu_dir, stop_event)
+        watchers = [_watch_inotify, _watch_win32, _watch_polling]
+        for watch in watchers:
+            if stop_event.is_set():
+                return
+            try:
+                if watch(self, osu_dir, stop_event):
+                    return # Watcher ran until stopped
+            except Exception as e:
+                structured_log.error(f"Config folder watcher {watch.__name__} failed: {e}")
+        structured_log.warning(f"No watcher available for {osu_dir}; config list will not auto-refresh.")
+
+
+# --- Watchers (each returns False if unavailable on this platform) ---
+
+# inotify event masks (see <sys/inotify.h>)
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT_HEADER = struct.Struct("iIII") # wd, mask, cookie, len
+
+
+def _watch_inotify(index, osu_dir, stop_event):
+    if not sys.platform.startswith("linux"):
+        return False
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+    fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+    if fd < 0:
+        structured_log.error(f"inotify_init1 failed (errno {ctypes.get_errno()})")
+        return False
+    try:
+        mask = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO |
+                _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF)
+        if libc.inotify_add_watch(fd, os.fsencode(osu_dir), mask) < 0:
+            structured_log.error(f"inotify_add_watch failed for {osu_dir} (errno {ctypes.get_errno()})")
+            return False
+        # Events that arrived between the initial scan and the watch being added
+        index.rescan(osu_dir, stop_event)
+        while not stop_event.is_set():
+            readable, _, _ = select.select([fd], [], [], constants.CONFIG_WATCH_INTERVAL)
+            if not readable:
+                continue
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            offset = 0
+            needs_rescan = False
+            while offset + _INOTIFY_EVENT_HEADER.size <= len(data):
+                _wd, event_mask, _cookie, name_len = _INOTIFY_EVENT_HEADER.unpack_from(data, offset)
+                offset += _INOTIFY_EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b"\0").decode(errors="replace")
+                offset += name_len
+                if event_mask & (_IN_Q_OVERFLOW | _IN_DELETE_SELF | _IN_MOVE_SELF):
+                    needs_rescan = True
+                elif name:
+                    index.update_entry(osu_dir, name, stop_event)
+            if needs_rescan:
+                index.rescan(osu_dir, stop_event)
+        return True
+    finally:
+        os.close(fd)
+
+
+def _watch_win32(index, osu_dir, stop_event):
+    if sys.platform != "win32":
+        return False
+    import win32con
+    import win32event
+    import win32file
+    flags = win32con.FILE_NOTIFY_CHANGE_FILE_NAME | win32con.FILE_NOTIFY_CHANGE_LAST_WRITE
+    handle = win32file.FindFirstChangeNotification(osu_dir, False, flags)
+    try:
+        index.rescan(osu_dir, stop_event)
+        timeout_ms = int(constants.CONFIG_WATCH_INTERVAL * 1000)
+        while not stop_event.is_set():
+            if win32event.WaitForSingleObject(handle, timeout_ms) == win32event.WAIT_OBJECT_0:
+                # Change notifications carry no file names; a filtered scandir is cheap
+                index.rescan(osu_dir, stop_event)
+                win32file.FindNextChangeNotification(handle)
+        return True
+    finally:
+        win32file.FindCloseChangeNotification(handle)
+
+
+def _watch_polling(index, osu_dir, stop_event):
+    """Fallback: rescan whenever the folder's own mtime changes (file added/removed/renamed)."""
+    last_mtime = None
+    while not stop_event.wait(constants.CONFIG_POLL_INTERVAL):
+        try:
+            mtime = os.stat(osu_dir).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != last_mtime:
+            last_mtime = mtime
+            index.rescan(osu_dir, stop_event)
+    return True
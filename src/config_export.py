@@ -0,0 +1,440 @@
+import hashlib
+import hmac
+import io
+import json
+import os
+import re
+import secrets
+import threading
+import traceback
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from . import constants
+from . import metrics
+from . import structured_log
+from . import tracing
+
+# Regex to find files like osu!.COMPUTERNAME.cfg (case-insensitive)
+CONFIG_FILE_PATTERN = re.compile(r"^osu!\.(.+)\.cfg$", re.IGNORECASE)
+
+# --- Per-file status values (reported through status_callback) ---
+FILE_STATUS_PENDING = "pending"
+FILE_STATUS_PROCESSING = "processing"
+FILE_STATUS_DONE = "done"
+FILE_STATUS_UP_TO_DATE = "up_to_date"
+FILE_STATUS_ERROR = "error"
+_FINAL_STATUSES = (FILE_STATUS_DONE, FILE_STATUS_UP_TO_DATE, FILE_STATUS_ERROR)
+
+
+def get_original_username(filename):
+    """Extracts the username from an osu!.USERNAME.cfg filename."""
+    match = CONFIG_FILE_PATTERN.match(filename)
+    return match.group(1) if match else "Unknown"
+
+
+def get_safe_filename(filename):
+    """Returns the output filename for an exported config (adds the SAFE_ prefix)."""
+    return f"{constants.SAFE_CONFIG_PREFIX}{filename}"
+
+
+# --- Redaction Rule Engine ---
+
+class RedactionRuleSet:
+    """
+    Declarative redaction rules compiled into one combined key matcher.
+    Each line is split on '=' once and its key looked up in a memo of previous
+    match results, so the combined regex only runs once per distinct key.
+    """
+    _KEY_CACHE_LIMIT = 4096 # osu! configs have a few hundred distinct keys at most
+
+    def __init__(self, rules, header_comment_keywords=(), version=None):
+        self.rules = list(rules)
+        self.version = version
+        self.header_comment_keywords = [k.upper() for k in header_comment_keywords]
+        self._actions = {} # group name -> (rule name, action)
+        key_alternatives = []
+        for i, (name, key_pattern, action) in enumerate(self.rules):
+            if action not in (constants.REDACTION_ACTION_DROP, constants.REDACTION_ACTION_MASK, constants.REDACTION_ACTION_HASH):
+                raise ValueError(f"Unknown redaction action '{action}' for rule '{name}'")
+            group = f"r{i}"
+            self._actions[group] = (name, action)
+            key_alternatives.append(f"(?P<{group}>{key_pattern})")
+        self.key_pattern = re.compile("|".join(key_alternatives), re.IGNORECASE) if key_alternatives else None
+        self._key_cache = {}
+        self._salt = secrets.token_bytes(16) # Hashes only compare within one run
+
+    def match_key(self, key):
+        """Returns (rule name, action) for a config key, or None if no rule applies."""
+        try:
+            return self._key_cache[key]
+        except KeyError:
+            pass
+        m = self.key_pattern.fullmatch(key) if self.key_pattern else None
+        result = self._actions[m.lastgroup] if m else None
+        if len(self._key_cache) < self._KEY_CACHE_LIMIT:
+            self._key_cache[key] = result
+        return result
+
+    def is_sensitive_comment(self, line):
+        upper = line.upper()
+        return any(keyword in upper for keyword in self.header_comment_keywords)
+
+    def _hash_value(self, value):
+        return "hmac:" + hmac.new(self._salt, value.encode("utf-8"), hashlib.sha256).hexdigest()[:12]
+
+    def redact_lines(self, lines):
+        """
+        Applies the rules to the given lines in a single pass.
+        Returns (processed_lines, counts) where counts maps rule name -> lines redacted.
+        """
+        match_key = self.match_key
+        processed_lines = []
+        append = processed_lines.append
+        counts = {}
+        in_sensitive_header = True # Assume start might be sensitive
+        for line in lines:
+            key, sep, value = line.partition("=")
+            key = key.strip()
+            if key[:1] == "#":
+                # Comment (an '=' inside a comment is irrelevant). Sensitive ones are
+                # only dropped while still inside the leading comment block.
+                if in_sensitive_header and self.is_sensitive_comment(line): continue
+                append(line)
+                continue
+            rule = match_key(key) if sep else None
+            if rule is None:
+                in_sensitive_header = False
+                append(line)
+                continue
+
+            name, action = rule
+            if action == constants.REDACTION_ACTION_DROP:
+                counts[name] = counts.get(name, 0) + 1
+                continue
+            in_sensitive_header = False
+            stripped_value = value.strip()
+            if not stripped_value:
+                append(line) # Nothing to hide
+                continue
+            if action == constants.REDACTION_ACTION_MASK:
+                replacement = constants.REDACTION_MASK_VALUE
+            else:
+                replacement = self._hash_value(stripped_value)
+            counts[name] = counts.get(name, 0) + 1
+            newline = value[len(value.rstrip("\r\n")):]
+            append(f"{line[:len(line) - len(value)]} {replacement}{newline}")
+        return processed_lines, counts
+
+
+_default_ruleset = None
+
+def get_default_ruleset():
+    """Returns the rule set built from constants, compiling it on first use."""
+    global _default_ruleset
+    if _default_ruleset is None:
+        _default_ruleset = RedactionRuleSet(constants.REDACTION_RULES,
+                                            constants.REDACTION_HEADER_COMMENT_KEYWORDS,
+                                            version=constants.REDACTION_RULESET_VERSION)
+    return _default_ruleset
+
+
+def redact_config_lines(lines, ruleset=None):
+    """
+    Filters out the password line and sensitive header comments and masks/hashes
+    other identifying values. Returns (processed_lines, counts) - see RedactionRuleSet.
+    """
+    return (ruleset or get_default_ruleset()).redact_lines(lines)
+
+
+def build_safe_header(filename):
+    """Prepares the safe header for an exported config using constants."""
+    return constants.SAFE_CONFIG_HEADER.format(
+        original_username=get_original_username(filename),
+        export_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    )
+
+
+def decode_config_lines(data):
+    """Decodes raw config bytes into lines, translating newlines like text-mode readlines()."""
+    return io.StringIO(data.decode('utf-8', errors='ignore'), newline=None).readlines() # Ignore potential encoding errors
+
+
+def read_config_bytes(source_path):
+    """Reads a config's raw bytes (traced as a file operation)."""
+    with tracing.span("read", tracing.CAT_FILE, path=source_path):
+        with open(source_path, 'rb') as infile:
+            return infile.read()
+
+
+def export_config_data(data, dest_path, filename):
+    """
+    Redacts already-read config bytes and writes the safe copy to dest_path.
+    Returns the per-rule redaction counts. Raises on I/O errors.
+    """
+    with tracing.span("redact", tracing.CAT_EXPORT, file=filename):
+        processed_lines, counts = redact_config_lines(decode_config_lines(data))
+
+    with tracing.span("write", tracing.CAT_FILE, path=dest_path):
+        with open(dest_path, 'w', encoding='utf-8') as outfile:
+            write_safe_config(outfile, filename, processed_lines)
+    return counts
+
+
+def write_safe_config(outfile, filename, processed_lines):
+    """Writes the safe header followed by the redacted lines to a text stream."""
+    outfile.write(build_safe_header(filename))
+    outfile.writelines(processed_lines)
+
+
+def export_config_file(source_path, dest_path, filename):
+    """Reads one config and writes its safe copy to dest_path. See export_config_data."""
+    return export_config_data(read_config_bytes(source_path), dest_path, filename)
+
+
+# --- Zip Bundle Output ---
+
+def get_bundle_path(export_path, export_time=None):
+    """Returns the archive path for a bundled export started at export_time."""
+    stamp = (export_time or datetime.now()).strftime("%Y%m%d-%H%M%S")
+    return os.path.join(export_path, constants.EXPORT_BUNDLE_FILE_NAME.format(stamp))
+
+
+class ConfigBundleWriter:
+    """
+    Streams redacted configs straight into one compressed zip archive, so the
+    redacted data is never staged as loose or temporary files. Redaction runs in
+    the calling (worker) thread; only the write into the archive is serialized.
+    """
+    def __init__(self, bundle_path):
+        self.bundle_path = bundle_path
+        self.export_time = datetime.now()
+        self._lock = threading.Lock()
+        self._files = []
+        self._zip = zipfile.ZipFile(bundle_path, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def add_config(self, filename, data):
+        """Redacts one config's bytes and adds it to the archive. Returns the redaction counts."""
+        with tracing.span("redact", tracing.CAT_EXPORT, file=filename):
+            processed_lines, counts = redact_config_lines(decode_config_lines(data))
+        safe_filename = get_safe_filename(filename)
+        with self._lock, tracing.span("zip write", tracing.CAT_FILE, path=self.bundle_path, file=safe_filename):
+            # newline=None translates '\n' like the loose-file export does
+            with io.TextIOWrapper(self._zip.open(safe_filename, 'w'), encoding='utf-8') as outfile:
+                write_safe_config(outfile, filename, processed_lines)
+            self._files.append({"file": safe_filename, "username": get_original_username(filename)})
+        return counts
+
+    def close(self):
+        """Adds the bundle manifest (usernames, export time, tool version) and closes the archive."""
+        manifest = {
+            "tool": constants.APP_NAME,
+            "tool_version": constants.APP_VERSION,
+            "export_time": self.export_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "ruleset_version": get_default_ruleset().version,
+            "usernames": sorted(entry["username"] for entry in self._files),
+            "files": sorted(self._files, key=lambda entry: entry["file"]),
+        }
+        with self._lock, tracing.span("zip close", tracing.CAT_FILE, path=self.bundle_path):
+            self._zip.writestr(constants.EXPORT_BUNDLE_MANIFEST_NAME, json.dumps(manifest, indent=1))
+            self._zip.close()
+
+    def discard(self):
+        """Closes and deletes the archive (used when nothing could be exported)."""
+        with self._lock:
+            self._zip.close()
+        try:
+            os.remove(self.bundle_path)
+        except OSError as e:
+            structured_log.warning(f"Could not remove incomplete archive {self.bundle_path}: {e}")
+
+
+# --- Export Manifest (incremental export) ---
+
+def get_manifest_path(export_path):
+    return os.path.join(export_path, constants.EXPORT_MANIFEST_FILE_NAME)
+
+
+@tracing.traced(cat=tracing.CAT_FILE)
+def load_export_manifest(export_path, ruleset_version=None):
+    """
+    Returns the {safe filename: entry} map recorded by the last export to this folder.
+    Entries are discarded if the manifest is unreadable or was written with different rules.
+    """
+    manifest_path = get_manifest_path(export_path)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        structured_log.warning(f"Could not read export manifest {manifest_path}: {e}")
+        return {}
+    if manifest.get("version") != constants.EXPORT_MANIFEST_VERSION or \
+       manifest.get("ruleset_version") != ruleset_version:
+        return {}
+    files = manifest.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+@tracing.traced(cat=tracing.CAT_FILE)
+def save_export_manifest(export_path, entries, ruleset_version=None):
+    """Atomically writes the manifest (temp file + rename) so a crash never leaves it half-written."""
+    manifest_path = get_manifest_path(export_path)
+    manifest = {
+        "version": constants.EXPORT_MANIFEST_VERSION,
+        "ruleset_version": ruleset_version,
+        "files": entries,
+    }
+    tmp_path = f"{manifest_path}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+        return True
+    except OSError as e:
+        structured_log.warning(f"Could not write export manifest {manifest_path}: {e}")
+        return False
+
+
+def _manifest_entry(source_path, stat_result, content_hash):
+    return {
+        "source": source_path,
+        "size": stat_result.st_size,
+        "mtime_ns": stat_result.st_mtime_ns,
+        "sha256": content_hash,
+    }
+
+
+def _is_stat_unchanged(entry, source_path, stat_result):
+    return (entry is not None and entry.get("source") == source_path and
+            entry.get("size") == stat_result.st_size and
+            entry.get("mtime_ns") == stat_result.st_mtime_ns)
+
+
+def export_configs(osu_dir, selected_files, export_path, log_callback=None, status_callback=None,
+                   max_workers=None, incremental=True, bundle_path=None):
+    """
+    Exports the selected config files concurrently using a bounded worker pool.
+    log_callback(message, level) and status_callback(filename, status) are called
+    from worker threads; callers must marshal them onto the UI thread themselves.
+    With incremental=True, files whose source is unchanged since the last export to
+    export_path (per its manifest) are skipped after a stat and reported as up to date.
+    With bundle_path set, all configs are streamed into that zip archive instead
+    (incremental skipping does not apply).
+    Returns (success_count, export_errors) with errors in selection order.
+    """
+    ruleset_version = get_default_ruleset().version
+    incremental = incremental and not bundle_path
+    previous_entries = load_export_manifest(export_path, ruleset_version) if incremental else {}
+    bundle = None
+    new_entries = {}
+    entries_lock = threading.Lock()
+
+    def log(message, level="INFO"):
+        if log_callback: log_callback(message, level)
+
+    def set_status(filename, status):
+        if status in _FINAL_STATUSES:
+            metrics.CONFIG_EXPORT_FILES.inc((status,))
+        if status_callback: status_callback(filename, status)
+
+    def record(safe_filename, entry):
+        with entries_lock:
+            new_entries[safe_filename] = entry
+
+    def log_redactions(filename, counts):
+        if counts.pop(constants.REDACTION_PASSWORD_RULE, 0):
+            log(f"Password line removed from '{filename}'.")
+        else:
+            log(f"No password line found in '{filename}'.", level="WARN")
+        if counts:
+            redacted = ", ".join(f"{name} x{count}" for name, count in sorted(counts.items()))
+            log(f"Other sensitive values redacted in '{filename}': {redacted}")
+
+    def export_one(filename):
+        with tracing.span(f"export {filename}", tracing.CAT_EXPORT, file=filename):
+            return process_one(filename)
+
+    def process_one(filename):
+        source_path = os.path.abspath(os.path.join(osu_dir, filename))
+        safe_filename = get_safe_filename(filename)
+        dest_path = os.path.join(export_path, safe_filename)
+
+        set_status(filename, FILE_STATUS_PROCESSING)
+        try:
+            if bundle is not None:
+                log(f"Processing '{filename}' -> '{safe_filename}'...")
+                data = read_config_bytes(source_path)
+                log_redactions(filename, bundle.add_config(filename, data))
+                log(f"Successfully added '{safe_filename}' to '{os.path.basename(bundle_path)}'")
+                set_status(filename, FILE_STATUS_DONE)
+                return None
+
+            with tracing.span("stat", tracing.CAT_FILE, path=source_path):
+                stat_result = os.stat(source_path)
+            entry = previous_entries.get(safe_filename)
+            dest_exists = entry is not None and os.path.exists(dest_path)
+            if dest_exists and _is_stat_unchanged(entry, source_path, stat_result):
+                log(f"'{safe_filename}' is up to date, skipped.")
+                record(safe_filename, entry)
+                set_status(filename, FILE_STATUS_UP_TO_DATE)
+                return None
+
+            log(f"Processing '{filename}' -> '{safe_filename}'...")
+            data = read_config_bytes(source_path)
+            content_hash = hashlib.sha256(data).hexdigest()
+            if dest_exists and entry.get("source") == source_path and entry.get("sha256") == content_hash:
+                # Touched but not modified: refresh the recorded stat, keep the existing export
+                log(f"'{safe_filename}' is up to date (content unchanged), skipped.")
+                record(safe_filename, _manifest_entry(source_path, stat_result, content_hash))
+                set_status(filename, FILE_STATUS_UP_TO_DATE)
+                return None
+
+            log_redactions(filename, export_config_data(data, dest_path, filename))
+            log(f"Successfully exported '{safe_filename}'")
+            record(safe_filename, _manifest_entry(source_path, stat_result, content_hash))
+            set_status(filename, FILE_STATUS_DONE)
+            return None
+        except Exception as e:
+            error_msg = f"Failed to process/export '{filename}': {e}"
+            log(error_msg, level="ERROR")
+            # Also log traceback for detailed debugging
+            log(traceback.format_exc(), level="DEBUG")
+            set_status(filename, FILE_STATUS_ERROR)
+            return error_msg
+
+    if not selected_files:
+        return 0, []
+    metrics.CONFIG_EXPORTS.inc()
+
+    for filename in selected_files:
+        set_status(filename, FILE_STATUS_PENDING)
+
+    if bundle_path:
+        bundle = ConfigBundleWriter(bundle_path)
+
+    workers = max(1, min(max_workers or constants.EXPORT_MAX_WORKERS, len(selected_files)))
+    errors_by_index = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="config-export") as executor:
+        futures = {executor.submit(export_one, filename): i for i, filename in enumerate(selected_files)}
+        for future in as_completed(futures):
+            error_msg = future.result()
+            if error_msg:
+                errors_by_index[futures[future]] = error_msg
+
+    if bundle is not None:
+        if len(errors_by_index) < len(selected_files):
+            bundle.close()
+        else:
+            bundle.discard()
+
+    if new_entries:
+        # Keep entries for configs that were not part of this export
+        merged_entries = dict(load_export_manifest(export_path, ruleset_version))
+        merged_entries.update(new_entries)
+        save_export_manifest(export_path, merged_entries, ruleset_version)
+
+    export_errors = [errors_by_index[i] for i in sorted(errors_by_index)]
+    return len(selected_files) - len(export_errors), export_errors
@@ -1,26 +1,86 @@
 import configparser
 import os
 from . import constants 
+from . import fleet
+from . import shared_config
+from . import structured_log
 
 # --- Configuration Handling ---
 
 def get_config_path():
     return constants.CONFIG_FILE_PATH
 
-def load_config():
+def load_config(layered=True):
+    """
+    config.ini, merged over the cached shared baseline if [SharedConfig] Source is set.
+    Use layered=False before modifying and saving, so baseline values are not copied
+    into the local file.
+    """
     config = configparser.ConfigParser()
     config_path = get_config_path()
     if os.path.exists(config_path):
         try:
             config.read(config_path)
-            print(f"Configuration loaded from: {config_path}")
+            structured_log.info(f"Configuration loaded from: {config_path}")
         except configparser.Error as e:
-            print(f"Error reading config file {config_path}: {e}")
+            structured_log.error(f"Error reading config file {config_path}: {e}")
             return configparser.ConfigParser() # Return empty on error
     else:
-        print(f"Configuration file not found at: {config_path}")
+        structured_log.info(f"Configuration file not found at: {config_path}")
+    if layered:
+        config = _merge_shared_baseline(config, config_path)
     return config
 
+def _get_shared_source(config):
+    location = config.get(constants.CONFIG_SECTION_SHARED_CONFIG, constants.CONFIG_KEY_SHARED_CONFIG_SOURCE, fallback="")
+    return shared_config.get_source(location.strip())
+
+_refused_baseline_sections = set() # Logged once per section, not on every load
+
+def _is_allowed_baseline_section(section):
+    return (section in constants.SHARED_CONFIG_ALLOWED_SECTIONS or
+            section.startswith(constants.CONFIG_PROFILE_SECTION_PREFIX))
+
+def _merge_shared_baseline(local_config, config_path):
+    """
+    Baseline (cached copy only, never fetched here) with config.ini read on top of it.
+    Sections outside SHARED_CONFIG_ALLOWED_SECTIONS are dropped from the baseline.
+    """
+    source = _get_shared_source(local_config)
+    text = source.cached_text() if source else None
+    if not text:
+        return local_config
+    merged = configparser.ConfigParser()
+    try:
+        merged.read_string(text, source=source.location)
+        for section in merged.sections():
+            if not _is_allowed_baseline_section(section):
+                merged.remove_section(section)
+                if section not in _refused_baseline_sections:
+                    _refused_baseline_sections.add(section)
+                    structured_log.warning(f"Ignoring [{section}] in shared config {source.location}: "
+                                           "only config.ini may set it.")
+        merged.read(config_path)
+    except configparser.Error as e:
+        structured_log.warning(f"Ignoring shared config {source.location}: {e}")
+        return local_config
+    return merged
+
+def start_shared_config_refresh(on_change=None):
+    """Revalidates the shared baseline in the background (now, then every RefreshSeconds). Never blocks."""
+    config = load_config(layered=False)
+    source = _get_shared_source(config)
+    if source is None:
+        return None
+    try:
+        interval = config.getint(constants.CONFIG_SECTION_SHARED_CONFIG, constants.CONFIG_KEY_SHARED_CONFIG_REFRESH,
+                                 fallback=constants.SHARED_CONFIG_REFRESH_SECONDS)
+    except ValueError:
+        structured_log.warning(f"Invalid shared config refresh interval. Using {constants.SHARED_CONFIG_REFRESH_SECONDS}s.")
+        interval = constants.SHARED_CONFIG_REFRESH_SECONDS
+    source.start(max(0, interval), on_change)
+    return source
+
 def save_config(config):
     config_path = get_config_path()
     config_dir = os.path.dirname(config_path)
@@ -28,13 +88,13 @@ def save_config(config):
         os.makedirs(config_dir, exist_ok=True)
         with open(config_path, 'w') as configfile:
             config.write(configfile)
-        print(f"Configuration saved to: {config_path}")
+        structured_log.info(f"Configuration saved to: {config_path}")
         return True
     except IOError as e:
-        print(f"Error saving config file {config_path}: {e}")
+        structured_log.error(f"Error saving config file {config_path}: {e}")
         return False
     except Exception as e:
-        print(f"An unexpected error occurred saving config: {e}")
+        structured_log.error(f"An unexpected error occurred saving config: {e}")
         return False
 
 def get_path(key):
@@ -43,7 +103,7 @@ def get_path(key):
 
 def set_path(key, value):
     """Sets a specific path in the config and saves it."""
-    config = load_config()
+    config = load_config(layered=False)
     if not config.has_section(constants.CONFIG_SECTION_PATHS):
         config.add_section(constants.CONFIG_SECTION_PATHS)
     config.set(constants.CONFIG_SECTION_PATHS, key, value)
@@ -75,14 +135,154 @@ def get_resolution_config():
         res_x = int(res_x) if res_x else None
         res_y = int(res_y) if res_y else None
     except ValueError:
-        print("Warning: Invalid resolution value found in config. Ignoring.")
+        structured_log.warning("Invalid resolution value found in config. Ignoring.")
         return None, None
     return res_x, res_y
 
 def set_resolution_config(res_x, res_y):
-    config = load_config()
+    config = load_config(layered=False)
     if not config.has_section(constants.CONFIG_SECTION_RESOLUTION):
         config.add_section(constants.CONFIG_SECTION_RESOLUTION)
     config.set(constants.CONFIG_SECTION_RESOLUTION, constants.CONFIG_KEY_RES_X, str(res_x))
     config.set(constants.CONFIG_SECTION_RESOLUTION, constants.CONFIG_KEY_RES_Y, str(res_y))
-    return save_config(config)
\ No newline at end of file
+    return save_config(config)
+
+def get_sync_osu_config():
+    """Whether launches write the desktop mode into the osu! cfg ([Resolution] SyncOsuConfig, off by default)."""
+    config = load_config()
+    try:
+        return config.getboolean(constants.CONFIG_SECTION_RESOLUTION, constants.CONFIG_KEY_SYNC_OSU_CONFIG, fallback=False)
+    except ValueError:
+        structured_log.warning("Invalid SyncOsuConfig setting found in config. Leaving the osu! config alone.")
+        return False
+
+def set_sync_osu_config(enabled):
+    config = load_config(layered=False)
+    if not config.has_section(constants.CONFIG_SECTION_RESOLUTION):
+        config.add_section(constants.CONFIG_SECTION_RESOLUTION)
+    config.set(constants.CONFIG_SECTION_RESOLUTION, constants.CONFIG_KEY_SYNC_OSU_CONFIG, str(bool(enabled)).lower())
+    return save_config(config)
+
+def get_mode_change():
+    """How the Downscale button changes the mode ([Resolution] ModeChange: persistent by default, or session)."""
+    config = load_config()
+    value = config.get(constants.CONFIG_SECTION_RESOLUTION, constants.CONFIG_KEY_MODE_CHANGE,
+                       fallback=constants.MODE_CHANGE_PERSISTENT).strip().lower()
+    if value not in (constants.MODE_CHANGE_PERSISTENT, constants.MODE_CHANGE_SESSION):
+        structured_log.warning(f"Invalid ModeChange setting '{value}' found in config. Using persistent changes.")
+        return constants.MODE_CHANGE_PERSISTENT
+    return value
+
+def set_mode_change(mode_change):
+    config = load_config(layered=False)
+    if not config.has_section(constants.CONFIG_SECTION_RESOLUTION):
+        config.add_section(constants.CONFIG_SECTION_RESOLUTION)
+    config.set(constants.CONFIG_SECTION_RESOLUTION, constants.CONFIG_KEY_MODE_CHANGE, mode_change)
+    return save_config(config)
+
+# --- Launch Profile Config Functions ---
+
+def get_launch_profiles():
+    """{profile name: {key: value}} from the [Profile: <name>] sections, in file order."""
+    config = load_config()
+    profiles = {}
+    for section in config.sections():
+        if section.startswith(constants.CONFIG_PROFILE_SECTION_PREFIX):
+            name = section[len(constants.CONFIG_PROFILE_SECTION_PREFIX):].strip()
+            if name:
+                profiles[name] = dict(config.items(section))
+    return profiles
+
+# --- Logging Config Functions ---
+
+def get_log_max_lines():
+    """Cap on lines kept in the log view ([Logging] MaxLines), falling back to the default."""
+    config = load_config()
+    value = config.get(constants.CONFIG_SECTION_LOGGING, constants.CONFIG_KEY_LOG_MAX_LINES, fallback=None)
+    try:
+        max_lines = int(value) if value else constants.LOG_MAX_LINES
+    except ValueError:
+        structured_log.warning("Invalid log line limit found in config. Using default.")
+        return constants.LOG_MAX_LINES
+    return max(100, max_lines)
+
+def get_log_file_level():
+    """Minimum level written to the log file ([Logging] FileLevel), falling back to the default."""
+    config = load_config()
+    level = config.get(constants.CONFIG_SECTION_LOGGING, constants.CONFIG_KEY_LOG_FILE_LEVEL, fallback=None)
+    if not level:
+        return constants.LOG_FILE_LEVEL
+    normalized = structured_log.normalize_level(level.strip())
+    if normalized == "INFO" and level.strip().upper() != "INFO":
+        structured_log.warning(f"Invalid log file level '{level}' in config. Using {constants.LOG_FILE_LEVEL}.")
+        return constants.LOG_FILE_LEVEL
+    return normalized
+
+# --- Tracing Config Functions ---
+
+def get_tracing_enabled():
+    """Whether action spans are recorded ([Tracing] Enabled, on by default)."""
+    config = load_config()
+    try:
+        return config.getboolean(constants.CONFIG_SECTION_TRACING, constants.CONFIG_KEY_TRACING_ENABLED, fallback=True)
+    except ValueError:
+        structured_log.warning("Invalid tracing setting found in config. Tracing stays enabled.")
+        return True
+
+# --- Metrics Config Functions ---
+
+def get_metrics_enabled():
+    """Whether the localhost metrics endpoint is served ([Metrics] Enabled, off by default)."""
+    config = load_config()
+    try:
+        return config.getboolean(constants.CONFIG_SECTION_METRICS, constants.CONFIG_KEY_METRICS_ENABLED, fallback=False)
+    except ValueError:
+        structured_log.warning("Invalid metrics setting found in config. Metrics endpoint stays off.")
+        return False
+
+def get_metrics_port():
+    """Port of the metrics endpoint ([Metrics] Port)."""
+    config = load_config()
+    try:
+        port = config.getint(constants.CONFIG_SECTION_METRICS, constants.CONFIG_KEY_METRICS_PORT, fallback=constants.METRICS_PORT)
+    except ValueError:
+        port = -1
+    if not 0 < port < 65536:
+        structured_log.warning(f"Invalid metrics port found in config. Using {constants.METRICS_PORT}.")
+        return constants.METRICS_PORT
+    return port
+
+# --- Fleet Config Functions ---
+
+def get_fleet_settings():
+    """
+    [Fleet] settings: {agent_enabled, agent_host, agent_port, token, hosts [(host, port)], timeout}.
+    Invalid values are logged and replaced by defaults (no hosts, agent off).
+    """
+    config = load_config()
+    section = constants.CONFIG_SECTION_FLEET
+    settings = {"agent_enabled": False, "agent_port": constants.FLEET_AGENT_PORT, "hosts": [],
+                "agent_host": config.get(section, constants.CONFIG_KEY_FLEET_AGENT_HOST, fallback="").strip() or constants.FLEET_AGENT_HOST,
+                "token": config.get(section, constants.CONFIG_KEY_FLEET_TOKEN, fallback="").strip(),
+                "timeout": constants.FLEET_HOST_TIMEOUT}
+    try:
+        settings["agent_enabled"] = config.getboolean(section, constants.CONFIG_KEY_FLEET_AGENT_ENABLED, fallback=False)
+        settings["agent_port"] = config.getint(section, constants.CONFIG_KEY_FLEET_AGENT_PORT, fallback=constants.FLEET_AGENT_PORT)
+        settings["timeout"] = max(1.0, config.getfloat(section, constants.CONFIG_KEY_FLEET_TIMEOUT, fallback=constants.FLEET_HOST_TIMEOUT))
+        settings["hosts"] = fleet.parse_hosts(config.get(section, constants.CONFIG_KEY_FLEET_HOSTS, fallback=""))
+    except ValueError as e:
+        structured_log.warning(f"Invalid [Fleet] setting in config ({e}). Using defaults for the rest.")
+    return settings
+
+# --- Watchdog Config Functions ---
+
+def get_stall_threshold_ms():
+    """UI stall threshold in ms ([Watchdog] StallThresholdMs); 0 disables the watchdog."""
+    config = load_config()
+    try:
+        threshold = config.getint(constants.CONFIG_SECTION_WATCHDOG, constants.CONFIG_KEY_STALL_THRESHOLD_MS,
+                                  fallback=constants.STALL_THRESHOLD_MS)
+    except ValueError:
+        structured_log.warning(f"Invalid stall threshold found in config. Using {constants.STALL_THRESHOLD_MS} ms.")
+        return constants.STALL_THRESHOLD_MS
+    return 0 if threshold <= 0 else max(constants.STALL_MIN_THRESHOLD_MS, threshold)
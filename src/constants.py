@@ -54,6 +54,10 @@ STATUS_ERROR = "An error occurred. Check logs."
 CONFIG_SECTION_RESOLUTION = "Resolution"
 CONFIG_KEY_RES_X = "DownscaleX"
 CONFIG_KEY_RES_Y = "DownscaleY"
+CONFIG_KEY_SYNC_OSU_CONFIG = "SyncOsuConfig" # Write the desktop mode into osu!.<user>.cfg before launching
+CONFIG_KEY_MODE_CHANGE = "ModeChange" # persistent | session (Downscale button)
+MODE_CHANGE_PERSISTENT = "persistent" # Stays until restored, also after the app exits
+MODE_CHANGE_SESSION = "session" # Never saved; Windows reverts it when the app exits or crashes, or on logoff
 
 # --- UI Texts (Resolution) ---
 LABEL_RESOLUTION_SECTION = "Display Resolution Control"
@@ -61,11 +65,14 @@ BUTTON_DOWNSCALE = "Downscale Resolution"
 BUTTON_RESTORE_NATIVE = "Restore Native Resolution"
 LABEL_RES_X = "X:"
 LABEL_RES_Y = "Y:"
+CHECKBOX_SYNC_OSU_CONFIG = "Write resolution to osu! config on launch"
+MODE_CHANGE_LABELS = {MODE_CHANGE_PERSISTENT: "Persistent", MODE_CHANGE_SESSION: "Until app exits"} # Segmented button
 
 # --- Status Messages (Resolution) ---
 STATUS_GETTING_NATIVE_RES = "Getting native resolution..."
 STATUS_SETTING_RES = "Setting resolution to {}x{}..."
 STATUS_RESTORING_RES = "Restoring native resolution..."
+STATUS_REVERTING_RES = "Reverting to the saved desktop mode..."
 STATUS_INVALID_RES_INPUT = "Invalid resolution input. Please enter numbers only."
 STATUS_SET_RES_FAIL = "Failed to set resolution. Mode might not be supported."
 STATUS_GET_NATIVE_FAIL = "Failed to determine native resolution."
@@ -76,6 +83,13 @@ BUTTON_GO_TO_OSU_FOLDER = "Go to osu! Folder"
 BUTTON_EXPORT_CONFIG = "Export Safe osu! Config"
 TITLE_EXPORT_CONFIG_DIALOG = "Export osu! Configuration"
 LABEL_SELECT_CONFIGS = "Select config(s) to export:"
+LABEL_EXPORT_SELECTION = "{} of {} selected"
+PLACEHOLDER_EXPORT_SEARCH = "Filter by username..."
+BUTTON_SELECT_ALL = "All"
+BUTTON_SELECT_NONE = "None"
+SORT_EXPORT_BY_NAME = "Name"
+SORT_EXPORT_BY_MODIFIED = "Last modified"
+EXPORT_DIALOG_VISIBLE_ROWS = 8 # Rows rendered by the virtualized config list
 LABEL_EXPORT_PATH = "Export to:"
 BUTTON_BROWSE_EXPORT_PATH = "Browse..."
 BUTTON_EXPORT_OK = "Export Selected"
@@ -90,17 +104,242 @@ STATUS_EXPORT_FAILED = "Configuration export failed."
 MSG_CONFIRM_EXPORT_TITLE = "Export Successful"
 MSG_CONFIRM_EXPORT_BODY = "Selected configuration(s) exported successfully to:\n{}" # Placeholder for path
 BUTTON_OPEN_EXPORT_FOLDER = "Open Folder"
+CHECKBOX_EXPORT_BUNDLE = "Bundle into a single .zip archive"
+TITLE_EXPORT_PROGRESS_DIALOG = "Exporting osu! Configuration"
+LABEL_EXPORT_PROGRESS = "Exported {} of {} file(s)"
+EXPORT_FILE_STATUS_TEXT = { # Per-file status shown in the progress dialog
+    "pending": "Pending",
+    "processing": "Processing...",
+    "done": "Exported",
+    "up_to_date": "Up to date",
+    "error": "Failed",
+}
 
 # --- Config Export ---
 OSU_CONFIG_EXCLUDE = "osu!.cfg" # Default config file to ignore
 SAFE_CONFIG_PREFIX = "SAFE_"
+EXPORT_MAX_WORKERS = 8 # Upper bound on concurrent export workers
+EXPORT_MANIFEST_FILE_NAME = ".osu-launch-tool-export.json" # Written into the export folder
+EXPORT_MANIFEST_VERSION = 1
+EXPORT_BUNDLE_FILE_NAME = "osu-configs-{}.zip" # Placeholder for export timestamp
+EXPORT_BUNDLE_MANIFEST_NAME = "manifest.json" # Stored inside the zip bundle
 SAFE_CONFIG_HEADER = """
 # osu! configuration exported by osu! Launch Tool
 # Original username associated with this config: {original_username}
 # Exported on: {export_time}
 # IMPORTANT: The user's password/token has been REMOVED from this file.
+# Other identifying values (usernames, tokens, paths) have been masked or hashed.
 # This file should be safe to share for troubleshooting or comparison purposes.
 # Original sensitive header comments may have been removed or replaced.
 #----------------------------------------------------------
 
-"""
\ No newline at end of file
+"""
+
+# --- Config Comparison ---
+BUTTON_COMPARE_CONFIGS = "Compare Configs"
+TITLE_SELECT_COMPARE_CONFIGS = "Select osu! Config Files to Compare"
+TITLE_SAVE_COMPARE_REPORT = "Save Config Drift Report"
+MSG_COMPARE_BASELINE_TITLE = "Comparison Baseline"
+MSG_COMPARE_BASELINE_BODY = "Compare against the first selected file?\n\n(Yes: {}\nNo: the most common value of each key)"
+STATUS_COMPARING_CONFIGS = "Comparing configuration files..."
+STATUS_COMPARE_COMPLETE = "Config comparison complete."
+COMPARE_MISSING_VALUE = "<missing>"
+COMPARE_MAX_WORKERS = 8
+COMPARE_LOG_TOP_KEYS = 10 # Drifted keys listed in the log (full list goes to the report)
+
+# --- Credential Audit (uses the export's redaction rules) ---
+AUDIT_FILE_SUFFIX = ".cfg"
+AUDIT_SCAN_WINDOW = 1024 * 1024 # Bytes of a mapped file case-folded at a time by the prefilter
+AUDIT_LOG_MAX_FILES = 50 # Flagged files listed in the log
+MENU_AUDIT_CONFIGS = "Audit Configs for Credentials..."
+TITLE_SELECT_AUDIT_FOLDER = "Select a Folder of osu! Configs to Audit"
+MSG_AUDIT_FIX_TITLE = "Remove Credentials?"
+MSG_AUDIT_FIX_BODY = "{} osu! config(s) contain credentials:\n\n{}\n\nRemove these lines from the files now?"
+MSG_AUDIT_FIX_MORE = "... and {} more (see the log)"
+AUDIT_DIALOG_MAX_FILES = 10 # Flagged files listed in the fix dialog
+STATUS_AUDITING_CONFIGS = "Auditing configs for credentials..."
+STATUS_AUDIT_DONE = "Audit: {} of {} config(s) contain credentials."
+STATUS_FIXING_CONFIGS = "Removing credentials from {} config(s)..."
+STATUS_AUDIT_FIXED = "Audit: removed credentials from {} of {} config(s)."
+
+# --- Config Export Redaction Rules ---
+# Bump the version whenever the rules change so previously exported files are redone.
+REDACTION_RULESET_VERSION = 2
+REDACTION_ACTION_DROP = "drop" # Remove the whole line
+REDACTION_ACTION_MASK = "mask" # Keep the key, replace the value
+REDACTION_ACTION_HASH = "hash" # Keep the key, replace the value with a short hash (salted per run, not reversible by guessing)
+REDACTION_MASK_VALUE = "********"
+REDACTION_PASSWORD_RULE = "password"
+# (rule name, key regex, action) - the regex must match the whole key of a "Key = Value" line (case-insensitive)
+REDACTION_RULES = [
+    (REDACTION_PASSWORD_RULE, r"password", REDACTION_ACTION_DROP),
+    ("token", r"\w*token\w*", REDACTION_ACTION_DROP),
+    ("credential", r"credential\w*", REDACTION_ACTION_DROP),
+    ("irc", r"irc\w*", REDACTION_ACTION_MASK),
+    ("username", r"username", REDACTION_ACTION_MASK),
+    ("chat", r"(?:ignorelist|highlightwords)", REDACTION_ACTION_MASK),
+    ("path", r"\w*(?:directory|folder|path)", REDACTION_ACTION_MASK),
+]
+# Comment lines in the file header containing these phrases are dropped
+REDACTION_HEADER_COMMENT_KEYWORDS = ["IMPORTANT: DO NOT SHARE", "LOGIN CREDENTIALS"]
+
+# --- Config Discovery ---
+CONFIG_WATCH_INTERVAL = 0.5 # Seconds between stop checks while waiting for folder change events
+CONFIG_POLL_INTERVAL = 2.0 # Seconds between folder checks when no native watcher is available
+CONFIG_INDEX_POLL_MS = 50 # How often the export button re-checks a config scan that is still running
+CONFIG_INDEX_WAIT_MS = 30000 # Give up waiting for the initial scan after this long
+STATUS_SCANNING_CONFIGS = "Scanning osu! folder for configs..."
+
+# --- Installation Auto-Discovery ---
+INSTALL_DISCOVERY_MAX_DEPTH = 4 # Folder levels searched below each root
+INSTALL_DISCOVERY_MAX_WORKERS = 8
+INSTALL_DISCOVERY_TIME_BUDGET = 5.0 # Seconds before an uncached search gives up
+INSTALL_DISCOVERY_MAX_CANDIDATES = 5 # Ranked candidates kept per target
+INSTALL_DISCOVERY_SKIP_DIRS = {"windows", "appdata", "system volume information", "node_modules",
+                               "__pycache__", "site-packages", "winsxs"} # Lowercase folder names never descended into
+INSTALL_DISCOVERY_CACHE_FILE_PATH = os.path.join(CONFIG_DIR, "install_cache.json")
+INSTALL_DISCOVERY_CACHE_VERSION = 1
+STATUS_DISCOVERING_INSTALLS = "Searching for osu! and OpenTabletDriver installations..."
+
+# --- Log Display ---
+CONFIG_SECTION_LOGGING = "Logging"
+CONFIG_KEY_LOG_MAX_LINES = "MaxLines"
+LOG_MAX_LINES = 50000 # Default cap on entries kept in the log view (only the visible rows are rendered)
+LOG_MAX_PENDING = 20000 # Ring buffer size between producers and the UI
+LOG_MAX_BATCH = 2000 # Lines written to the text box per flush
+LOG_FLUSH_INTERVAL_MS = 16 # ~one frame
+
+# --- Log File (JSON lines) ---
+CONFIG_KEY_LOG_FILE_LEVEL = "FileLevel" # In [Logging]: DEBUG, INFO, WARN or ERROR
+LOG_FILE_DIR = os.path.join(CONFIG_DIR, "logs")
+LOG_FILE_NAME = "osu-launch-tool.jsonl"
+LOG_FILE_LEVEL = "INFO"
+LOG_FILE_MAX_BYTES = 2 * 1024 * 1024 # Rotate when the file would grow past this
+LOG_FILE_ROTATE_SECONDS = 24 * 60 * 60 # ... or once it is a day old
+LOG_FILE_BACKUP_COUNT = 5 # Rotated files kept (osu-launch-tool.1.jsonl is the newest)
+LOG_FILE_QUEUE_SIZE = 10000 # Records waiting for the writer thread before new ones are dropped
+LOG_FILE_MAX_BATCH = 500 # Records written per file write
+LOG_FILE_FLUSH_INTERVAL = 0.5 # Seconds the writer waits for new records between stop checks
+
+# --- Log Viewer ---
+LOG_VIEW_ROWS = 8 # Rows rendered in the log panel
+PLACEHOLDER_LOG_SEARCH = "Search log..."
+LOG_VIEW_ALL_LEVELS = "All levels"
+LOG_VIEW_LEVEL_OPTIONS = [LOG_VIEW_ALL_LEVELS, "INFO", "WARN", "ERROR"] # Minimum level shown
+LOG_VIEW_ALL_ACTIONS = "All actions"
+LOG_VIEW_TIME_WINDOWS = {"All time": None, "Last 5 min": 5 * 60, "Last 30 min": 30 * 60, "Last 2 hours": 2 * 60 * 60}
+LOG_VIEW_CURRENT_SESSION = "This session"
+LABEL_LOG_VIEW_COUNT = "{} of {}"
+LABEL_LOG_VIEW_LOADING = "Loading..."
+LOG_VIEW_FILE_LABEL = "{} ({})" # File name, last modified
+LOG_VIEW_LOAD_POLL_MS = 50 # How often the viewer checks whether a log file finished indexing
+LOG_VIEW_FILE_CACHE_SIZE = 512 # Messages cached while browsing a log file
+LOG_VIEW_LEVEL_COLORS = {"DEBUG": "gray55", "WARN": "orange", "ERROR": "#ff5555"}
+
+# --- Status Bar ---
+STATUS_STEP_FORMAT = "step {}/{}"
+STATUS_ELAPSED_FORMAT = "{:.1f}s"
+
+# --- Tracing ---
+CONFIG_SECTION_TRACING = "Tracing"
+CONFIG_KEY_TRACING_ENABLED = "Enabled"
+TRACE_MAX_EVENTS = 20000 # Spans kept in memory (oldest dropped first)
+TRACE_MAX_ACTIONS = 50 # Action time windows kept for export
+TRACE_EXPORT_ACTIONS = 10 # Actions included by the Diagnostics menu export
+MENU_DIAGNOSTICS = "Diagnostics"
+MENU_SAVE_TRACE = "Save Trace of Last {} Actions..."
+TITLE_SAVE_TRACE = "Save Trace (Chrome / Perfetto JSON)"
+TRACE_FILE_NAME = "osu-launch-tool-trace-{}.json"
+
+# --- Action Latency History ---
+LATENCY_HISTORY_FILE_PATH = os.path.join(CONFIG_DIR, "latency_history.bin")
+LATENCY_NAMES_FILE_PATH = os.path.join(CONFIG_DIR, "latency_names.json")
+LATENCY_HISTORY_MAX_RECORDS = 50000 # ~1.2 MB; compacted past this
+LATENCY_HISTORY_KEEP_RUNS = 500 # Runs kept per action when compacting
+LATENCY_STATS_RUNS = 50 # Runs per action included in the statistics
+MENU_LATENCY_STATS = "Action Timing Statistics..."
+TITLE_LATENCY_STATS = "Action Timing (last {} runs per action)"
+
+# --- Launch Profiles ---
+CONFIG_PROFILE_SECTION_PREFIX = "Profile:" # [Profile: tournament]
+CONFIG_KEY_PROFILE_DRIVER = "Driver" # otd | wacom | unchanged
+CONFIG_KEY_PROFILE_RESOLUTION = "Resolution" # 1280x960 | native (omit to leave unchanged)
+CONFIG_KEY_PROFILE_REFRESH_RATE = "RefreshRate"
+CONFIG_KEY_PROFILE_PRIORITY = "Priority" # normal | above_normal | high
+CONFIG_KEY_PROFILE_PREFETCH = "Prefetch"
+CONFIG_KEY_PROFILE_LAUNCH_OSU = "LaunchOsu"
+CONFIG_KEY_PROFILE_MODE_CHANGE = "ModeChange" # session (default) | persistent
+PREFETCH_FILES = [OSU_EXECUTABLE, "osu!.db", "collection.db", "scores.db"] # Relative to the osu! folder
+PREFETCH_CHUNK_SIZE = 1024 * 1024
+OTD_STARTUP_WAIT = 1 # Seconds between launching OTD and osu!
+LABEL_PROFILE = "Profile:"
+LABEL_NO_PROFILES = "(no profiles in config.ini)"
+BUTTON_RUN_PROFILE = "Run Profile"
+STATUS_PREFETCHING = "Prefetching osu! files..."
+
+# --- Fleet (LAN coordinator / agent) ---
+CONFIG_SECTION_FLEET = "Fleet"
+CONFIG_KEY_FLEET_AGENT_ENABLED = "AgentEnabled"
+CONFIG_KEY_FLEET_AGENT_PORT = "AgentPort"
+CONFIG_KEY_FLEET_TOKEN = "Token"
+CONFIG_KEY_FLEET_HOSTS = "Hosts"
+CONFIG_KEY_FLEET_TIMEOUT = "TimeoutSeconds"
+CONFIG_KEY_FLEET_AGENT_HOST = "AgentHost"
+FLEET_AGENT_HOST = "0.0.0.0" # Agents listen on the LAN unless [Fleet] AgentHost names one interface
+FLEET_SIGNATURE_WINDOW = 30.0 # Seconds a signed request stays valid (clock skew allowance); nonces are kept this long
+FLEET_AGENT_PORT = 9478
+FLEET_HOST_TIMEOUT = 30.0 # Seconds per machine (driver switching takes a few seconds)
+FLEET_DEADLINE_GRACE = 2.0
+FLEET_CLAIM_TIMEOUT = 10.0 # Seconds the agent waits for the UI thread to start a requested action
+FLEET_MAX_WORKERS = 64
+FLEET_MAX_REQUEST_BYTES = 4096
+FLEET_MAX_NONCES = 10000 # Expired nonces are pruned once this many are kept
+FLEET_ACTIONS = ["run_osu_with_otd", "run_osu_only", "run_otd_only", "enable_wacom",
+                 "downscale_resolution", "restore_resolution", "run_profile"]
+FLEET_PROFILE_PREFIX = "profile: " # Option menu entry for a launch profile
+MENU_FLEET = "Fleet"
+MENU_FLEET_RUN = "Run on Fleet..."
+TITLE_FLEET = "Run on Fleet"
+BUTTON_FLEET_RUN = "Run on All Hosts"
+LABEL_FLEET_HOSTS = "{} host(s) from [Fleet] Hosts"
+STATUS_FLEET_RUNNING = "Running on {} host(s)..."
+STATUS_FLEET_DONE = "Fleet: {}/{} ok in {:.1f}s"
+
+# --- State Journal (changes to undo after a crash) ---
+STATE_JOURNAL_FILE_PATH = os.path.join(CONFIG_DIR, "state_journal.log")
+TITLE_RESTORE_STATE = "Restore Previous State"
+MSG_RESTORE_STATE = "The last session changed these and did not restore them:\n\n{}\n\nRestore them now?"
+STATUS_RESTORING_STATE = "Restoring the state from before the last session..."
+
+# --- UI Stall Watchdog ---
+CONFIG_SECTION_WATCHDOG = "Watchdog"
+CONFIG_KEY_STALL_THRESHOLD_MS = "StallThresholdMs"
+STALL_THRESHOLD_MS = 500 # A heartbeat this late counts as a stall (0 disables the watchdog)
+STALL_MIN_THRESHOLD_MS = 100
+STALL_CHECK_INTERVAL = 0.05 # Seconds between monitor checks
+STALL_HISTOGRAM_BUCKETS_MS = (1000, 2000, 5000, 10000, 30000)
+STALL_MAX_REPORTS = 20 # Captured stacks kept for the report
+MENU_STALL_REPORT = "UI Stall Report..."
+TITLE_STALL_REPORT = "UI Stalls This Session"
+
+# --- Shared Config (baseline merged under config.ini) ---
+CONFIG_SECTION_SHARED_CONFIG = "SharedConfig"
+CONFIG_KEY_SHARED_CONFIG_SOURCE = "Source" # File path (e.g. on a share) or https URL; empty disables it
+CONFIG_KEY_SHARED_CONFIG_REFRESH = "RefreshSeconds"
+SHARED_CONFIG_CACHE_FILE_PATH = os.path.join(CONFIG_DIR, "shared_config_cache.json")
+SHARED_CONFIG_CACHE_VERSION = 1
+SHARED_CONFIG_TIMEOUT = 5.0 # Seconds per background fetch
+SHARED_CONFIG_REFRESH_SECONDS = 300 # 0: only refresh once at startup
+SHARED_CONFIG_MAX_BYTES = 1024 * 1024
+# The baseline is not authenticated, so it may only carry these sections (and [Profile: ...]).
+# Folder paths, fleet, metrics and the shared config itself always come from the local config.ini.
+SHARED_CONFIG_ALLOWED_SECTIONS = (CONFIG_SECTION_RESOLUTION, CONFIG_SECTION_LOGGING, CONFIG_SECTION_TRACING,
+                                  CONFIG_SECTION_WATCHDOG)
+
+# --- Metrics Endpoint ---
+CONFIG_SECTION_METRICS = "Metrics"
+CONFIG_KEY_METRICS_ENABLED = "Enabled"
+CONFIG_KEY_METRICS_PORT = "Port"
+METRICS_HOST = "127.0.0.1" # Never exposed beyond this machine
+METRICS_PORT = 9477
+METRICS_DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30) # Seconds
@@ -0,0 +1,179 @@
+import mmap
+import os
+import re
+
+from . import config_export
+from . import constants
+from . import osu_config
+from . import structured_log
+from . import tracing
+
+FINDING_COMMENT = "comment"
+_NEWLINE = re.compile(rb"\n")
+OSU_CONFIG_HEADER = b"# osu! configuration" # First line osu! writes into its cfg files
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+
+def looks_like_osu_config(path, head):
+    """True for osu!.<user>.cfg names (as exported) or files starting with osu!'s header; only these are ever fixed."""
+    if config_export.CONFIG_FILE_PATTERN.match(os.path.basename(path)):
+        return True
+    return head.lstrip(_UTF8_BOM)[:len(OSU_CONFIG_HEADER)].lower() == OSU_CONFIG_HEADER
+
+
+def _required_literal(key_pattern):
+    """Lowercase text every match of a key pattern contains ("\\w*token\\w*" -> b"token"), or None if unknown."""
+    literal = re.sub(r"\\w[*+]", "", key_pattern)
+    return literal.lower().encode("ascii") if literal.isalpha() else None
+
+
+class AuditMatcher:
+    """
+    What the export removes as credentials, compiled for byte scanning: "Key = value"
+    lines whose key matches a drop rule (password, tokens, ...) with a non-empty value,
+    and comment lines containing a sensitive header keyword.
+    Files are first checked for literals every such line must contain (case-folded
+    bytes.find, which is far cheaper than the line regex); the regex only runs on the
+    few files that contain one. The prefilter folds the buffer (e.g. an mmap) one
+    AUDIT_SCAN_WINDOW at a time, so memory use does not grow with the file size.
+    """
+    def __init__(self, ruleset=None):
+        ruleset = ruleset or config_export.get_default_ruleset()
+        keys = [(f"k{i}", name, pattern) for i, (name, pattern, action) in enumerate(ruleset.rules)
+                if action == constants.REDACTION_ACTION_DROP]
+        keywords = [keyword.encode("utf-8") for keyword in ruleset.header_comment_keywords]
+        alternatives = []
+        if keys:
+            key_alternatives = b"|".join(f"(?P<{group}>{pattern})".encode("ascii") for group, _, pattern in keys)
+            alternatives.append(rb"(?:" + key_alternatives + rb")[ \t]*=[ \t]*[^\s][^\r\n]*")
+        if keywords:
+            alternatives.append(rb"#[^\r\n]*?(?:" + b"|".join(re.escape(k) for k in keywords) + rb")[^\r\n]*")
+        # Whole lines (without the line ending), so they can be reported and removed
+        self.pattern = re.compile(rb"^[ \t]*(?:" + b"|".join(alternatives) + rb")", re.IGNORECASE | re.MULTILINE)
+        self.rule_names = {group: name for group, name, _ in keys}
+        literals = [_required_literal(pattern) for _, _, pattern in keys] + [k.lower() for k in keywords]
+        self.literals = None if None in literals or not literals else literals # None: no prefilter, always run the regex
+        self._overlap = max(map(len, self.literals)) - 1 if self.literals else 0
+
+    def may_match(self, data, window=None):
+        """True if data may contain a flagged line. Folds windows (overlapping by a literal's length) instead of the whole buffer."""
+        if self.literals is None:
+            return True
+        window = window or constants.AUDIT_SCAN_WINDOW
+        for position in range(0, len(data), window):
+            folded = data[position:position + window + self._overlap].lower()
+            if any(folded.find(literal) >= 0 for literal in self.literals):
+                return True
+        return False
+
+    def finditer(self, data):
+        """(start, end, rule name or "comment") of each flagged line."""
+        for match in self.pattern.finditer(data):
+            yield match.start(), match.end(), self.rule_names.get(match.lastgroup, FINDING_COMMENT)
+
+
+def remove_lines(data, spans):
+    """data without the lines at spans [(start, end)], including each line's ending."""
+    parts = []
+    position = 0
+    for start, end in spans:
+        if data[end:end + 2] == b"\r\n":
+            end += 2
+        elif data[end:end + 1] in (b"\n", b"\r"):
+            end += 1
+        parts.append(data[position:start])
+        position = end
+    parts.append(data[position:])
+    return b"".join(parts)
+
+
+def audit_file(path, matcher, fix=False):
+    """
+    Scans one file's bytes, mapped rather than read through a buffered stream and never
+    decoded to text. Returns a result
+    {path, findings [(line number, rule name or "comment")], osu_config, fixed, error}.
+    With fix, flagged lines are removed and the file is replaced atomically, but only if
+    it looks like an osu! config (see looks_like_osu_config); other programs' cfg files
+    are only reported. Values are never included in the result.
+    """
+    result = {"path": path, "findings": [], "osu_config": False, "fixed": False, "error": None}
+    try:
+        with open(path, 'rb') as f:
+            stat_result = os.fstat(f.fileno())
+            if not stat_result.st_size:
+                return result
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # Scanned in place; only a file that is about to be fixed is copied out of the mapping
+                if not matcher.may_match(mapped):
+                    return result
+                matches = list(matcher.finditer(mapped))
+                if not matches:
+                    return result
+                line, counted_to = 1, 0
+                for start, end, name in matches:
+                    line += len(_NEWLINE.findall(mapped, counted_to, start))
+                    counted_to = start
+                    result["findings"].append((line, name))
+                result["osu_config"] = looks_like_osu_config(path, mapped[:len(_UTF8_BOM) + len(OSU_CONFIG_HEADER)])
+                data = mapped[:] if fix and result["osu_config"] else None
+        if data is not None:
+            # Closed (mmap and file) before the replace, which Windows requires; skip if it changed meanwhile
+            current = os.stat(path)
+            if (current.st_mtime_ns, current.st_size) != (stat_result.st_mtime_ns, stat_result.st_size):
+                raise OSError("file changed while it was audited")
+            osu_config.write_atomic(path, remove_lines(data, [(start, end) for start, end, _ in matches]))
+            result["fixed"] = True
+    except (OSError, ValueError) as e:
+        result["error"] = str(e)
+    return result
+
+
+def iter_config_paths(root):
+    """Every *.cfg file below root (any depth), in walk order."""
+    for folder, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(constants.AUDIT_FILE_SUFFIX):
+                yield os.path.join(folder, name)
+
+
+@tracing.traced(cat=tracing.CAT_FILE)
+def audit_tree(root, fix=False, log_callback=None):
+    """
+    Audits every .cfg file below root, one after another as the walk finds them (the scan
+    is CPU-bound under the GIL, so a thread pool did not help; a process pool costs more
+    to start than a typical tree takes to scan).
+    Returns (files scanned, flagged results sorted by path, error results).
+    """
+    return _audit_paths(iter_config_paths(root), fix, log_callback)
+
+
+@tracing.traced(cat=tracing.CAT_FILE)
+def fix_files(paths, log_callback=None):
+    """
+    Re-audits paths (e.g. the osu! configs flagged by an earlier audit_tree) and removes
+    the flagged lines. Returns (files scanned, flagged results sorted by path, error results).
+    """
+    return _audit_paths(paths, True, log_callback)
+
+
+def _audit_paths(paths, fix, log_callback):
+    log = log_callback or structured_log.log
+    matcher = AuditMatcher()
+    flagged, errors = [], []
+    scanned = 0
+    for path in paths:
+        result = audit_file(path, matcher, fix)
+        scanned += 1
+        if result["error"]:
+            errors.append(result)
+            log(f"Could not audit '{result['path']}': {result['error']}", level="WARN")
+        elif result["findings"]:
+            flagged.append(result)
+    flagged.sort(key=lambda result: result["path"])
+    errors.sort(key=lambda result: result["path"])
+    return scanned, flagged, errors
+
+
+def describe_findings(result):
+    """"password (line 9), comment (line 4)" for one flagged result."""
+    return ", ".join(f"{name} (line {line})" for line, name in result["findings"])
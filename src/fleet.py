@@ -0,0 +1,259 @@
+import hashlib
+import hmac
+import json
+import secrets
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import constants
+from . import structured_log
+
+TIME_HEADER = "X-Fleet-Time"
+NONCE_HEADER = "X-Fleet-Nonce"
+SIGNATURE_HEADER = "X-Fleet-Signature"
+RESULT_OK = "ok"
+RESULT_FAILED = "failed"
+RESULT_BUSY = "busy"
+RESULT_REJECTED = "rejected"
+RESULT_TIMEOUT = "timeout"
+RESULT_UNREACHABLE = "unreachable"
+
+
+def sign(token, method, path, timestamp, nonce, body=b""):
+    """HMAC-SHA256 (keyed by the shared token) over the request line, time, nonce and body."""
+    message = f"{method}\n{path}\n{timestamp}\n{nonce}\n".encode("utf-8") + body
+    return hmac.new(token.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def signed_headers(token, method, path, body=b""):
+    """Headers that authenticate one request. The token itself never goes over the wire."""
+    timestamp, nonce = f"{time.time():.3f}", secrets.token_hex(16)
+    return {TIME_HEADER: timestamp, NONCE_HEADER: nonce,
+            SIGNATURE_HEADER: sign(token, method, path, timestamp, nonce, body)}
+
+
+# --- Agent (runs on every gaming PC) ---
+
+class _AgentHandler(BaseHTTPRequestHandler):
+    server_version = f"{constants.APP_NAME.replace(' ', '')}/{constants.APP_VERSION}"
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The coordinator gave up (per-host timeout); the action itself still ran
+            structured_log.warning(f"Fleet coordinator {self.client_address[0]} disconnected before the reply.")
+
+    def _authorized(self, body=b""):
+        """
+        Checks the request signature. A captured request cannot be replayed: it is only
+        accepted within FLEET_SIGNATURE_WINDOW of its time, and each nonce only once.
+        """
+        timestamp = self.headers.get(TIME_HEADER, "")
+        nonce = self.headers.get(NONCE_HEADER, "")
+        try:
+            sent = float(timestamp)
+        except ValueError:
+            return False
+        if not nonce or abs(time.time() - sent) > constants.FLEET_SIGNATURE_WINDOW:
+            return False
+        agent = self.server.agent
+        expected = sign(agent.token, self.command, self.path, timestamp, nonce, body)
+        if not hmac.compare_digest(self.headers.get(SIGNATURE_HEADER, "").encode("utf-8"), expected.encode("utf-8")):
+            return False
+        return agent.use_nonce(nonce, sent)
+
+    def do_GET(self):
+        if self.path != "/status":
+            self._reply(404, {"error": "not found"})
+        elif not self._authorized():
+            self._reply(403, {"error": "bad signature"})
+        else:
+            self._reply(200, {"host": socket.gethostname(), "version": constants.APP_VERSION,
+                              "busy": self.server.agent.busy})
+
+    def do_POST(self):
+        if self.path != "/run":
+            self._reply(404, {"error": "not found"})
+            return
+        try:
+            length = min(int(self.headers.get("Content-Length", 0)), constants.FLEET_MAX_REQUEST_BYTES)
+        except ValueError:
+            length = 0
+        body = self.rfile.read(length)
+        if not self._authorized(body):
+            self._reply(403, {"error": "bad signature"})
+            return
+        try:
+            request = json.loads(body or b"{}")
+            action = str(request["action"])
+            profile = request.get("profile")
+        except (ValueError, KeyError, TypeError):
+            self._reply(400, {"error": "expected {\"action\": ..., \"profile\": ...}"})
+            return
+        self._reply(200, self.server.agent.run(action, profile))
+
+    def log_message(self, format, *args):
+        structured_log.debug(f"Fleet request from {self.client_address[0]}: {format % args}")
+
+
+class FleetAgent:
+    """
+    Accepts actions from a coordinator over HTTP (POST /run, GET /status) and runs them
+    through handler(action, profile) -> (ok, message), one at a time. Every request must
+    be signed with the shared token (see signed_headers); plain HTTP, so the LAN can see
+    which actions are sent, but not forge or replay them.
+    """
+    def __init__(self, handler, token, host=None, port=None):
+        if not token:
+            raise ValueError("A fleet token is required to run the agent.")
+        self.handler = handler
+        self.token = token
+        self.host = host or constants.FLEET_AGENT_HOST
+        self.port = constants.FLEET_AGENT_PORT if port is None else port
+        self._run_lock = threading.Lock()
+        self._nonce_lock = threading.Lock()
+        self._nonces = {} # Nonce -> request time, for requests still inside the signature window
+        self._server = None
+
+    @property
+    def busy(self):
+        return self._run_lock.locked()
+
+    def use_nonce(self, nonce, sent):
+        """Records a request nonce. Returns False if it was already used (a replay)."""
+        with self._nonce_lock:
+            cutoff = time.time() - 2 * constants.FLEET_SIGNATURE_WINDOW
+            if len(self._nonces) > constants.FLEET_MAX_NONCES:
+                self._nonces = {key: value for key, value in self._nonces.items() if value >= cutoff}
+            if nonce in self._nonces:
+                return False
+            self._nonces[nonce] = sent
+            return True
+
+    def run(self, action, profile=None):
+        if not self._run_lock.acquire(blocking=False):
+            return {"result": RESULT_BUSY, "message": "Another fleet action is running.", "seconds": 0.0}
+        start = time.perf_counter()
+        try:
+            structured_log.info(f"Fleet action requested: {action}" + (f" (profile '{profile}')" if profile else ""),
+                                event="fleet_run", fleet_action=action, profile=profile)
+            ok, message = self.handler(action, profile)
+        except Exception as e:
+            structured_log.exception(f"Fleet action '{action}' failed: {e}")
+            ok, message = False, str(e)
+        finally:
+            self._run_lock.release()
+        return {"result": RESULT_OK if ok else RESULT_FAILED, "message": message,
+                "seconds": round(time.perf_counter() - start, 3)}
+
+    def start(self):
+        """Starts serving from a daemon thread. Returns the bound port. Raises OSError."""
+        server = ThreadingHTTPServer((self.host, self.port), _AgentHandler)
+        server.daemon_threads = True
+        server.agent = self
+        threading.Thread(target=server.serve_forever, name="fleet-agent", daemon=True).start()
+        self._server = server
+        self.port = server.server_address[1]
+        structured_log.info(f"Fleet agent listening on {self.host}:{self.port}")
+        return self.port
+
+    def stop(self):
+        server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+# --- Coordinator ---
+
+def parse_hosts(text):
+    """"pc1, 192.168.1.20:9500" -> [("pc1", FLEET_AGENT_PORT), ("192.168.1.20", 9500)]. Raises ValueError."""
+    hosts = []
+    for item in text.replace("\n", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.rpartition(":") if ":" in item else (item, "", "")
+        port = int(port) if port else constants.FLEET_AGENT_PORT
+        if not host or not 0 < port < 65536:
+            raise ValueError(f"Invalid fleet host '{item}'.")
+        hosts.append((host, port))
+    return hosts
+
+
+def _send(host, port, token, action, profile, timeout):
+    """One request to one agent. Returns a result row."""
+    start = time.perf_counter()
+    row = {"host": f"{host}:{port}", "result": RESULT_UNREACHABLE, "message": "", "seconds": None, "remote_seconds": None}
+    body = json.dumps({"action": action, "profile": profile}).encode("utf-8")
+    request = urllib.request.Request(f"http://{host}:{port}/run", method="POST", data=body,
+                                     headers={"Content-Type": "application/json",
+                                              **signed_headers(token, "POST", "/run", body)})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            reply = json.loads(response.read())
+        row.update(result=reply.get("result", RESULT_FAILED), message=reply.get("message", ""),
+                   remote_seconds=reply.get("seconds"))
+    except urllib.error.HTTPError as e:
+        row.update(result=RESULT_REJECTED if e.code == 403 else RESULT_FAILED, message=f"HTTP {e.code}")
+    except (socket.timeout, TimeoutError):
+        row.update(result=RESULT_TIMEOUT, message=f"No reply within {timeout:g}s")
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        reason = getattr(e, "reason", e)
+        timed_out = isinstance(reason, (socket.timeout, TimeoutError))
+        row.update(result=RESULT_TIMEOUT if timed_out else RESULT_UNREACHABLE, message=str(reason))
+    row["seconds"] = round(time.perf_counter() - start, 3)
+    return row
+
+
+def run_on_fleet(hosts, action, token, profile=None, timeout=None, max_workers=None):
+    """
+    Sends one action (or profile) to every (host, port) concurrently, so the rollout
+    takes as long as the slowest machine (capped at timeout) rather than the sum.
+    Returns result rows in hosts order: {host, result, message, seconds, remote_seconds}.
+    """
+    timeout = timeout or constants.FLEET_HOST_TIMEOUT
+    if not hosts:
+        return []
+    workers = max(1, min(max_workers or constants.FLEET_MAX_WORKERS, len(hosts)))
+    structured_log.info(f"Fleet rollout of {action}" + (f" (profile '{profile}')" if profile else "") +
+                        f" to {len(hosts)} host(s)", event="fleet_rollout", fleet_action=action, hosts=len(hosts))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fleet")
+    futures = [executor.submit(_send, host, port, token, action, profile, timeout) for host, port in hosts]
+    # Socket timeouts bound each request; this also bounds a host that trickles bytes
+    wait(futures, timeout=timeout + constants.FLEET_DEADLINE_GRACE)
+    executor.shutdown(wait=False)
+    rows = []
+    for (host, port), future in zip(hosts, futures):
+        if future.done():
+            rows.append(future.result())
+        else:
+            future.cancel()
+            rows.append({"host": f"{host}:{port}", "result": RESULT_TIMEOUT, "message": f"No reply within {timeout:g}s",
+                         "seconds": None, "remote_seconds": None})
+    ok = sum(1 for row in rows if row["result"] == RESULT_OK)
+    structured_log.info(f"Fleet rollout of {action} finished: {ok}/{len(rows)} ok", event="fleet_rollout_end",
+                        fleet_action=action, ok=ok, hosts=len(rows))
+    return rows
+
+
+def format_results(rows):
+    """Fixed-width table of run_on_fleet() rows."""
+    header = f"{'Host':<28}{'Result':<13}{'Round trip':>11}{'Action':>9}  Message\n"
+    lines = [header, "-" * (len(header) - 1) + "\n"]
+    for row in rows:
+        round_trip = f"{row['seconds']:.2f}s" if row["seconds"] is not None else "-"
+        remote = f"{row['remote_seconds']:.2f}s" if row["remote_seconds"] is not None else "-"
+        lines.append(f"{row['host'][:27]:<28}{row['result']:<13}{round_trip:>11}{remote:>9}  {row['message']}\n")
+    return "".join(lines)
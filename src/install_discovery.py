@@ -0,0 +1,261 @@
+import json
+import os
+import string
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import constants
+from . import structured_log
+
+# Discovery targets: name -> executable names that identify an installation folder
+TARGET_OSU = "osu"
+TARGET_OTD = "otd"
+DEFAULT_TARGETS = {
+    TARGET_OSU: [constants.OSU_EXECUTABLE],
+    TARGET_OTD: constants.OTD_EXECUTABLES,
+}
+
+
+# --- Search Roots ---
+
+def get_default_roots():
+    """
+    Likely install roots, most likely first (earlier roots rank higher).
+    Fixed drive roots are appended on Windows so installs in e.g. D:\\Games are found.
+    """
+    home = os.path.expanduser("~")
+    roots = [
+        os.path.join(os.getenv('LOCALAPPDATA', ''), 'osu!') if os.getenv('LOCALAPPDATA') else None,
+        os.getenv('LOCALAPPDATA'),
+        os.path.join(home, 'Downloads'),
+        os.path.join(home, 'Desktop'),
+        os.getenv('ProgramFiles'),
+        os.getenv('ProgramFiles(x86)'),
+        home,
+    ]
+    if sys.platform == "win32":
+        roots.extend(f"{letter}:\\" for letter in string.ascii_uppercase if os.path.isdir(f"{letter}:\\"))
+    unique_roots = []
+    seen = set()
+    for root in roots:
+        if not root or not os.path.isdir(root):
+            continue
+        key = os.path.normcase(os.path.abspath(root))
+        if key not in seen:
+            seen.add(key)
+            unique_roots.append(root)
+    return unique_roots
+
+
+# --- Parallel Search ---
+
+class _MatchCollector:
+    """
+    Thread-safe match list with early termination: once every target has a match and
+    every root ranked at or above that match's root has been fully walked, no better
+    candidate can turn up, so the remaining (lower-ranked, usually huge) roots are cancelled.
+    """
+    def __init__(self, targets):
+        self.matches = []
+        self.stop_event = threading.Event()
+        self._best_root = {target: None for target in targets}
+        self._done_roots = set()
+        self._lock = threading.Lock()
+
+    def add(self, match):
+        with self._lock:
+            self.matches.append(match)
+            best = self._best_root[match["target"]]
+            if best is None or match["root_index"] < best:
+                self._best_root[match["target"]] = match["root_index"]
+            self._check_done()
+
+    def root_done(self, root_index):
+        with self._lock:
+            self._done_roots.add(root_index)
+            self._check_done()
+
+    def is_complete(self, root_count):
+        """True if the search was conclusive: every root was walked, or it stopped early because nothing better could turn up."""
+        with self._lock:
+            return self.stop_event.is_set() or len(self._done_roots) == root_count
+
+    def _check_done(self):
+        if any(best is None for best in self._best_root.values()):
+            return
+        if all(i in self._done_roots for i in range(max(self._best_root.values()) + 1)):
+            self.stop_event.set()
+
+
+def _walk_root(root_index, root, exe_lookup, max_depth, deadline, collector):
+    """Breadth-first walk of one root up to max_depth, recording folders that contain a target exe."""
+    try:
+        if _walk_levels(root_index, root, exe_lookup, max_depth, deadline, collector):
+            collector.root_done(root_index)
+    except Exception as e:
+        structured_log.error(f"Error searching '{root}' for installations: {e}")
+
+
+def _walk_levels(root_index, root, exe_lookup, max_depth, deadline, collector):
+    """Returns True if the root was walked completely (not cut short by a stop or the deadline)."""
+    skip_names = constants.INSTALL_DISCOVERY_SKIP_DIRS
+    stop_event = collector.stop_event
+    level = [root]
+    for depth in range(max_depth + 1):
+        next_level = []
+        for folder in level:
+            if stop_event.is_set() or time.monotonic() > deadline:
+                return False
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        name_lower = entry.name.lower()
+                        target = exe_lookup.get(name_lower)
+                        try:
+                            if target and entry.is_file():
+                                st = entry.stat()
+                                collector.add({
+                                    "target": target, "folder": folder, "exe": entry.path,
+                                    "root_index": root_index, "depth": depth,
+                                    "mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                                })
+                            elif depth < max_depth and name_lower not in skip_names and \
+                                 not name_lower.startswith(("$", ".")) and entry.is_dir(follow_symlinks=False):
+                                next_level.append(entry.path)
+                        except OSError:
+                            continue
+            except OSError:
+                continue # Permission denied, vanished, etc.
+        level = next_level
+        if not level:
+            break
+    return True
+
+
+def _rank_candidates(found, targets):
+    """
+    Groups matches by target and folder and ranks them: earlier root, shallower depth,
+    preferred executable (first in the target's list), newest executable first.
+    """
+    ranked = {}
+    for target, exe_names in targets.items():
+        preference = {name.lower(): i for i, name in enumerate(exe_names)}
+        best_by_folder = {}
+        for match in found:
+            if match["target"] != target:
+                continue
+            key = os.path.normcase(os.path.abspath(match["folder"]))
+            rank = (match["root_index"], match["depth"], preference.get(os.path.basename(match["exe"]).lower(), 99),
+                    -match["mtime_ns"])
+            current = best_by_folder.get(key)
+            if current is None or rank < current[0]:
+                best_by_folder[key] = (rank, match)
+        candidates = [match for _rank, match in sorted(best_by_folder.values(), key=lambda item: item[0])]
+        ranked[target] = candidates[:constants.INSTALL_DISCOVERY_MAX_CANDIDATES]
+    return ranked
+
+
+def discover_installations(roots=None, targets=None, max_depth=None, max_workers=None, time_budget=None):
+    """
+    Searches the roots concurrently (bounded depth, bounded worker pool) for folders
+    containing the target executables. Stops early once every target has its best
+    candidates (see _MatchCollector) or the time budget runs out.
+    Returns ({target: [candidate, ...]} best first, complete). Each candidate has
+    folder/exe/mtime_ns/size; complete is False if the time budget (or an error) cut the
+    search short, so a better candidate may have been missed.
+    """
+    roots = get_default_roots() if roots is None else list(roots)
+    targets = targets or DEFAULT_TARGETS
+    max_depth = constants.INSTALL_DISCOVERY_MAX_DEPTH if max_depth is None else max_depth
+    deadline = time.monotonic() + (time_budget or constants.INSTALL_DISCOVERY_TIME_BUDGET)
+    exe_lookup = {exe.lower(): target for target, exes in targets.items() for exe in exes}
+
+    collector = _MatchCollector(targets)
+    if roots:
+        workers = max(1, min(max_workers or constants.INSTALL_DISCOVERY_MAX_WORKERS, len(roots)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="install-discovery") as executor:
+            for i, root in enumerate(roots):
+                executor.submit(_walk_root, i, root, exe_lookup, max_depth, deadline, collector)
+    return _rank_candidates(collector.matches, targets), collector.is_complete(len(roots))
+
+
+# --- Cache (stat-based invalidation) ---
+
+def _stat_signature(path):
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+
+def load_cached_installations(roots, targets=None, cache_path=None):
+    """
+    Returns the cached discovery results, or None if the cache is missing or stale.
+    The cache is stale if the roots differ, a root folder's mtime changed (something was
+    added or removed directly inside it) or any cached executable changed or vanished.
+    """
+    targets = targets or DEFAULT_TARGETS
+    cache_path = cache_path or constants.INSTALL_DISCOVERY_CACHE_FILE_PATH
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get("version") != constants.INSTALL_DISCOVERY_CACHE_VERSION or \
+       cache.get("targets") != {t: list(exes) for t, exes in targets.items()}:
+        return None
+    cached_roots = cache.get("roots", [])
+    if [entry[0] for entry in cached_roots] != list(roots):
+        return None
+    for root, signature in cached_roots:
+        if _stat_signature(root) != signature:
+            return None
+    results = cache.get("results", {})
+    for candidates in results.values():
+        for candidate in candidates:
+            if _stat_signature(candidate["exe"]) != [candidate["mtime_ns"], candidate["size"]]:
+                return None
+    return results
+
+
+def save_cached_installations(roots, results, targets=None, cache_path=None):
+    targets = targets or DEFAULT_TARGETS
+    cache_path = cache_path or constants.INSTALL_DISCOVERY_CACHE_FILE_PATH
+    cache = {
+        "version": constants.INSTALL_DISCOVERY_CACHE_VERSION,
+        "targets": {t: list(exes) for t, exes in targets.items()},
+        "roots": [[root, _stat_signature(root)] for root in roots],
+        "results": results,
+    }
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+        return True
+    except OSError as e:
+        structured_log.warning(f"Could not write installation cache {cache_path}: {e}")
+        return False
+
+
+def get_installations(roots=None, targets=None, cache_path=None, use_cache=True, **search_options):
+    """
+    Cached front end for discover_installations. Only a complete search that found something
+    is cached; a truncated or empty result is searched again next time.
+    Returns (results, from_cache).
+    """
+    roots = get_default_roots() if roots is None else list(roots)
+    if use_cache:
+        cached = load_cached_installations(roots, targets, cache_path)
+        if cached is not None:
+            return cached, True
+    results, complete = discover_installations(roots, targets, **search_options)
+    if not complete:
+        structured_log.info("Installation search hit its time budget; results not cached.")
+    elif any(results.values()):
+        save_cached_installations(roots, results, targets, cache_path)
+    return results, False
@@ -0,0 +1,184 @@
+import bisect
+import json
+import math
+import os
+import struct
+import threading
+import time
+from array import array
+
+from . import constants
+from . import structured_log
+
+# One fixed-width little-endian record per action total or step:
+# timestamp, run id, action name id, step name id (STEP_TOTAL for the whole action), seconds, ok
+RECORD = struct.Struct("<dIHhfB3x")
+STEP_TOTAL = -1
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending sequence."""
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyHistory:
+    """
+    Append-only binary history of action durations. Each run appends one total record
+    and one record per step (see tracing.child_spans) to a file of fixed-width records;
+    action/step names are interned in a small JSON sidecar. When the file grows past
+    max_records it is compacted to the last keep_runs runs of each action, so disk and
+    memory use stay bounded. Thread-safe.
+    """
+    def __init__(self, path=None, names_path=None, max_records=None, keep_runs=None):
+        self.path = path or constants.LATENCY_HISTORY_FILE_PATH
+        self.names_path = names_path or constants.LATENCY_NAMES_FILE_PATH
+        self.max_records = max_records or constants.LATENCY_HISTORY_MAX_RECORDS
+        self.keep_runs = keep_runs or constants.LATENCY_HISTORY_KEEP_RUNS
+        self._lock = threading.Lock()
+        self._names = self._load_names()
+        self._name_index = {name: i for i, name in enumerate(self._names)}
+        self._record_count, self._next_run_id, self._torn_tail = self._scan_tail()
+
+    # --- Names ---
+
+    def _load_names(self):
+        try:
+            with open(self.names_path, 'r', encoding='utf-8') as f:
+                names = json.load(f)
+            return names if isinstance(names, list) else []
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            structured_log.warning(f"Could not read latency names {self.names_path}: {e}")
+            return []
+
+    def _name_id(self, name):
+        name_id = self._name_index.get(name)
+        if name_id is None:
+            name_id = len(self._names)
+            self._names.append(name)
+            self._name_index[name] = name_id
+            os.makedirs(os.path.dirname(self.names_path) or ".", exist_ok=True)
+            tmp_path = f"{self.names_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._names, f)
+            os.replace(tmp_path, self.names_path)
+        return name_id
+
+    # --- Records ---
+
+    def _scan_tail(self):
+        """Returns (record count, next run id, whether the file ends in a torn record) from the file size and its last record."""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                count, torn = size // RECORD.size, size % RECORD.size != 0
+                if not count:
+                    return 0, 0, torn
+                f.seek((count - 1) * RECORD.size)
+                last = RECORD.unpack(f.read(RECORD.size))
+                return count, last[1] + 1, torn
+        except FileNotFoundError:
+            return 0, 0, False
+
+    def _read_records(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return iter(())
+        usable = len(data) - len(data) % RECORD.size # Ignore a torn last record
+        return RECORD.iter_unpack(memoryview(data)[:usable])
+
+    def append_run(self, action, total_seconds, steps=(), ok=True, timestamp=None):
+        """Appends one run: its total and [(step name, seconds)]. Raises OSError."""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            run_id = self._next_run_id
+            action_id = self._name_id(action)
+            records = [RECORD.pack(timestamp, run_id, action_id, STEP_TOTAL, total_seconds, ok)]
+            records.extend(RECORD.pack(timestamp, run_id, action_id, self._name_id(step), seconds, ok)
+                           for step, seconds in steps)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, 'ab') as f:
+                if self._torn_tail:
+                    # Drop the partial record an interrupted write left, or every later record would be misaligned
+                    f.truncate(self._record_count * RECORD.size)
+                    self._torn_tail = False
+                f.write(b"".join(records))
+            self._next_run_id += 1
+            self._record_count += len(records)
+            if self._record_count > self.max_records:
+                self._compact_locked()
+
+    def compact(self):
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """Rewrites the file (temp file + rename) keeping the last keep_runs runs per action."""
+        records = list(self._read_records())
+        cutoff = self._run_cutoffs((record[1], record[2]) for record in records if record[3] == STEP_TOTAL)
+        kept = [record for record in records if record[1] >= cutoff.get(record[2], 0)]
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(b"".join(RECORD.pack(*record) for record in kept))
+        os.replace(tmp_path, self.path)
+        self._record_count = len(kept)
+        structured_log.info(f"Compacted latency history: kept {len(kept)} of {len(records)} record(s).")
+
+    def _run_cutoffs(self, totals, last_runs=None):
+        """{action id: lowest run id among that action's last runs} from (run id, action id) totals."""
+        last_runs = last_runs or self.keep_runs
+        runs_by_action = {}
+        for run_id, action_id in totals:
+            runs_by_action.setdefault(action_id, array('I')).append(run_id)
+        return {action_id: runs[-last_runs] if len(runs) >= last_runs else runs[0]
+                for action_id, runs in runs_by_action.items()}
+
+    # --- Statistics ---
+
+    def compute_stats(self, last_runs=None):
+        """
+        p50/p95/max per action and per step over each action's last `last_runs` runs,
+        from a single pass over the file. Returns rows sorted by action then step:
+        {action, step (None for the total), runs, p50, p95, max} with times in seconds.
+        """
+        last_runs = last_runs or constants.LATENCY_STATS_RUNS
+        with self._lock:
+            records = self._read_records()
+            # One pass: group (run id, seconds) by (action, step) in compact arrays
+            run_ids = {}
+            durations = {}
+            totals = []
+            for _ts, run_id, action_id, step_id, seconds, _ok in records:
+                key = (action_id, step_id)
+                if key not in durations:
+                    run_ids[key] = array('I')
+                    durations[key] = array('f')
+                run_ids[key].append(run_id)
+                durations[key].append(seconds)
+                if step_id == STEP_TOTAL:
+                    totals.append((run_id, action_id))
+            cutoffs = self._run_cutoffs(totals, last_runs)
+            names = list(self._names)
+
+        rows = []
+        for (action_id, step_id), values in durations.items():
+            ids = run_ids[(action_id, step_id)]
+            cutoff = cutoffs.get(action_id, 0)
+            recent = sorted(values[bisect.bisect_left(ids, cutoff):]) # Run ids are appended in order
+            if not recent:
+                continue
+            rows.append({
+                "action": names[action_id] if action_id < len(names) else str(action_id),
+                "step": None if step_id == STEP_TOTAL else (names[step_id] if step_id < len(names) else str(step_id)),
+                "runs": len(recent),
+                "p50": _percentile(recent, 50),
+                "p95": _percentile(recent, 95),
+                "max": recent[-1],
+            })
+        rows.sort(key=lambda row: (row["action"], row["step"] is not None, row["step"] or ""))
+        return rows
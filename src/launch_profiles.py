@@ -0,0 +1,264 @@
+import os
+import re
+import threading
+
+from . import constants
+from . import metrics
+from . import osu_config
+from . import platform_backend
+from . import structured_log
+from . import tracing
+from . import utils
+
+DRIVER_OTD = "otd"
+DRIVER_WACOM = "wacom"
+DRIVER_UNCHANGED = "unchanged"
+RESOLUTION_NATIVE = "native"
+_RESOLUTION_PATTERN = re.compile(r"^\s*(\d+)\s*x\s*(\d+)\s*(?:@\s*(\d+)\s*(?:hz)?)?\s*$", re.IGNORECASE)
+_BOOLEANS = {"1": True, "yes": True, "true": True, "on": True, "0": False, "no": False, "false": False, "off": False}
+
+
+class ProfileError(ValueError):
+    """A profile is malformed, or cannot run with the current paths/display."""
+
+
+class LaunchProfile:
+    """
+    A named combination of driver, display mode, process priority and prefetch from config.ini.
+    The display mode is session-scoped unless mode_change is persistent.
+    """
+    __slots__ = ("name", "driver", "resolution", "refresh_rate", "priority", "prefetch", "launch_osu", "mode_change")
+
+    def __init__(self, name, driver=DRIVER_UNCHANGED, resolution=None, refresh_rate=None, priority=None,
+                 prefetch=False, launch_osu=True, mode_change=constants.MODE_CHANGE_SESSION):
+        self.name = name
+        self.driver = driver
+        self.resolution = resolution # None (unchanged), RESOLUTION_NATIVE or (width, height)
+        self.refresh_rate = refresh_rate
+        self.priority = priority
+        self.prefetch = prefetch
+        self.launch_osu = launch_osu
+        self.mode_change = mode_change
+
+    def key(self):
+        return (self.name, self.driver, self.resolution, self.refresh_rate, self.priority, self.prefetch, self.launch_osu,
+                self.mode_change)
+
+
+def parse_profile(name, values):
+    """LaunchProfile from a [Profile: name] section's {key: value}. Raises ProfileError."""
+    values = {key.lower(): value.strip() for key, value in values.items()}
+    def get(key):
+        return values.get(key.lower()) or None
+
+    driver = (get(constants.CONFIG_KEY_PROFILE_DRIVER) or DRIVER_UNCHANGED).lower()
+    if driver not in (DRIVER_OTD, DRIVER_WACOM, DRIVER_UNCHANGED):
+        raise ProfileError(f"Driver must be otd, wacom or unchanged, not '{driver}'.")
+
+    resolution = get(constants.CONFIG_KEY_PROFILE_RESOLUTION)
+    refresh_rate = get(constants.CONFIG_KEY_PROFILE_REFRESH_RATE)
+    if resolution and resolution.lower() == RESOLUTION_NATIVE:
+        resolution = RESOLUTION_NATIVE
+    elif resolution:
+        match = _RESOLUTION_PATTERN.match(resolution)
+        if not match or not int(match.group(1)) or not int(match.group(2)):
+            raise ProfileError(f"Resolution must look like 1280x960, 1280x960@240 or native, not '{resolution}'.")
+        resolution = (int(match.group(1)), int(match.group(2)))
+        refresh_rate = refresh_rate or match.group(3)
+    if refresh_rate is not None:
+        if not str(refresh_rate).isdigit() or not int(refresh_rate):
+            raise ProfileError(f"RefreshRate must be a positive number, not '{refresh_rate}'.")
+        if resolution is None:
+            raise ProfileError("RefreshRate needs a Resolution.")
+        refresh_rate = int(refresh_rate)
+
+    priority = (get(constants.CONFIG_KEY_PROFILE_PRIORITY) or "normal").lower()
+    if priority not in platform_backend.PRIORITY_CLASSES:
+        raise ProfileError(f"Priority must be one of {', '.join(platform_backend.PRIORITY_CLASSES)}, not '{priority}'.")
+
+    mode_change = (get(constants.CONFIG_KEY_PROFILE_MODE_CHANGE) or constants.MODE_CHANGE_SESSION).lower()
+    if mode_change not in (constants.MODE_CHANGE_SESSION, constants.MODE_CHANGE_PERSISTENT):
+        raise ProfileError(f"ModeChange must be session or persistent, not '{mode_change}'.")
+
+    flags = {}
+    for key, default in ((constants.CONFIG_KEY_PROFILE_PREFETCH, False), (constants.CONFIG_KEY_PROFILE_LAUNCH_OSU, True)):
+        value = get(key)
+        if value is not None and value.lower() not in _BOOLEANS:
+            raise ProfileError(f"{key} must be true or false, not '{value}'.")
+        flags[key] = default if value is None else _BOOLEANS[value.lower()]
+
+    return LaunchProfile(name, driver, resolution, refresh_rate, priority,
+                         flags[constants.CONFIG_KEY_PROFILE_PREFETCH], flags[constants.CONFIG_KEY_PROFILE_LAUNCH_OSU],
+                         mode_change)
+
+
+def load_profiles(sections):
+    """{name: LaunchProfile} from config_manager.get_launch_profiles(); invalid profiles are logged and skipped."""
+    profiles = {}
+    for name, values in sections.items():
+        try:
+            profiles[name] = parse_profile(name, values)
+        except ProfileError as e:
+            structured_log.warning(f"Ignoring launch profile '{name}': {e}")
+    return profiles
+
+
+# --- Execution Plans ---
+
+class ExecutionPlan:
+    """
+    A validated profile: its steps with executables, working directories and display mode
+    already resolved, so running it does no path lookups or mode checks.
+    Steps are (kind, args) tuples run in order by execute_plan().
+    """
+    __slots__ = ("name", "steps", "prefetch_paths")
+
+    def __init__(self, name, steps, prefetch_paths):
+        self.name = name
+        self.steps = steps
+        self.prefetch_paths = prefetch_paths
+
+    def describe(self):
+        labels = {
+            "disable_wacom": lambda: "disable Wacom",
+            "enable_wacom": lambda: "enable Wacom",
+            "launch_otd": lambda exe, wd: "launch OTD",
+            "wait": lambda seconds: f"wait {seconds}s",
+            "set_mode": lambda w, h, hz, temporary: f"{w}x{h}" + (f"@{hz}Hz" if hz else "") + (" until exit" if temporary else ""),
+            "sync_osu_config": lambda osu_dir, w, h: "write mode to osu! config",
+            "launch_osu": lambda exe, wd, priority: "launch osu!" + (f" ({priority} priority)" if priority != "normal" else ""),
+        }
+        steps = [labels[kind](*args) for kind, args in self.steps]
+        if self.prefetch_paths:
+            steps.insert(0, f"prefetch {len(self.prefetch_paths)} file(s)")
+        return " -> ".join(steps) or "nothing to do"
+
+
+@tracing.traced(cat=tracing.CAT_APP)
+def compile_profile(profile, osu_dir, otd_dir, native_resolution, sync_osu_config=False):
+    """
+    Validates a profile against the current paths and display and resolves its steps.
+    sync_osu_config adds a step writing the target mode into the osu! cfg. Raises ProfileError.
+    """
+    steps = []
+    target_mode = (None, None) # Desktop mode at run time unless the profile sets one
+    needs_osu = profile.launch_osu or profile.prefetch
+    if needs_osu and not utils.is_valid_osu_path(osu_dir):
+        raise ProfileError(f"Profile '{profile.name}' needs a valid osu! folder.")
+
+    if profile.driver == DRIVER_OTD:
+        otd_exe = utils.get_otd_executable_path(otd_dir)
+        if not otd_exe:
+            raise ProfileError(f"Profile '{profile.name}' needs a valid OpenTabletDriver folder.")
+        steps.append(("disable_wacom", ()))
+        steps.append(("launch_otd", (otd_exe, otd_dir)))
+        if profile.launch_osu:
+            steps.append(("wait", (constants.OTD_STARTUP_WAIT,)))
+    elif profile.driver == DRIVER_WACOM:
+        steps.append(("enable_wacom", ()))
+
+    if profile.resolution is not None:
+        if profile.resolution == RESOLUTION_NATIVE:
+            if not all(native_resolution):
+                raise ProfileError(f"Profile '{profile.name}' uses the native resolution, which is not known yet.")
+            width, height = native_resolution
+        else:
+            width, height = profile.resolution
+        modes = utils.list_display_modes()
+        if not any((w, h) == (width, height) and profile.refresh_rate in (None, hz) for w, h, hz in modes):
+            mode = f"{width}x{height}" + (f"@{profile.refresh_rate}Hz" if profile.refresh_rate else "")
+            raise ProfileError(f"Profile '{profile.name}': display mode {mode} is not supported by this display.")
+        steps.append(("set_mode", (width, height, profile.refresh_rate, profile.mode_change == constants.MODE_CHANGE_SESSION)))
+        target_mode = (width, height)
+
+    prefetch_paths = []
+    if profile.prefetch:
+        prefetch_paths = [path for path in (os.path.join(osu_dir, name) for name in constants.PREFETCH_FILES)
+                          if os.path.isfile(path)]
+    if profile.launch_osu and sync_osu_config:
+        steps.append(("sync_osu_config", (osu_dir,) + target_mode))
+    if profile.launch_osu:
+        steps.append(("launch_osu", (os.path.join(osu_dir, constants.OSU_EXECUTABLE), osu_dir, profile.priority)))
+    return ExecutionPlan(profile.name, steps, prefetch_paths)
+
+
+class PlanCache:
+    """
+    Compiled plans keyed by everything they were validated against (the profile's
+    settings, both folders, the native resolution if used and whether the osu! config is
+    synced), so a profile is compiled once and recompiled only when one of those inputs
+    changes or a run fails. Thread-safe.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plans = {} # profile name -> (inputs key, plan)
+
+    @staticmethod
+    def _inputs(profile, osu_dir, otd_dir, native_resolution, sync_osu_config):
+        return (profile.key(), osu_dir, otd_dir,
+                tuple(native_resolution) if profile.resolution == RESOLUTION_NATIVE else None, sync_osu_config)
+
+    def get(self, profile, osu_dir, otd_dir, native_resolution, sync_osu_config=False):
+        """Returns (plan, True if it came from the cache). Raises ProfileError."""
+        inputs = self._inputs(profile, osu_dir, otd_dir, native_resolution, sync_osu_config)
+        with self._lock:
+            cached = self._plans.get(profile.name)
+        if cached is not None and cached[0] == inputs:
+            return cached[1], True
+        plan = compile_profile(profile, osu_dir, otd_dir, native_resolution, sync_osu_config)
+        with self._lock:
+            self._plans[profile.name] = (inputs, plan)
+        return plan, False
+
+    def invalidate(self, name=None):
+        """Drops one profile's plan (or all) so the next run revalidates it."""
+        with self._lock:
+            if name is None:
+                self._plans.clear()
+            else:
+                self._plans.pop(name, None)
+
+
+def execute_plan(plan, status_callback=None):
+    """Runs a plan's steps. status_callback(message, step, total) reports progress. Raises Exception on failure."""
+    def status(message, step):
+        if status_callback:
+            status_callback(message, step, len(plan.steps))
+
+    if plan.prefetch_paths:
+        # Overlaps with the driver switch; the game launch does not wait for it
+        threading.Thread(target=utils.prefetch_files, args=(plan.prefetch_paths,), name="prefetch", daemon=True).start()
+
+    for step, (kind, args) in enumerate(plan.steps, 1):
+        if kind == "disable_wacom":
+            status(constants.STATUS_DISABLING_WACOM, step)
+            if not utils.disable_wacom_drivers(): raise Exception("Wacom driver disable failed.")
+        elif kind == "enable_wacom":
+            status(constants.STATUS_ENABLING_WACOM, step)
+            if not utils.enable_wacom_drivers(): raise Exception("Wacom driver enable sequence failed.")
+        elif kind == "launch_otd":
+            status(constants.STATUS_LAUNCHING_OTD, step)
+            otd_exe, otd_dir = args
+            if utils.launch_process_standard(otd_exe, working_directory=otd_dir):
+                metrics.set_driver_state("otd")
+            else:
+                structured_log.warning("Failed to request OpenTabletDriver launch as standard user (continuing...).")
+        elif kind == "wait":
+            with tracing.span("wait for OpenTabletDriver", tracing.CAT_APP):
+                utils.wait(*args)
+        elif kind == "set_mode":
+            width, height, refresh_rate, temporary = args
+            status(constants.STATUS_SETTING_RES.format(width, height), step)
+            if utils.set_resolution(width, height, refresh_rate, temporary) is False:
+                raise Exception(f"Could not set display mode {width}x{height}.")
+        elif kind == "sync_osu_config":
+            osu_dir, width, height = args
+            if width is None:
+                width, height = utils.get_current_resolution()
+            if width and height:
+                osu_config.sync_resolution(osu_dir, width, height)
+        elif kind == "launch_osu":
+            status(constants.STATUS_LAUNCHING_OSU, step)
+            osu_exe, osu_dir, priority = args
+            if not utils.launch_process(osu_exe, working_directory=osu_dir, priority=priority):
+                raise Exception("osu! launch failed.")
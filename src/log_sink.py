@@ -0,0 +1,47 @@
+import itertools
+import time
+from collections import deque
+
+
+class LogSink:
+    """
+    Bounded, thread-safe buffer between log producers and the log view.
+    Any thread may append(); if producers outrun the UI the oldest pending lines are
+    dropped instead of growing without limit. append() takes no lock: it only does a
+    deque append and bumps an itertools.count, both atomic under the GIL. Only the UI
+    thread calls drain(), which works out the drops as appended - drained - still pending.
+    """
+    def __init__(self, max_pending):
+        self._pending = deque(maxlen=max_pending)
+        self._appended = itertools.count() # next() is atomic, unlike += on an int
+        self._counter_reads = 0 # next() calls made by drain(), not appends
+        self._accounted = 0 # Entries drained or reported dropped so far
+
+    def append(self, message, level="INFO", action=None):
+        self._pending.append((time.time(), level, action, message))
+        next(self._appended) # Counted after the append, so drain() can only undercount
+
+    def _unaccounted(self):
+        # Read the counter before the length: an append racing this call makes the
+        # result too small (reported on a later drain), never too large
+        appended = next(self._appended) - self._counter_reads
+        self._counter_reads += 1
+        return appended - self._accounted - len(self._pending)
+
+    def has_pending(self):
+        """True if there are entries to drain or drops not yet reported. UI thread only."""
+        return bool(self._pending) or self._unaccounted() > 0
+
+    def drain(self, max_items=None):
+        """
+        Pops up to max_items pending entries (all if None).
+        Returns (entries, dropped): entries are (timestamp, level, action, message) tuples;
+        dropped is how many older entries the ring buffer discarded since the previous drain.
+        """
+        pending = self._pending
+        count = len(pending) if max_items is None else min(max_items, len(pending))
+        entries = [pending.popleft() for _ in range(count)]
+        self._accounted += count
+        dropped = max(0, self._unaccounted())
+        self._accounted += dropped
+        return entries, dropped
@@ -0,0 +1,249 @@
+import abc
+import bisect
+import glob
+import heapq
+import json
+import os
+import time
+from array import array
+
+from . import constants
+from . import structured_log
+
+NO_ACTION = -1 # Action id of entries logged outside any action
+_LEVEL_NAMES = {code: name for name, code in structured_log.LEVELS.items()}
+
+
+def format_entry(entry):
+    """(timestamp, level, action, message) -> one display line."""
+    ts, level, _action, message = entry
+    return f"[{time.strftime('%H:%M:%S', time.localtime(ts))} {level}] {message}"
+
+
+# --- Index (shared by the session store and log files) ---
+
+class _LogIndex(abc.ABC):
+    """
+    Columnar index over log entries. Entry ids are absolute (they survive trimming
+    the oldest entries); per-entry timestamp, level code and action id live in arrays,
+    with sorted posting lists of ids per level and per action so filters only visit
+    the entries they can match. Subclasses provide the message text.
+    """
+    def __init__(self):
+        self.first_id = 0
+        self._timestamps = array('d')
+        self._levels = array('b')
+        self._actions = array('i')
+        self._by_level = {}   # level code -> array('q') of ids
+        self._by_action = {}  # action id -> array('q') of ids
+        self._action_names = []
+        self._action_index = {}
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    @property
+    def end_id(self):
+        return self.first_id + len(self._timestamps)
+
+    def actions(self):
+        """Names of actions that still have entries, in first-seen order."""
+        return [self._action_names[a] for a, ids in self._by_action.items() if ids]
+
+    def last_timestamp(self):
+        return self._timestamps[-1] if self._timestamps else None
+
+    def _index_entry(self, ts, level, action):
+        entry_id = self.end_id
+        if self._timestamps and ts < self._timestamps[-1]:
+            ts = self._timestamps[-1] # Keep timestamps sorted for bisect (producers race by microseconds)
+        level_code = structured_log.LEVELS[structured_log.normalize_level(level)]
+        if action:
+            action_id = self._action_index.get(action)
+            if action_id is None:
+                action_id = len(self._action_names)
+                self._action_names.append(action)
+                self._action_index[action] = action_id
+            self._by_action.setdefault(action_id, array('q')).append(entry_id)
+        else:
+            action_id = NO_ACTION
+        self._timestamps.append(ts)
+        self._levels.append(level_code)
+        self._actions.append(action_id)
+        self._by_level.setdefault(level_code, array('q')).append(entry_id)
+        return entry_id
+
+    def _drop_oldest(self, count):
+        del self._timestamps[:count]
+        del self._levels[:count]
+        del self._actions[:count]
+        self.first_id += count
+        for postings in list(self._by_level.values()) + list(self._by_action.values()):
+            del postings[:bisect.bisect_left(postings, self.first_id)]
+
+    def query(self, min_level=None, action=None, text=None, since=None, start_id=None):
+        """
+        Ids of entries at or above min_level, from action, containing text
+        (case-insensitive) and logged at or after since, in order.
+        start_id restricts the search to newer entries (for extending a view).
+        """
+        first_id = self.first_id
+        low = max(first_id, start_id or 0)
+        if since is not None:
+            low = max(low, first_id + bisect.bisect_left(self._timestamps, since))
+        min_code = structured_log.LEVELS[structured_log.normalize_level(min_level)] if min_level else None
+
+        if action is not None:
+            postings = self._by_action.get(self._action_index.get(action), array('q'))
+            ids = postings[bisect.bisect_left(postings, low):]
+            if min_code is not None:
+                levels = self._levels
+                ids = (i for i in ids if levels[i - first_id] >= min_code)
+        elif min_code is not None:
+            lists = [postings[bisect.bisect_left(postings, low):]
+                     for code, postings in self._by_level.items() if code >= min_code]
+            ids = lists[0] if len(lists) == 1 else heapq.merge(*lists)
+        else:
+            ids = range(low, self.end_id)
+
+        if text:
+            ids = self._filter_text(ids, text.lower())
+        return array('q', ids)
+
+    def narrow(self, ids, text):
+        """Subset of ids (e.g. a previous query result) whose message contains text."""
+        return array('q', self._filter_text(ids, text.lower()))
+
+    def entry(self, entry_id):
+        """(timestamp, level, action, message) for an id at or after first_id."""
+        i = entry_id - self.first_id
+        action_id = self._actions[i]
+        return (self._timestamps[i], _LEVEL_NAMES[self._levels[i]],
+                self._action_names[action_id] if action_id != NO_ACTION else None, self._message(entry_id))
+
+    @abc.abstractmethod
+    def _message(self, entry_id):
+        """Message text of an id at or after first_id."""
+
+    @abc.abstractmethod
+    def _filter_text(self, ids, needle):
+        """The ids (in order) whose lowercased message contains needle."""
+
+
+# --- Current Session ---
+
+class LogStore(_LogIndex):
+    """
+    In-memory entries of the running session, capped at max_entries (the oldest are
+    trimmed in chunks so trimming stays amortized O(1) per entry).
+    Multi-line messages are stored as one entry per line so every entry is one display row.
+    UI thread only.
+    """
+    def __init__(self, max_entries):
+        super().__init__()
+        self.max_entries = max_entries
+        self._messages = []
+        self._lowered = [] # Lowercased messages for case-insensitive search
+
+    def extend(self, entries):
+        """Adds (timestamp, level, action, message) entries. Returns True if old entries were trimmed."""
+        for ts, level, action, message in entries:
+            for line in str(message).rstrip("\n").split("\n"):
+                self._index_entry(ts, level, action)
+                self._messages.append(line)
+                self._lowered.append(line.lower())
+        excess = len(self._messages) - self.max_entries
+        if excess > max(1, self.max_entries // 10):
+            del self._messages[:excess]
+            del self._lowered[:excess]
+            self._drop_oldest(excess)
+            return True
+        return False
+
+    def _message(self, entry_id):
+        return self._messages[entry_id - self.first_id]
+
+    def _filter_text(self, ids, needle):
+        lowered = self._lowered
+        first_id = self.first_id
+        return (i for i in ids if needle in lowered[i - first_id])
+
+
+# --- Previous Sessions (log files) ---
+
+class LogFileReader(_LogIndex):
+    """
+    Read-only view of a structured log file. build() streams the file once and keeps
+    only the index columns plus each record's byte offset; messages are read back on
+    demand (a few visible rows at a time, or streamed when searching), so large files
+    are never held in memory.
+    """
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._offsets = array('q')
+        self._cache = {}
+
+    def build(self):
+        """Indexes the file. Lines that are not valid records are skipped. Raises OSError."""
+        offset = 0
+        with open(self.path, 'rb') as f:
+            for raw in f:
+                line_offset = offset
+                offset += len(raw)
+                try:
+                    record = json.loads(raw)
+                    ts = float(record.get("ts", 0))
+                except (ValueError, TypeError, AttributeError):
+                    continue
+                self._index_entry(ts, record.get("level", "INFO"), record.get("action"))
+                self._offsets.append(line_offset)
+        return self
+
+    def _read_line(self, f, entry_id):
+        f.seek(self._offsets[entry_id - self.first_id])
+        return f.readline()
+
+    @staticmethod
+    def _parse_message(raw):
+        try:
+            return str(json.loads(raw).get("msg", ""))
+        except (ValueError, AttributeError):
+            return ""
+
+    def _message(self, entry_id):
+        message = self._cache.get(entry_id)
+        if message is None:
+            with open(self.path, 'rb') as f:
+                message = self._parse_message(self._read_line(f, entry_id)).replace("\n", " | ")
+            if len(self._cache) >= constants.LOG_VIEW_FILE_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[entry_id] = message
+        return message
+
+    def _filter_text(self, ids, needle):
+        # Only plain ASCII needles can be pre-checked on the raw JSON line (escaping, non-ASCII case folding)
+        plain = needle.isascii() and not any(c in needle for c in '"\\')
+        needle_bytes = needle.encode("ascii") if plain else b""
+        matches = []
+        with open(self.path, 'rb') as f:
+            for entry_id in ids:
+                raw = self._read_line(f, entry_id)
+                # Cheap byte check first; only candidate lines are decoded
+                if needle_bytes in raw.lower() and needle in self._parse_message(raw).lower():
+                    matches.append(entry_id)
+        return matches
+
+
+def list_log_files(path=None):
+    """The structured log file and its rotated backups that exist, newest first."""
+    path = path or structured_log.get_log_path()
+    base, ext = os.path.splitext(path)
+    rotated = glob.glob(glob.escape(base) + ".*" + ext)
+    numbered = []
+    for candidate in rotated:
+        number = candidate[len(base) + 1:-len(ext) or None]
+        if number.isdigit():
+            numbered.append((int(number), candidate))
+    files = [path] if os.path.exists(path) else []
+    return files + [candidate for _number, candidate in sorted(numbered)]
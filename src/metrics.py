@@ -0,0 +1,218 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import constants
+from . import structured_log
+
+# One lock for all series: updates are a few additions, so it is never held for long
+_lock = threading.Lock()
+
+
+class _Metric:
+    """
+    A Prometheus metric whose label combinations are allocated up front (unknown ones
+    are added on first use). Each series is a small list updated in place, so recording
+    is a dict lookup plus an addition.
+    """
+    kind = None
+
+    def __init__(self, name, help_text, label_names=(), label_values=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._series = {}
+        for values in label_values or ([()] if not label_names else []):
+            self._series[tuple(values)] = self._new_series()
+
+    def _new_series(self):
+        return [0.0]
+
+    def _slot(self, labels):
+        slot = self._series.get(labels)
+        if slot is None:
+            with _lock:
+                slot = self._series.setdefault(labels, self._new_series())
+        return slot
+
+    def _format_labels(self, values, extra=()):
+        pairs = list(zip(self.label_names, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with _lock:
+            series = [(values, list(slot)) for values, slot in sorted(self._series.items())]
+        for values, slot in series:
+            lines.extend(self._render_series(values, slot))
+        return lines
+
+    def _render_series(self, values, slot):
+        return [f"{self.name}{self._format_labels(values)} {_format_value(slot[0])}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels=(), amount=1):
+        slot = self._slot(labels)
+        with _lock:
+            slot[0] += amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, labels=()):
+        self._slot(labels)[0] = value # A single store needs no lock
+
+
+class Histogram(_Metric):
+    """Cumulative buckets, sum and count per series: [bucket counts..., +Inf count, sum]."""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets, label_names=(), label_values=()):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help_text, label_names, label_values)
+
+    def _new_series(self):
+        return [0.0] * (len(self.buckets) + 2)
+
+    def observe(self, value, labels=()):
+        slot = self._slot(labels)
+        index = bisect.bisect_left(self.buckets, value) # le semantics: value <= bound
+        with _lock:
+            slot[index] += 1
+            slot[-1] += value
+
+    def _render_series(self, values, slot):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), slot):
+            cumulative += count
+            le = bound if bound == "+Inf" else _format_value(bound)
+            lines.append(f"{self.name}_bucket{self._format_labels(values, [('le', le)])} {_format_value(cumulative)}")
+        lines.append(f"{self.name}_sum{self._format_labels(values)} {_format_value(slot[-1])}")
+        lines.append(f"{self.name}_count{self._format_labels(values)} {_format_value(cumulative)}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# --- Metrics ---
+
+_ACTIONS = ("run_osu_with_otd", "run_osu_only", "run_otd_only", "enable_wacom", "downscale_resolution",
+            "restore_resolution", "go_to_osu_folder", "run_profile", "config_export", "config_compare",
+            "config_audit")
+_PROGRAMS = ("taskkill", "net", "timeout", "runas", "launch", "other")
+_STEPS = ("run_command", "disable_wacom_drivers", "enable_wacom_drivers", "launch_process",
+          "launch_process_standard", "get_native_resolution", "set_resolution")
+DRIVER_STATES = ("unknown", "wacom", "none", "otd") # none: Wacom stopped, OTD not (yet) launched
+_EXPORT_RESULTS = ("done", "up_to_date", "error")
+
+ACTIONS_TOTAL = Counter("osu_launch_tool_actions_total", "Actions run, by result.", ("action", "result"),
+                        [(action, result) for action in _ACTIONS for result in ("ok", "error")])
+ACTION_DURATION = Histogram("osu_launch_tool_action_duration_seconds", "Action duration in seconds.",
+                            constants.METRICS_DURATION_BUCKETS, ("action",), [(action,) for action in _ACTIONS])
+PROCESSES_SPAWNED = Counter("osu_launch_tool_processes_spawned_total",
+                            "Processes started (driver commands via run_command and launches).",
+                            ("program",), [(program,) for program in _PROGRAMS])
+STEP_FAILURES = Counter("osu_launch_tool_step_failures_total", "Failed driver, launch and display steps.",
+                        ("step",), [(step,) for step in _STEPS])
+DRIVER_STATE = Gauge("osu_launch_tool_driver_state", "Tablet driver state (1 for the current state).",
+                     ("state",), [(state,) for state in DRIVER_STATES])
+DISPLAY_RESOLUTION = Gauge("osu_launch_tool_display_resolution_pixels", "Primary display resolution (0 if unknown).",
+                           ("kind", "axis"), [(kind, axis) for kind in ("current", "native") for axis in ("width", "height")])
+CONFIG_EXPORTS = Counter("osu_launch_tool_config_exports_total", "Config export runs.")
+CONFIG_EXPORT_FILES = Counter("osu_launch_tool_config_export_files_total", "Config files exported, by result.",
+                              ("result",), [(result,) for result in _EXPORT_RESULTS])
+
+REGISTRY = (ACTIONS_TOTAL, ACTION_DURATION, PROCESSES_SPAWNED, STEP_FAILURES, DRIVER_STATE, DISPLAY_RESOLUTION,
+            CONFIG_EXPORTS, CONFIG_EXPORT_FILES)
+DRIVER_STATE.set(1, ("unknown",))
+
+
+# --- Recording helpers ---
+
+def observe_action(action, seconds, ok):
+    ACTIONS_TOTAL.inc((action, "ok" if ok else "error"))
+    ACTION_DURATION.observe(seconds, (action,))
+
+
+def process_spawned(program):
+    PROCESSES_SPAWNED.inc((program if program in _PROGRAMS else "other",))
+
+
+def step_failed(step):
+    STEP_FAILURES.inc((step,))
+
+
+def set_driver_state(state):
+    for name in DRIVER_STATES:
+        DRIVER_STATE.set(1 if name == state else 0, (name,))
+
+
+def set_resolution(kind, width, height):
+    DISPLAY_RESOLUTION.set(width or 0, (kind, "width"))
+    DISPLAY_RESOLUTION.set(height or 0, (kind, "height"))
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- HTTP Endpoint ---
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        structured_log.debug(f"Metrics request from {self.client_address[0]}: {format % args}")
+
+
+_server = None
+
+
+def start_server(port=None, host=None):
+    """
+    Serves GET /metrics on host:port (localhost by default) from a daemon thread.
+    Port 0 picks a free port. Returns the bound port. Raises OSError (e.g. port in use).
+    """
+    global _server
+    if _server is not None:
+        return _server.server_address[1]
+    server = ThreadingHTTPServer((host or constants.METRICS_HOST, constants.METRICS_PORT if port is None else port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    _server = server
+    structured_log.info(f"Metrics endpoint listening on http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    return server.server_address[1]
+
+
+def stop_server():
+    global _server
+    server, _server = _server, None
+    if server is not None:
+        server.shutdown()
+        server.server_close()
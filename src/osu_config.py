@@ -0,0 +1,85 @@
+import getpass
+import os
+import re
+
+from . import config_discovery
+from . import structured_log
+from . import tracing
+
+RESOLUTION_KEYS = (b"Width", b"Height", b"WidthFullscreen", b"HeightFullscreen")
+# "Key = value" at the start of a line; the value runs up to the line ending, which is kept
+_KEY_LINE = re.compile(rb"^([ \t]*(" + b"|".join(RESOLUTION_KEYS) + rb")[ \t]*=[ \t]*)([^\r\n]*)", re.MULTILINE)
+
+
+def set_resolution_keys(data, width, height):
+    """
+    Returns data (a cfg file's bytes) with Width/WidthFullscreen set to width and
+    Height/HeightFullscreen set to height. Every other byte is kept as it was; keys that
+    are missing are appended with the file's line ending.
+    """
+    values = {b"Width": width, b"WidthFullscreen": width, b"Height": height, b"HeightFullscreen": height}
+    found = set()
+
+    def replace(match):
+        found.add(match.group(2))
+        return match.group(1) + str(values[match.group(2)]).encode("ascii")
+
+    data = _KEY_LINE.sub(replace, data)
+    missing = [key for key in RESOLUTION_KEYS if key not in found]
+    if missing:
+        newline = b"\r\n" if b"\r\n" in data else b"\n"
+        if data and not data.endswith((b"\n", b"\r")):
+            data += newline
+        data += b"".join(key + b" = " + str(values[key]).encode("ascii") + newline for key in missing)
+    return data
+
+
+def write_atomic(path, data):
+    """Replaces path with data via a temporary file in the same folder, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def get_target_configs(osu_dir, config_names=None):
+    """
+    Paths of the cfg files osu! reads for this Windows user: [osu!.<user>.cfg], or [] if it
+    does not exist (other users' configs are never touched). config_names comes from a
+    ConfigIndex snapshot if available. Raises OSError if the folder cannot be listed.
+    """
+    names = config_discovery.scan_user_configs(osu_dir) if config_names is None else config_names
+    user_name = f"osu!.{getpass.getuser()}.cfg".lower()
+    return [os.path.join(osu_dir, name) for name in names if name.lower() == user_name]
+
+
+@tracing.traced(cat=tracing.CAT_FILE)
+def sync_resolution(osu_dir, width, height, config_names=None):
+    """
+    Writes width x height into the user's osu! cfg (see get_target_configs) so the game
+    starts in the desktop's mode instead of switching again. Returns the number of files
+    changed; unreadable files are logged and skipped.
+    """
+    try:
+        paths = get_target_configs(osu_dir, config_names)
+    except OSError as e:
+        structured_log.warning(f"Could not list osu! configs in {osu_dir}: {e}")
+        return 0
+    if not paths:
+        structured_log.info(f"No osu!.{getpass.getuser()}.cfg in {osu_dir}; skipping the resolution sync "
+                            "(osu! will pick its own resolution).")
+    changed = 0
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            updated = set_resolution_keys(data, width, height)
+            if updated != data:
+                write_atomic(path, updated)
+                changed += 1
+                structured_log.info(f"Set {os.path.basename(path)} resolution to {width}x{height}")
+        except OSError as e:
+            structured_log.warning(f"Could not update resolution in {path}: {e}")
+    return changed
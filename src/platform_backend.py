@@ -0,0 +1,267 @@
+import os
+import re
+import subprocess
+import threading
+import time
+from types import SimpleNamespace
+
+# Win32 values used by utils (same numbers as win32con, so callers need not import it)
+ENUM_CURRENT_SETTINGS = -1
+ENUM_REGISTRY_SETTINGS = -2
+CDS_FULLSCREEN = 0x00000004 # Temporary mode: not saved, undone when the process exits or the user logs off
+DM_PELSWIDTH = 0x00080000
+DM_PELSHEIGHT = 0x00100000
+DM_DISPLAYFREQUENCY = 0x00400000
+DISP_CHANGE_SUCCESSFUL = 0
+DISP_CHANGE_RESTART = 1
+DISP_CHANGE_FAILED = -1
+DISP_CHANGE_BADMODE = -2
+PRIORITY_CLASSES = {"normal": 0x00000020, "above_normal": 0x00008000, "high": 0x00000080}
+
+
+class BackendError(Exception):
+    """A platform call failed (wraps pywintypes.error / OSError on Windows)."""
+
+
+# --- Windows ---
+
+class WindowsBackend:
+    """
+    The real thing: subprocess without console windows, win32api display calls and
+    shell32 for elevation. pywin32 is imported on first use, so this module (and utils)
+    can be imported on any platform.
+    """
+    name = "windows"
+
+    def is_admin(self):
+        import ctypes
+        return ctypes.windll.shell32.IsUserAnAdmin() != 0 # AttributeError off Windows
+
+    def shell_execute_runas(self, executable, params):
+        """Relaunches elevated via UAC. Returns (ShellExecute result, last error)."""
+        import ctypes
+        ret = ctypes.windll.shell32.ShellExecuteW(None, "runas", executable, params, None, 1)
+        return ret, ctypes.get_last_error()
+
+    def run(self, command_parts, capture_output=False, check=False, timeout=None):
+        # Use CREATE_NO_WINDOW to prevent console window flashes
+        return subprocess.run(command_parts, shell=True, capture_output=capture_output, text=True,
+                              check=check, timeout=timeout, creationflags=subprocess.CREATE_NO_WINDOW)
+
+    def popen(self, command, cwd=None, shell=False, priority=None):
+        """Starts a process; priority is a PRIORITY_CLASSES name (None: inherit)."""
+        creationflags = subprocess.CREATE_NO_WINDOW | PRIORITY_CLASSES.get(priority, 0)
+        return subprocess.Popen(command, cwd=cwd, shell=shell, creationflags=creationflags)
+
+    def open_folder(self, path):
+        os.startfile(path) # Opens folder in explorer
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def enum_display_settings(self, mode):
+        """DEVMODE of the primary display for a mode index or ENUM_CURRENT_SETTINGS."""
+        import pywintypes
+        import win32api
+        try:
+            # None gets settings for the primary display adapter
+            return win32api.EnumDisplaySettings(None, mode)
+        except pywintypes.error as e:
+            raise BackendError(str(e)) from e
+
+    def change_display_settings(self, devmode, flags=0):
+        import pywintypes
+        import win32api
+        try:
+            return win32api.ChangeDisplaySettings(devmode, flags)
+        except pywintypes.error as e:
+            raise BackendError(str(e)) from e
+
+    def reset_display_settings(self):
+        """Returns to the mode saved in the registry (ChangeDisplaySettings(NULL, 0))."""
+        import pywintypes
+        import win32api
+        try:
+            return win32api.ChangeDisplaySettings(None, 0)
+        except pywintypes.error as e:
+            raise BackendError(str(e)) from e
+
+
+# --- Simulator ---
+
+_TIMEOUT_SECONDS = re.compile(r"/t\s+(\d+)", re.IGNORECASE)
+
+
+class SimulatedBackend:
+    """
+    Deterministic stand-in for Windows used by the benchmarks: models services,
+    processes and display modes, and advances a virtual clock instead of sleeping.
+
+    latencies maps an operation to the simulated seconds it costs: "run", "popen",
+    "enum_display_settings", "change_display_settings", "open_folder", or a specific
+    command line such as "net stop WTabletServicePro" (which wins over "run").
+    failures maps the same keys to an exception instance (raised) or, for commands
+    and display changes, an int (returned as the return code / result).
+    registry_mode is the saved desktop mode that reset_display_settings returns to
+    (default: current_mode); changes never update it, as the app never saves modes.
+    Counters: spawned (processes started), calls (per operation) and elapsed (virtual seconds).
+    """
+    name = "simulated"
+
+    DEFAULT_LATENCIES = {
+        "run": 0.040, "popen": 0.030, "open_folder": 0.020,
+        "enum_display_settings": 0.0005, "change_display_settings": 0.800, "reset_display_settings": 0.800,
+    }
+    DEFAULT_MODES = [(w, h, hz) for w, h in ((800, 600), (1024, 768), (1280, 720), (1280, 1024),
+                                              (1366, 768), (1600, 900), (1920, 1080))
+                     for hz in (60, 144)]
+
+    def __init__(self, latencies=None, failures=None, admin=True, services=None, processes=None,
+                 display_modes=None, current_mode=None, registry_mode=None):
+        self.latencies = dict(self.DEFAULT_LATENCIES, **(latencies or {}))
+        self.failures = dict(failures or {})
+        self.admin = admin
+        self.services = dict(services if services is not None else
+                             {"WTabletServicePro": True, "WTabletServiceCon": False})
+        self.processes = set(processes if processes is not None else {"Wacom_Tablet.exe", "WacomDesktopCenter.exe"})
+        self.display_modes = list(display_modes or self.DEFAULT_MODES)
+        self.current_mode = tuple(current_mode or self.display_modes[-1])
+        self.registry_mode = tuple(registry_mode or self.current_mode)
+        self.elapsed = 0.0
+        self.spawned = 0
+        self.calls = {}
+        self._next_pid = 1000
+        self._lock = threading.Lock() # Export and other workers may call in from several threads
+
+    def _enter(self, operation, key=None):
+        """Counts the call, charges its latency and returns an injected failure (or None)."""
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            self.elapsed += self.latencies.get(key, self.latencies.get(operation, 0.0))
+        failure = self.failures.get(key, self.failures.get(operation))
+        if isinstance(failure, BaseException):
+            raise failure
+        return failure
+
+    def is_admin(self):
+        self._enter("is_admin")
+        return self.admin
+
+    def shell_execute_runas(self, executable, params):
+        failure = self._enter("shell_execute_runas")
+        return (failure, 1223) if failure is not None else (42, 0)
+
+    def run(self, command_parts, capture_output=False, check=False, timeout=None):
+        command_line = " ".join(command_parts)
+        failure = self._enter("run", command_line)
+        with self._lock:
+            self.spawned += 1
+            returncode, output = self._simulate_command(command_parts) if failure is None else (failure, "")
+        if check and returncode != 0:
+            raise subprocess.CalledProcessError(returncode, command_parts, output, "")
+        return subprocess.CompletedProcess(command_parts, returncode, output if capture_output else None,
+                                           "" if capture_output else None)
+
+    def _simulate_command(self, command_parts):
+        """(return code, stdout) of taskkill / net / sc query / timeout against the modelled state (lock held)."""
+        program = command_parts[0].lower()
+        args = command_parts[1:]
+        if program == "sc" and len(args) == 2 and args[0].lower() == "query":
+            if args[1] not in self.services:
+                return 1060, f"[SC] EnumQueryServicesStatus:OpenService FAILED 1060:\n" # Service does not exist
+            state = "4  RUNNING" if self.services[args[1]] else "1  STOPPED"
+            return 0, f"\nSERVICE_NAME: {args[1]}\n        TYPE               : 10  WIN32_OWN_PROCESS\n        STATE              : {state}\n"
+        return self._simulate_returncode(program, args), ""
+
+    def _simulate_returncode(self, program, args):
+        if program == "taskkill":
+            name = args[-1]
+            if name in self.processes:
+                self.processes.discard(name)
+                return 0
+            return 128 # Process not found
+        if program == "net" and len(args) == 2:
+            verb, service = args[0].lower(), args[1]
+            if service not in self.services:
+                return 2
+            running = self.services[service]
+            if verb == "stop":
+                self.services[service] = False
+                return 0 if running else 2
+            if verb == "start":
+                self.services[service] = True
+                return 0 if not running else 2
+        if program == "timeout":
+            match = _TIMEOUT_SECONDS.search(" ".join(args))
+            self.elapsed += int(match.group(1)) if match else 0
+            return 0
+        return 1
+
+    def popen(self, command, cwd=None, shell=False, priority=None):
+        self._enter("popen")
+        with self._lock:
+            self.spawned += 1
+            self._next_pid += 1
+            pid = self._next_pid
+            target = command[-1] if isinstance(command, (list, tuple)) else command
+            self.processes.add(os.path.basename(target.strip('"')))
+        return SimpleNamespace(pid=pid, args=command, cwd=cwd, priority=priority)
+
+    def open_folder(self, path):
+        self._enter("open_folder")
+        if not os.path.isdir(path):
+            raise FileNotFoundError(path)
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.elapsed += seconds
+
+    def enum_display_settings(self, mode):
+        self._enter("enum_display_settings")
+        if mode == ENUM_CURRENT_SETTINGS:
+            width, height, hz = self.current_mode
+        elif mode == ENUM_REGISTRY_SETTINGS:
+            width, height, hz = self.registry_mode
+        elif 0 <= mode < len(self.display_modes):
+            width, height, hz = self.display_modes[mode]
+        else:
+            raise BackendError(f"EnumDisplaySettings: no mode {mode}")
+        return SimpleNamespace(PelsWidth=width, PelsHeight=height, DisplayFrequency=hz, BitsPerPel=32, Fields=0)
+
+    def change_display_settings(self, devmode, flags=0):
+        failure = self._enter("change_display_settings")
+        if failure is not None:
+            return failure
+        with self._lock:
+            rates = [hz for width, height, hz in self.display_modes
+                     if (width, height) == (devmode.PelsWidth, devmode.PelsHeight) and
+                     (not devmode.Fields & DM_DISPLAYFREQUENCY or hz == devmode.DisplayFrequency)]
+            if rates:
+                hz = self.current_mode[2] if self.current_mode[2] in rates else rates[0]
+                self.current_mode = (devmode.PelsWidth, devmode.PelsHeight, hz)
+                return DISP_CHANGE_SUCCESSFUL
+        return DISP_CHANGE_BADMODE
+
+    def reset_display_settings(self):
+        failure = self._enter("reset_display_settings")
+        if failure is not None:
+            return failure
+        with self._lock:
+            self.current_mode = self.registry_mode
+        return DISP_CHANGE_SUCCESSFUL
+
+
+# --- Selection ---
+
+_backend = WindowsBackend()
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(backend):
+    """Swaps the backend used by utils (e.g. a SimulatedBackend in benchmarks). Returns the previous one."""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
@@ -0,0 +1,178 @@
+import ipaddress
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from . import constants
+from . import structured_log
+
+
+def is_url(location):
+    return location.lower().startswith(("http://", "https://"))
+
+
+def _is_loopback_url(location):
+    host = urllib.parse.urlsplit(location).hostname or ""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class SharedConfigSource:
+    """
+    A shared baseline config (a file path, e.g. on a network share, or an http(s) URL)
+    held in a local cache. cached_text() only reads the cache, so startup never waits
+    for the network; refresh() revalidates the cache (mtime/size for files,
+    ETag/Last-Modified for URLs) and downloads the baseline only when it changed.
+    Thread-safe.
+    """
+    def __init__(self, location, cache_path=None, timeout=None):
+        self.location = location
+        self.cache_path = cache_path or constants.SHARED_CONFIG_CACHE_FILE_PATH
+        self.timeout = timeout or constants.SHARED_CONFIG_TIMEOUT
+        self._lock = threading.Lock()
+        self._cache = None # Loaded lazily: {version, location, text, etag, last_modified, mtime_ns, size, fetched_at}
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- Cache ---
+
+    def _load_cache(self):
+        if self._cache is None:
+            cache = {}
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                structured_log.warning(f"Could not read shared config cache {self.cache_path}: {e}")
+            if cache.get("version") != constants.SHARED_CONFIG_CACHE_VERSION or cache.get("location") != self.location:
+                cache = {}
+            self._cache = cache
+        return self._cache
+
+    def _save_cache(self, cache):
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            structured_log.warning(f"Could not write shared config cache {self.cache_path}: {e}")
+
+    def cached_text(self):
+        """The last fetched baseline, or None if it was never fetched. Never touches the source."""
+        with self._lock:
+            return self._load_cache().get("text")
+
+    # --- Revalidation ---
+
+    def _fetch_file(self, cache):
+        st = os.stat(self.location)
+        if cache.get("mtime_ns") == st.st_mtime_ns and cache.get("size") == st.st_size:
+            return None
+        with open(self.location, 'rb') as f:
+            data = f.read()
+        return {"text": data.decode("utf-8-sig"), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+    def _fetch_url(self, cache):
+        headers = {}
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+        request = urllib.request.Request(self.location, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = response.read(constants.SHARED_CONFIG_MAX_BYTES + 1)
+                etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and "text" in cache:
+                return None
+            raise
+        if len(data) > constants.SHARED_CONFIG_MAX_BYTES:
+            raise ValueError(f"baseline is larger than {constants.SHARED_CONFIG_MAX_BYTES} bytes")
+        return {"text": data.decode("utf-8-sig"), "etag": etag, "last_modified": last_modified}
+
+    def refresh(self):
+        """
+        Revalidates the cached baseline against the source. Returns True if the baseline
+        changed. If the source is unreachable the cached copy is kept (logged, returns False).
+        """
+        with self._lock:
+            cache = dict(self._load_cache())
+        try:
+            fetched = self._fetch_url(cache) if is_url(self.location) else self._fetch_file(cache)
+        except (OSError, ValueError) as e: # URLError and timeouts are OSErrors
+            age = f"cached copy from {time.ctime(cache['fetched_at'])}" if "fetched_at" in cache else "no cached copy"
+            structured_log.warning(f"Shared config {self.location} is unavailable ({e}); using {age}.")
+            return False
+        if fetched is None:
+            structured_log.debug(f"Shared config {self.location} is unchanged.")
+            return False
+        changed = fetched["text"] != cache.get("text")
+        cache = {"version": constants.SHARED_CONFIG_CACHE_VERSION, "location": self.location,
+                 "fetched_at": time.time(), **fetched}
+        with self._lock:
+            self._cache = cache
+        self._save_cache(cache)
+        if changed:
+            structured_log.info(f"Shared config updated from {self.location}", event="shared_config_updated",
+                                location=self.location)
+        return changed
+
+    # --- Background refresh ---
+
+    def start(self, interval=None, on_change=None):
+        """Refreshes now and then every interval seconds (0: only once) from a daemon thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(interval or 0, on_change),
+                                        name="shared-config", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, interval, on_change):
+        while True:
+            if self.refresh() and on_change:
+                try:
+                    on_change()
+                except Exception as e:
+                    structured_log.exception(f"Shared config change callback failed: {e}")
+            if not interval or self._stop.wait(interval):
+                return
+
+
+_source = None
+_source_lock = threading.Lock()
+_refused_locations = set()
+
+
+def get_source(location):
+    """
+    The SharedConfigSource for location (one per process), or None if location is empty
+    or a plain http URL to another machine (http is only accepted for loopback hosts).
+    """
+    global _source
+    if not location:
+        return None
+    if is_url(location) and not location.lower().startswith("https://") and not _is_loopback_url(location):
+        if location not in _refused_locations:
+            _refused_locations.add(location)
+            structured_log.warning(f"Ignoring shared config {location}: URLs to other machines must use https.")
+        return None
+    with _source_lock:
+        if _source is None or _source.location != location:
+            _source = SharedConfigSource(location)
+        return _source
@@ -0,0 +1,122 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+
+from . import constants
+from . import structured_log
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _stall_site(stack):
+    """file:line (function) of the innermost frame in this app's own code, else the innermost frame."""
+    app_frames = [frame for frame in stack
+                  if os.path.abspath(frame.filename).startswith(_APP_ROOT) and "site-packages" not in frame.filename]
+    frame = (app_frames or stack)[-1]
+    filename = os.path.relpath(frame.filename, _APP_ROOT) if app_frames else os.path.basename(frame.filename)
+    return f"{filename}:{frame.lineno} ({frame.name})"
+
+
+class StallWatchdog:
+    """
+    Detects UI-thread stalls. The UI thread calls beat() from its after() loop every
+    interval_ms; a monitor thread checks how late the next beat is. Once a beat is
+    threshold_ms overdue the monitor captures the UI thread's stack (sys._current_frames)
+    once per stall and logs it; when the UI thread beats again the stall's total duration
+    goes into a histogram. Sites (innermost app frame) are counted so freezes can be
+    traced to specific code.
+    """
+    def __init__(self, ui_thread_id, interval_ms, threshold_ms, buckets_ms=None, max_reports=None):
+        self.ui_thread_id = ui_thread_id
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.buckets_ms = tuple(buckets_ms or constants.STALL_HISTOGRAM_BUCKETS_MS)
+        self._counts = [0] * (len(self.buckets_ms) + 1) # Last bucket: above the largest bound
+        self._sites = Counter()
+        self._reports = deque(maxlen=max_reports or constants.STALL_MAX_REPORTS)
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._captured_beat = None # _last_beat value of the stall whose stack was captured
+        self._ignore_beat = None # Beat preceding a system pause (sleep/hibernate), not a stall
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- UI thread ---
+
+    def beat(self):
+        if self._thread is None:
+            return # Not started: beats during startup (e.g. App.__init__ flushing the UI) would read as a stall
+        now = time.monotonic()
+        last_beat, self._last_beat = self._last_beat, now
+        late = now - last_beat - self.interval
+        if late < self.threshold or last_beat == self._ignore_beat:
+            return
+        duration_ms = (now - last_beat) * 1000
+        with self._lock:
+            self._counts[self._bucket(duration_ms)] += 1
+            report = self._reports[-1] if self._reports and last_beat == self._captured_beat else None
+            if report is not None:
+                report["duration_ms"] = round(duration_ms)
+        structured_log.warning(f"UI thread was unresponsive for {duration_ms:.0f} ms.", event="ui_stall_end",
+                               duration_ms=round(duration_ms), site=report["site"] if report else None)
+
+    def _bucket(self, duration_ms):
+        for i, bound in enumerate(self.buckets_ms):
+            if duration_ms <= bound:
+                return i
+        return len(self.buckets_ms)
+
+    # --- Monitor thread ---
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._last_beat = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="ui-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        check_interval = min(self.threshold / 4, constants.STALL_CHECK_INTERVAL)
+        previous_check = time.monotonic()
+        while not self._stop.wait(check_interval):
+            now = time.monotonic()
+            last_beat = self._last_beat
+            if now - previous_check > self.threshold + check_interval:
+                # The monitor itself was paused (system sleep): the UI thread did not stall
+                self._ignore_beat = last_beat
+            elif (now - last_beat - self.interval >= self.threshold and
+                  last_beat not in (self._captured_beat, self._ignore_beat)):
+                self._capture(last_beat, now)
+            previous_check = now
+
+    def _capture(self, last_beat, now):
+        frame = sys._current_frames().get(self.ui_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        del frame
+        site = _stall_site(stack)
+        stack_text = "".join(stack.format())
+        with self._lock:
+            self._captured_beat = last_beat
+            self._sites[site] += 1
+            self._reports.append({"time": time.time(), "site": site, "duration_ms": None, "stack": stack_text})
+        structured_log.warning(f"UI thread stalled for {(now - last_beat) * 1000:.0f} ms at {site}",
+                               event="ui_stall", site=site, stack=stack_text)
+
+    # --- Report ---
+
+    def stats(self):
+        """{stalls, histogram [(label, count)], sites [(site, count)], reports [newest first]}."""
+        with self._lock:
+            counts = list(self._counts)
+            sites = self._sites.most_common()
+            reports = [dict(report) for report in reversed(self._reports)]
+        labels = [f"<= {bound} ms" for bound in self.buckets_ms] + [f"> {self.buckets_ms[-1]} ms"]
+        return {"stalls": sum(counts), "histogram": list(zip(labels, counts)), "sites": sites, "reports": reports}
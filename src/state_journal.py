@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+import time
+
+from . import constants
+from . import structured_log
+
+KIND_DISPLAY = "display" # prev: {"width", "height", "refresh_rate"}
+KIND_DRIVER = "driver" # prev: "wacom" (the Wacom services were running before they were stopped)
+
+
+class StateJournal:
+    """
+    Append-only journal of system changes made by the app, so a crash or power loss
+    never leaves the machine changed without a record of how to undo it.
+    Before a mutation, begin() appends the state it replaces; once that state is back,
+    commit() appends a commit record. Each record is one JSON line, fsynced before the
+    mutation runs; a torn last line is ignored. Only the first change of a kind is
+    recorded until it is committed (it holds the original state). Thread-safe.
+    """
+    def __init__(self, path=None):
+        self.path = path or constants.STATE_JOURNAL_FILE_PATH
+        self._lock = threading.Lock()
+        self._open = {} # kind -> begin record
+        self._next_id = 1
+        self._replay()
+
+    def _replay(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            structured_log.warning(f"Could not read state journal {self.path}: {e}")
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+                self._next_id = max(self._next_id, record["id"] + 1)
+                if record["op"] == "begin":
+                    self._open.setdefault(record["kind"], record)
+                elif record["op"] == "commit" and self._open.get(record["kind"], {}).get("id") == record["id"]:
+                    del self._open[record["kind"]]
+            except (ValueError, KeyError, TypeError):
+                structured_log.warning(f"Skipping damaged state journal record: {line.strip()[:80]}")
+        if len(lines) > len(self._open):
+            self._compact()
+
+    def _compact(self):
+        """Rewrites the journal with only the open records."""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(record) + "\n" for record in self._open.values())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            structured_log.warning(f"Could not compact state journal {self.path}: {e}")
+
+    def _append(self, record):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def begin(self, kind, prev):
+        """
+        Records the state a change of kind is about to replace. Returns True if recorded,
+        False if a change of kind is already open (or the journal could not be written).
+        """
+        with self._lock:
+            if kind in self._open:
+                return False
+            record = {"op": "begin", "id": self._next_id, "kind": kind, "prev": prev, "time": time.time()}
+            try:
+                self._append(record)
+            except OSError as e:
+                structured_log.warning(f"Could not write state journal {self.path}: {e}")
+                return False
+            self._next_id += 1
+            self._open[kind] = record
+            return True
+
+    def commit(self, kind):
+        """Marks the open change of kind as undone (its previous state is back)."""
+        with self._lock:
+            record = self._open.pop(kind, None)
+            if record is None:
+                return
+            try:
+                self._append({"op": "commit", "id": record["id"], "kind": kind, "time": time.time()})
+            except OSError as e:
+                structured_log.warning(f"Could not write state journal {self.path}: {e}")
+            if not self._open:
+                self._compact()
+
+    def get_open(self, kind):
+        with self._lock:
+            record = self._open.get(kind)
+            return dict(record) if record else None
+
+    def open_entries(self):
+        """Open begin records, oldest first."""
+        with self._lock:
+            return sorted((dict(record) for record in self._open.values()), key=lambda record: record["id"])
+
+
+def describe(record):
+    """"display mode 1920x1080@144Hz" / "Wacom driver" for a begin record."""
+    if record["kind"] == KIND_DISPLAY:
+        prev = record["prev"]
+        return f"display mode {prev['width']}x{prev['height']}" + (f"@{prev['refresh_rate']}Hz" if prev.get("refresh_rate") else "")
+    return "Wacom driver"
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = StateJournal()
+        return _journal
+
+
+def set_journal(journal):
+    global _journal
+    with _journal_lock:
+        _journal = journal
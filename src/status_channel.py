@@ -0,0 +1,57 @@
+import threading
+import time
+
+from . import constants
+
+
+class StatusChannel:
+    """
+    Thread-safe, coalescing mailbox for the status bar. Any thread may publish();
+    only the latest status is kept, and the UI thread picks it up at most once per
+    frame with take_changed(), so workers never touch Tk and never force a redraw.
+    An optional step/total and the elapsed time of the running task are appended.
+    """
+    def __init__(self, message=""):
+        self._lock = threading.Lock()
+        self._message = message
+        self._step = None
+        self._total = None
+        self._started = None # monotonic start of the running task, if any
+        self._rendered = None # Last text handed to the UI
+
+    def publish(self, message, step=None, total=None):
+        with self._lock:
+            self._message = message
+            self._step = step
+            self._total = total
+
+    def get_message(self):
+        with self._lock:
+            return self._message
+
+    def start_timer(self):
+        with self._lock:
+            self._started = time.monotonic()
+
+    def stop_timer(self):
+        with self._lock:
+            self._started = None
+
+    def format(self):
+        """The status text: message plus "(step n/m, 1.2s)" where applicable."""
+        with self._lock:
+            message, step, total, started = self._message, self._step, self._total, self._started
+        details = []
+        if step is not None and total:
+            details.append(constants.STATUS_STEP_FORMAT.format(step, total))
+        if started is not None:
+            details.append(constants.STATUS_ELAPSED_FORMAT.format(time.monotonic() - started))
+        return f"{message} ({', '.join(details)})" if details else message
+
+    def take_changed(self):
+        """Returns the status text if it differs from the last one taken, else None (UI thread)."""
+        text = self.format()
+        if text == self._rendered:
+            return None
+        self._rendered = text
+        return text
@@ -0,0 +1,263 @@
+import atexit
+import contextlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+
+from . import constants
+
+# Level names as used by the GUI log; WARNING is accepted as an alias of WARN
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
+_LEVEL_ALIASES = {"WARNING": "WARN"}
+_STOP = object()
+_context = threading.local() # Per-thread action name (see action_scope)
+
+
+def normalize_level(level):
+    level = str(level).upper()
+    level = _LEVEL_ALIASES.get(level, level)
+    return level if level in LEVELS else "INFO"
+
+
+def current_action():
+    """Name of the action the calling thread is running, or None."""
+    return getattr(_context, "action", None)
+
+
+@contextlib.contextmanager
+def action_scope(name):
+    """Tags every record logged by this thread inside the block with action=name."""
+    previous = current_action()
+    _context.action = name
+    try:
+        yield
+    finally:
+        _context.action = previous
+
+
+def get_rotated_path(path, number):
+    """osu-launch-tool.jsonl -> osu-launch-tool.<number>.jsonl"""
+    base, ext = os.path.splitext(path)
+    return f"{base}.{number}{ext}"
+
+
+class StructuredLog:
+    """
+    JSON-lines diagnostics log with a background writer thread.
+    log() only builds a dict and puts it on a bounded queue (never touches the disk and
+    never blocks; records are counted and dropped if the writer falls behind). The writer
+    batches records, rotates the file by size and age, and echoes each message to stdout
+    when a console is attached. Records logged before start() are kept until it runs.
+    """
+    def __init__(self, path=None, level=None, max_bytes=None, rotate_seconds=None, backup_count=None):
+        self.path = path or os.path.join(constants.LOG_FILE_DIR, constants.LOG_FILE_NAME)
+        self.min_level = LEVELS[normalize_level(level or constants.LOG_FILE_LEVEL)]
+        self.max_bytes = max_bytes or constants.LOG_FILE_MAX_BYTES
+        self.rotate_seconds = rotate_seconds or constants.LOG_FILE_ROTATE_SECONDS
+        self.backup_count = constants.LOG_FILE_BACKUP_COUNT if backup_count is None else backup_count
+        self.echo = True
+        self._queue = queue.Queue(maxsize=constants.LOG_FILE_QUEUE_SIZE)
+        self._dropped = 0
+        self._dropped_lock = threading.Lock() # Only taken when the queue is full
+        self._thread = None
+        self._file = None
+        self._size = 0
+        self._opened_at = 0.0
+
+    # --- Producer side (any thread) ---
+
+    def set_level(self, level):
+        self.min_level = LEVELS[normalize_level(level)]
+
+    def is_enabled(self, level):
+        return LEVELS[normalize_level(level)] >= self.min_level
+
+    def log(self, message, level="INFO", **fields):
+        level = normalize_level(level)
+        if LEVELS[level] < self.min_level:
+            return
+        record = {"ts": round(time.time(), 3), "level": level, "thread": threading.current_thread().name,
+                  "msg": str(message)}
+        action = current_action()
+        if action:
+            record["action"] = action
+        if fields:
+            record.update(fields)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += 1
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout=2.0):
+        """Flushes queued records and stops the writer (called automatically at exit)."""
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+        self._thread = None
+
+    # --- Writer thread ---
+
+    def _run(self):
+        running = True
+        while running:
+            try:
+                batch = [self._queue.get(timeout=constants.LOG_FILE_FLUSH_INTERVAL)]
+            except queue.Empty:
+                continue
+            while len(batch) < constants.LOG_FILE_MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                running = False
+                batch = [record for record in batch if record is not _STOP]
+            self._write_batch(batch)
+        self._close()
+
+    def _write_batch(self, records):
+        if self._dropped:
+            with self._dropped_lock:
+                dropped, self._dropped = self._dropped, 0
+            records.append({"ts": round(time.time(), 3), "level": "WARN", "thread": "log-writer",
+                            "msg": f"{dropped} log record(s) dropped (log queue full)."})
+        if not records:
+            return
+        if self.echo and sys.stdout is not None:
+            try:
+                for record in records:
+                    print(record["msg"])
+            except (OSError, ValueError):
+                self.echo = False # No usable console (windowed build)
+        data = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records)
+        encoded = data.encode("utf-8")
+        try:
+            self._ensure_open(len(encoded))
+            self._file.write(encoded)
+            self._file.flush()
+            self._size += len(encoded)
+        except OSError as e:
+            self._report_error(f"Could not write log file {self.path}: {e}")
+            self._close()
+
+    def _ensure_open(self, incoming_bytes):
+        now = time.time()
+        if self._file is not None:
+            too_big = self._size > 0 and self._size + incoming_bytes > self.max_bytes
+            too_old = now - self._opened_at > self.rotate_seconds
+            if not (too_big or too_old):
+                return
+            self._close()
+            self._rotate()
+        else:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            try:
+                st = os.stat(self.path)
+                # Left over from an earlier run: start a new file if it is already full or stale
+                if st.st_size >= self.max_bytes or now - st.st_mtime > self.rotate_seconds:
+                    self._rotate()
+            except FileNotFoundError:
+                pass
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        self._opened_at = now
+
+    def _rotate(self):
+        """Shifts path -> path.1 -> path.2 ... keeping backup_count old files."""
+        try:
+            if self.backup_count <= 0:
+                os.remove(self.path)
+                return
+            for number in range(self.backup_count - 1, 0, -1):
+                source = get_rotated_path(self.path, number)
+                if os.path.exists(source):
+                    os.replace(source, get_rotated_path(self.path, number + 1))
+            os.replace(self.path, get_rotated_path(self.path, 1))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # E.g. another instance still has the file open on Windows; keep appending
+            self._report_error(f"Could not rotate log file {self.path}: {e}")
+
+    def _close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _report_error(self, message):
+        if sys.stderr is not None:
+            try:
+                print(message, file=sys.stderr)
+            except (OSError, ValueError):
+                pass
+
+
+# --- Module-level logger ---
+
+_log = StructuredLog()
+
+
+def start(level=None, echo=True):
+    """
+    Starts the background writer; call once at startup (records logged earlier are kept).
+    echo=False writes the file only (no stdout copy).
+    """
+    if level:
+        _log.set_level(level)
+    _log.echo = echo
+    _log.start()
+
+
+def stop(timeout=2.0):
+    _log.stop(timeout)
+
+
+def get_log_path():
+    return _log.path
+
+
+def log(message, level="INFO", **fields):
+    _log.log(message, level, **fields)
+
+
+def debug(message, **fields):
+    _log.log(message, "DEBUG", **fields)
+
+
+def info(message, **fields):
+    _log.log(message, "INFO", **fields)
+
+
+def warning(message, **fields):
+    _log.log(message, "WARN", **fields)
+
+
+def error(message, **fields):
+    _log.log(message, "ERROR", **fields)
+
+
+def exception(message, **fields):
+    """Logs an ERROR with the traceback of the exception being handled."""
+    _log.log(message, "ERROR", traceback=traceback.format_exc(), **fields)
@@ -0,0 +1,191 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from . import constants
+
+# Categories (shown as "cat" in the trace viewer)
+CAT_ACTION = "action"
+CAT_COMMAND = "command"
+CAT_DISPLAY = "display"
+CAT_FILE = "file"
+CAT_EXPORT = "export"
+CAT_APP = "app"
+
+
+class _Span:
+    """A timed block; recorded as a Chrome trace "complete" event when it exits."""
+    __slots__ = ("tracer", "name", "cat", "args", "start_ns", "end_ns", "thread_id")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.end_ns = None
+        self.thread_id = None
+
+    def set(self, **args):
+        """Attaches extra arguments (e.g. a return code) before the span ends."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        self.thread_id = threading.get_ident()
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer.record(self.name, self.cat, self.start_ns, self.end_ns, self.args)
+        return False
+
+
+class _NullSpan:
+    """Returned while tracing is disabled: entering, setting and exiting do nothing."""
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Collects spans from any thread into a bounded ring buffer (deque appends are atomic,
+    so recording takes no lock). Actions additionally record their time window so the
+    last N actions can be exported with every span that ran during them, including
+    spans from worker threads. Spans nest by time per thread, as Chrome traces expect.
+    """
+    def __init__(self, enabled=True, max_events=None, max_actions=None):
+        self.enabled = enabled
+        self._events = deque(maxlen=max_events or constants.TRACE_MAX_EVENTS)
+        self._actions = deque(maxlen=max_actions or constants.TRACE_MAX_ACTIONS)
+        self._thread_names = {}
+
+    def span(self, name, cat=CAT_APP, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def record(self, name, cat, start_ns, end_ns, args):
+        thread = threading.current_thread()
+        self._thread_names[thread.ident] = thread.name
+        self._events.append((name, cat, start_ns, end_ns, thread.ident, args))
+        if cat == CAT_ACTION:
+            self._actions.append((name, start_ns, end_ns))
+
+    def action_count(self):
+        return len(self._actions)
+
+    def child_spans(self, parent):
+        """
+        The top-level steps of a finished span: spans its own thread ran inside it that
+        are not nested in another such span. Returns [(name, seconds)] in start order.
+        """
+        if not isinstance(parent, _Span) or parent.end_ns is None:
+            return []
+        inside = sorted((event for event in list(self._events)
+                         if event[4] == parent.thread_id and parent.start_ns <= event[2] and
+                         event[3] <= parent.end_ns and event[2:4] != (parent.start_ns, parent.end_ns)),
+                        key=lambda event: (event[2], -event[3]))
+        steps = []
+        covered_until = parent.start_ns
+        for name, _cat, start_ns, end_ns, _tid, _args in inside:
+            if start_ns >= covered_until:
+                steps.append((name, (end_ns - start_ns) / 1e9))
+                covered_until = end_ns
+        return steps
+
+    def build_chrome_trace(self, last_actions=None):
+        """
+        Chrome trace / Perfetto JSON (a dict) with the spans of the last `last_actions`
+        actions (all buffered spans if None).
+        """
+        events = list(self._events)
+        if last_actions is not None:
+            windows = list(self._actions)[-last_actions:] if last_actions > 0 else []
+            events = [event for event in events
+                      if any(start <= event[2] <= end for _name, start, end in windows)]
+        pid = os.getpid()
+        trace_events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": constants.APP_NAME}}
+        ]
+        for tid in sorted({event[4] for event in events}):
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                                 "args": {"name": self._thread_names.get(tid, str(tid))}})
+        for name, cat, start_ns, end_ns, tid, args in events:
+            trace_events.append({"name": name, "cat": cat, "ph": "X", "pid": pid, "tid": tid,
+                                 "ts": start_ns / 1000, "dur": (end_ns - start_ns) / 1000, "args": args})
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms",
+                "otherData": {"tool": constants.APP_NAME, "tool_version": constants.APP_VERSION}}
+
+    def export_chrome_trace(self, path, last_actions=None):
+        """Writes build_chrome_trace() to path. Returns the number of spans written. Raises OSError."""
+        trace = self.build_chrome_trace(last_actions)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, default=str)
+        return sum(1 for event in trace["traceEvents"] if event["ph"] == "X")
+
+
+# --- Module-level tracer ---
+
+_tracer = Tracer()
+
+
+def configure(enabled):
+    _tracer.enabled = bool(enabled)
+
+
+def is_enabled():
+    return _tracer.enabled
+
+
+def span(name, cat=CAT_APP, **args):
+    """Context manager timing a block: `with tracing.span("net stop", tracing.CAT_COMMAND): ...`"""
+    if not _tracer.enabled:
+        return _NULL_SPAN
+    return _Span(_tracer, name, cat, args)
+
+
+def action(name, **args):
+    """Root span for one user action; export_chrome_trace(last_actions=N) selects by these."""
+    return span(name, CAT_ACTION, **args)
+
+
+def traced(name=None, cat=CAT_APP):
+    """Decorator form of span() using the function name by default."""
+    def decorator(func):
+        span_name = name or func.__name__
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return func(*args, **kwargs)
+            with _Span(_tracer, span_name, cat, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def action_count():
+    return _tracer.action_count()
+
+
+def child_spans(parent):
+    return _tracer.child_spans(parent)
+
+
+def export_chrome_trace(path, last_actions=None):
+    return _tracer.export_chrome_trace(path, last_actions)
@@ -0,0 +1,38 @@
+_MISSING = object()
+
+
+class UIStateStore:
+    """
+    Small reactive store for the flags that drive widget states (admin, path validity,
+    task running, ...). Widgets bind a derive function over the keys they depend on;
+    on set() only bindings touching a changed key are re-derived, and a widget is only
+    reconfigured when its derived value actually changed. UI thread only.
+    """
+    def __init__(self, **initial):
+        self._state = dict(initial)
+        self._bindings = [] # [keys, derive, apply, last value]
+
+    def get(self, key, default=None):
+        return self._state.get(key, default)
+
+    def bind(self, keys, derive, apply):
+        """Applies derive(state) now and again whenever it changes after a set() of one of keys."""
+        value = derive(self._state)
+        apply(value)
+        self._bindings.append([frozenset(keys), derive, apply, value])
+
+    def set(self, **changes):
+        """Updates state keys. Returns True if anything changed."""
+        changed = {key for key, value in changes.items() if self._state.get(key, _MISSING) != value}
+        if not changed:
+            return False
+        self._state.update(changes)
+        for binding in self._bindings:
+            keys, derive, apply, last_value = binding
+            if keys.isdisjoint(changed):
+                continue
+            value = derive(self._state)
+            if value != last_value:
+                binding[3] = value
+                apply(value)
+        return True
@@ -1,17 +1,19 @@
-import ctypes
 import sys
 import os
 import subprocess
 import time
-# Windows-specific imports
-import win32api
-import win32con
-import pywintypes
+
+from . import metrics
+from . import platform_backend
+from . import state_journal
+from . import structured_log
+from . import tracing
 
 # --- Constants for commands ---
 CMD_TASKKILL = "taskkill"
 CMD_NET = "net"
 CMD_TIMEOUT = "timeout"
+CMD_SC = "sc"
 ERROR_CANCELLED = 1223 # Error code when user cancels UAC prompt
 
 # --- Admin Check and Elevation ---
@@ -19,9 +21,9 @@ ERROR_CANCELLED = 1223 # Error code when user cancels UAC prompt
 def is_admin():
     """Checks if the script is running with administrator privileges on Windows."""
     try:
-        return ctypes.windll.shell32.IsUserAnAdmin() != 0
+        return platform_backend.get_backend().is_admin()
     except AttributeError:
-        print("Warning: Could not determine admin status via ctypes.")
+        structured_log.warning("Could not determine admin status via ctypes.")
         return False # Assume not admin if check fails
 
 def request_admin_elevation():
@@ -32,72 +34,102 @@ def request_admin_elevation():
     Original non-admin process exits if elevation is attempted.
     """
     if is_admin():
-        print("Already running with administrator privileges.")
+        structured_log.info("Already running with administrator privileges.")
         return True
     else:
-        print("Administrator privileges required. Attempting to elevate...")
+        structured_log.info("Administrator privileges required. Attempting to elevate...")
         try:
             script = os.path.abspath(sys.argv[0])
             params = " ".join([script] + sys.argv[1:])
-            ret = ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, params, None, 1)
+            ret, error_code = platform_backend.get_backend().shell_execute_runas(sys.executable, params)
 
             if ret > 32:
-                print("Elevation successful, launching new process...")
+                structured_log.info("Elevation successful, launching new process...")
                 sys.exit(0) # Exit original non-admin process
             else:
-                error_code = ctypes.get_last_error()
                 if error_code == ERROR_CANCELLED:
-                    print("Elevation cancelled by user.")
+                    structured_log.warning("Elevation cancelled by user.")
                 else:
-                    print(f"Elevation failed with error code: {error_code}")
+                    structured_log.error(f"Elevation failed with error code: {error_code}")
                 return False # Elevation failed or cancelled
         except Exception as e:
-            print(f"An error occurred during elevation attempt: {e}")
+            structured_log.error(f"An error occurred during elevation attempt: {e}")
             return False
 
 # --- Driver Control Functions (using subprocess) ---
 
 def run_command(command_parts, capture_output=False, check=False, timeout=None):
-    """Helper function to run a command using subprocess."""
+    """
+    Helper function to run a command through the platform backend (subprocess on Windows).
+    The command line, return code, duration and any captured output are written to the
+    structured log as "command" fields so failed driver steps can be traced afterwards.
+    Each call is also a tracing span named after the command line.
+    """
+    metrics.process_spawned(command_parts[0].lower())
+    with tracing.span(' '.join(command_parts), tracing.CAT_COMMAND) as trace_span:
+        result = _run_command(command_parts, capture_output, check, timeout)
+        trace_span.set(returncode=result.returncode if result is not None else None)
+    if result is None:
+        metrics.step_failed("run_command")
+    return result
+
+def _run_command(command_parts, capture_output, check, timeout):
+    command_line = ' '.join(command_parts)
+    start_time = time.perf_counter()
+    def elapsed_ms():
+        return round((time.perf_counter() - start_time) * 1000, 1)
     try:
-        # Use CREATE_NO_WINDOW to prevent console window flashes
-        creationflags = subprocess.CREATE_NO_WINDOW
-        print(f"Executing: {' '.join(command_parts)}") # Debugging
-        result = subprocess.run(
-            command_parts,
-            shell=True,
-            capture_output=capture_output,
-            text=True,
-            check=check,
-            timeout=timeout,
-            creationflags=creationflags
-        )
-        print(f"Command finished: {' '.join(command_parts)}")
+        structured_log.info(f"Executing: {command_line}", event="command_start", command=command_line)
+        result = platform_backend.get_backend().run(command_parts, capture_output=capture_output,
+                                                    check=check, timeout=timeout)
+        structured_log.info(f"Command finished: {command_line} (Code: {result.returncode})", event="command_end",
+                            command=command_line, returncode=result.returncode, duration_ms=elapsed_ms())
         if capture_output:
-            if result.stdout: print(f"Output: {result.stdout.strip()}")
-            if result.stderr: print(f"Error Output: {result.stderr.strip()}")
+            if result.stdout: structured_log.info(f"Output: {result.stdout.strip()}", event="command_output",
+                                                  command=command_line, stream="stdout")
+            if result.stderr: structured_log.warning(f"Error Output: {result.stderr.strip()}", event="command_output",
+                                                     command=command_line, stream="stderr")
         return result
     except FileNotFoundError:
-        print(f"Error: Command not found - {command_parts[0]}. Is it in your PATH?")
+        structured_log.error(f"Command not found - {command_parts[0]}. Is it in your PATH?",
+                             event="command_error", command=command_line)
         return None
     except subprocess.CalledProcessError as e:
-        print(f"Error executing command: {' '.join(command_parts)} (Code: {e.returncode})")
-        if e.stdout: print(f"Output: {e.stdout.strip()}")
-        if e.stderr: print(f"Error Output: {e.stderr.strip()}")
+        structured_log.error(f"Error executing command: {command_line} (Code: {e.returncode})", event="command_end",
+                             command=command_line, returncode=e.returncode, duration_ms=elapsed_ms())
+        if e.stdout: structured_log.info(f"Output: {e.stdout.strip()}", event="command_output",
+                                         command=command_line, stream="stdout")
+        if e.stderr: structured_log.error(f"Error Output: {e.stderr.strip()}", event="command_output",
+                                          command=command_line, stream="stderr")
         return None
     except subprocess.TimeoutExpired:
-        print(f"Command timed out: {' '.join(command_parts)}")
+        structured_log.error(f"Command timed out: {command_line}", event="command_timeout",
+                             command=command_line, duration_ms=elapsed_ms())
         return None
-    except Exception as e:
-        print(f"An unexpected error occurred running command: {' '.join(command_parts)} - {e}")
+    except Exception:
+        structured_log.exception(f"An unexpected error occurred running command: {command_line}",
+                                 event="command_error", command=command_line)
         return None
 
+def wacom_services_running():
+    """True if any Wacom service is running (sc query), so there is a driver state to restore later."""
+    for service in constants.WACOM_SERVICES:
+        result = run_command([CMD_SC, "query", service], capture_output=True)
+        if result is not None and result.returncode == 0 and "RUNNING" in (result.stdout or ""):
+            return True
+    return False
+
+@tracing.traced(cat=tracing.CAT_APP)
 def disable_wacom_drivers():
     """Stops Wacom services and processes."""
     if not is_admin():
-        print("Error: Cannot disable Wacom drivers without administrator privileges.")
+        structured_log.error("Cannot disable Wacom drivers without administrator privileges.")
         return False
-    print("Attempting to disable Wacom drivers...")
+    if wacom_services_running():
+        state_journal.get_journal().begin(state_journal.KIND_DRIVER, "wacom")
+    else:
+        structured_log.info("Wacom services are not running; nothing to restore later.")
+    structured_log.info("Attempting to disable Wacom drivers...")
     commands = [
         [CMD_TASKKILL, "/F", "/IM", "Wacom_Tablet.exe"], [CMD_TASKKILL, "/F", "/IM", "Pen_Tablet.exe"],
         [CMD_NET, "stop", "WTabletServicePro"], [CMD_TIMEOUT, "/t", "1", "/nobreak"],
@@ -112,21 +144,26 @@ def disable_wacom_drivers():
         if result is None: success = False; break
         # Be lenient with non-zero return codes for taskkill/net stop/start unless critical
         if cmd[0] == CMD_NET and result.returncode not in [0, 2]:
-            print(f"Warning: Command '{' '.join(cmd)}' may have failed with return code {result.returncode}")
+            structured_log.warning(f"Command '{' '.join(cmd)}' may have failed with return code {result.returncode}")
         elif cmd[0] == CMD_TASKKILL and result.returncode != 0 and result.returncode != 128:
-             print(f"Warning: Command '{' '.join(cmd)}' failed with return code {result.returncode}")
-    print(f"Wacom driver disable sequence {'completed' if success else 'encountered errors'}.")
+             structured_log.warning(f"Command '{' '.join(cmd)}' failed with return code {result.returncode}")
+    structured_log.info(f"Wacom driver disable sequence {'completed' if success else 'encountered errors'}.")
+    if success:
+        metrics.set_driver_state("none")
+    else:
+        metrics.step_failed("disable_wacom_drivers")
     return success
 
+@tracing.traced(cat=tracing.CAT_APP)
 def enable_wacom_drivers():
     """Stops OTD and restarts Wacom services."""
     if not is_admin():
-        print("Error: Cannot enable Wacom drivers without administrator privileges.")
+        structured_log.error("Cannot enable Wacom drivers without administrator privileges.")
         return False
-    print("Attempting to enable Wacom drivers and stop OTD...")
+    structured_log.info("Attempting to enable Wacom drivers and stop OTD...")
     # Use OTD process names from constants
     for process_name in constants.OTD_PROCESSES:
-        print(f"Attempting to stop process: {process_name}")
+        structured_log.info(f"Attempting to stop process: {process_name}")
         run_command([CMD_TASKKILL, "/F", "/IM", process_name]) # Ignore result, might not be running
 
     commands = [
@@ -139,26 +176,42 @@ def enable_wacom_drivers():
         result = run_command(cmd)
         if result is None: success = False; break
         if cmd[0] == CMD_NET and result.returncode not in [0, 2]:
-            print(f"Warning: Command '{' '.join(cmd)}' may have failed with return code {result.returncode}")
-    print(f"Wacom driver enable sequence {'completed' if success else 'encountered errors'}.")
+            structured_log.warning(f"Command '{' '.join(cmd)}' may have failed with return code {result.returncode}")
+    structured_log.info(f"Wacom driver enable sequence {'completed' if success else 'encountered errors'}.")
+    if success:
+        metrics.set_driver_state("wacom")
+        state_journal.get_journal().commit(state_journal.KIND_DRIVER)
+    else:
+        metrics.step_failed("enable_wacom_drivers")
     return success
 
-def launch_process(executable_path, working_directory=None):
-    """Launches an executable asynchronously."""
+@tracing.traced(cat=tracing.CAT_COMMAND)
+def launch_process(executable_path, working_directory=None, priority=None):
+    """
+    Launches an executable asynchronously. priority ("above_normal", "high") starts it
+    directly with that priority class (a shell would not pass the class on to the game).
+    """
     if not executable_path or not os.path.exists(executable_path):
-        print(f"Error: Executable path invalid/missing: '{executable_path}'")
+        structured_log.error(f"Executable path invalid/missing: '{executable_path}'")
+        metrics.step_failed("launch_process")
         return None
     try:
         effective_wd = working_directory or os.path.dirname(executable_path)
-        print(f"Launching: '{executable_path}' in WD '{effective_wd}'")
-        # CREATE_NO_WINDOW prevents console flash for GUI apps too
-        process = subprocess.Popen(f'"{executable_path}"', cwd=effective_wd, shell=True, creationflags=subprocess.CREATE_NO_WINDOW)
-        print(f"Process launched (PID: {process.pid})")
+        structured_log.info(f"Launching: '{executable_path}' in WD '{effective_wd}'")
+        # The Windows backend uses CREATE_NO_WINDOW, which prevents console flash for GUI apps too
+        if priority and priority != "normal":
+            process = platform_backend.get_backend().popen([executable_path], cwd=effective_wd, priority=priority)
+        else:
+            process = platform_backend.get_backend().popen(f'"{executable_path}"', cwd=effective_wd, shell=True)
+        structured_log.info(f"Process launched (PID: {process.pid})")
+        metrics.process_spawned("launch")
         return process
     except (FileNotFoundError, OSError, Exception) as e:
-        print(f"Error launching '{executable_path}': {e}. Check path, permissions, and valid executable.")
+        structured_log.error(f"Error launching '{executable_path}': {e}. Check path, permissions, and valid executable.")
+        metrics.step_failed("launch_process")
         return None
 
+@tracing.traced(cat=tracing.CAT_COMMAND)
 def launch_process_standard(executable_path, working_directory=None):
     """
     Attempts to launch an executable as the standard (non-elevated) user,
@@ -167,11 +220,12 @@ def launch_process_standard(executable_path, working_directory=None):
     Note: This returns immediately after requesting launch.
     """
     if not executable_path or not os.path.exists(executable_path):
-        print(f"Error: Executable path invalid/missing for standard user launch: '{executable_path}'")
+        structured_log.error(f"Executable path invalid/missing for standard user launch: '{executable_path}'")
+        metrics.step_failed("launch_process_standard")
         return False
 
     if working_directory:
-        print(f"Warning: Working directory '{working_directory}' specified but cannot be set via 'runas'. Process CWD might differ.")
+        structured_log.warning(f"Working directory '{working_directory}' specified but cannot be set via 'runas'. Process CWD might differ.")
 
     try:
         quoted_path = f'"{executable_path}"'
@@ -183,26 +237,50 @@ def launch_process_standard(executable_path, working_directory=None):
             quoted_path
         ]
 
-        print(f"[Standard User Launch via runas] Executing: {' '.join(command)}")
+        structured_log.info(f"[Standard User Launch via runas] Executing: {' '.join(command)}")
 
-        process = subprocess.Popen(
-            command,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW,\
-        )
-        print(f"Successfully executed 'runas' command (PID: {process.pid}). OTD should launch as standard user.")
+        process = platform_backend.get_backend().popen(command, shell=False)
+        structured_log.info(f"Successfully executed 'runas' command (PID: {process.pid}). OTD should launch as standard user.")
+        metrics.process_spawned("runas")
         return True
 
     except FileNotFoundError:
-        print(f"CRITICAL ERROR: 'runas' command not found. Cannot launch as standard user.")
-        traceback.print_exc()
+        structured_log.exception(f"CRITICAL ERROR: 'runas' command not found. Cannot launch as standard user.")
+        metrics.step_failed("launch_process_standard")
         return False
     except Exception as e:
-        print(f"Exception during standard user launch attempt via runas for '{executable_path}': {e}")
-        traceback.print_exc() 
+        structured_log.exception(f"Exception during standard user launch attempt via runas for '{executable_path}': {e}")
+        metrics.step_failed("launch_process_standard")
         return False
 
 
+@tracing.traced(cat=tracing.CAT_FILE)
+def prefetch_files(paths):
+    """Reads files once so the OS file cache holds them before the game opens them. Returns bytes read."""
+    total = 0
+    buffer = bytearray(constants.PREFETCH_CHUNK_SIZE)
+    for path in paths:
+        try:
+            with open(path, 'rb', buffering=0) as f:
+                while True:
+                    read = f.readinto(buffer)
+                    if not read:
+                        break
+                    total += read
+        except OSError as e:
+            structured_log.warning(f"Could not prefetch '{path}': {e}")
+    structured_log.info(f"Prefetched {total / (1024 * 1024):.1f} MB from {len(paths)} file(s).")
+    return total
+
+def open_folder(folder_path):
+    """Opens a folder in Explorer. Raises OSError."""
+    platform_backend.get_backend().open_folder(folder_path)
+
+def wait(seconds):
+    """Sleeps between launch steps (virtual time under the simulated backend)."""
+    platform_backend.get_backend().sleep(seconds)
+
+
 # --- Path Validation ---
 def get_desktop_path():
     return os.path.join(os.path.expanduser('~'), 'Desktop')
@@ -233,20 +311,39 @@ def _get_devmode(setting_index_or_type):
     """Helper to get DEVMODE object by index or type (like ENUM_CURRENT_SETTINGS)."""
     try:
         # None gets settings for the primary display adapter
-        return win32api.EnumDisplaySettings(None, setting_index_or_type)
-    except pywintypes.error as e:
+        with tracing.span("EnumDisplaySettings", tracing.CAT_DISPLAY, mode=setting_index_or_type):
+            return platform_backend.get_backend().enum_display_settings(setting_index_or_type)
+    except platform_backend.BackendError as e:
         # This might happen if index is out of bounds or type is invalid
-        print(f"Error enumerating display settings (index/type: {setting_index_or_type}): {e}")
+        structured_log.error(f"Error enumerating display settings (index/type: {setting_index_or_type}): {e}")
         return None
     except Exception as e:
-        print(f"Unexpected error in _get_devmode: {e}")
+        structured_log.error(f"Unexpected error in _get_devmode: {e}")
         return None
 
 def get_current_resolution():
     """Gets the current screen resolution for the primary display."""
-    devmode = _get_devmode(win32con.ENUM_CURRENT_SETTINGS)
-    return (devmode.PelsWidth, devmode.PelsHeight) if devmode else (None, None)
-
+    devmode = _get_devmode(platform_backend.ENUM_CURRENT_SETTINGS)
+    resolution = (devmode.PelsWidth, devmode.PelsHeight) if devmode else (None, None)
+    metrics.set_resolution("current", *resolution)
+    return resolution
+
+@tracing.traced(cat=tracing.CAT_DISPLAY)
+def list_display_modes():
+    """Set of (width, height, refresh rate) modes supported by the primary display."""
+    modes = set()
+    backend = platform_backend.get_backend()
+    i = 0
+    while True:
+        try:
+            devmode = backend.enum_display_settings(i)
+        except platform_backend.BackendError:
+            break # Past the last mode
+        modes.add((devmode.PelsWidth, devmode.PelsHeight, devmode.DisplayFrequency))
+        i += 1
+    return modes
+
+@tracing.traced(cat=tracing.CAT_DISPLAY)
 def get_native_resolution():
     """
     Gets the 'native' resolution by finding the highest resolution
@@ -255,19 +352,16 @@ def get_native_resolution():
     max_w, max_h = 0, 0
     modes_found = False
     i = 0
-    print("Attempting to find highest supported resolution by iterating modes...")
+    structured_log.info("Attempting to find highest supported resolution by iterating modes...")
     try:
         while True:
             devmode = _get_devmode(i) # Get mode by index 'i'
             if not devmode:
-                # print(f"No more modes found at index {i}.")
                 break # No more modes available for this display
 
             modes_found = True
             current_w = devmode.PelsWidth
             current_h = devmode.PelsHeight
-            # Optional: Log found modes for debugging
-            # print(f" Mode {i}: {current_w}x{current_h} @ {devmode.DisplayFrequency}Hz, {devmode.BitsPerPel}bpp")
 
             # Update max resolution based on pixel count (area) or simple dimensions
             # Using simple dimensions comparison:
@@ -285,60 +379,141 @@ def get_native_resolution():
 
             i += 1
     except Exception as e:
-        print(f"Error during native resolution detection loop at index {i}: {e}")
-        traceback.print_exc()
+        structured_log.exception(f"Error during native resolution detection loop at index {i}: {e}")
         # Fallback if loop fails unexpectedly
-        print("Falling back to current resolution due to error during mode iteration.")
+        structured_log.warning("Falling back to current resolution due to error during mode iteration.")
+        metrics.step_failed("get_native_resolution")
         return get_current_resolution()
 
     if modes_found and max_w > 0 and max_h > 0:
-        print(f"Determined highest supported resolution (native candidate): {max_w}x{max_h}")
+        structured_log.info(f"Determined highest supported resolution (native candidate): {max_w}x{max_h}")
+        metrics.set_resolution("native", max_w, max_h)
         return max_w, max_h
     else:
         # Fallback if loop completes but finds nothing useful (very unlikely)
-        print("Warning: Could not determine highest resolution by iterating modes. Falling back to current resolution.")
+        structured_log.warning("Could not determine highest resolution by iterating modes. Falling back to current resolution.")
+        metrics.step_failed("get_native_resolution")
         return get_current_resolution()
 
 
-def set_resolution(width, height):
-    """Sets the screen resolution for the primary display."""
+def _commit_display_if_restored(width, height, refresh_rate):
+    """Commits the journaled display change once the mode it replaced is active again."""
+    journal = state_journal.get_journal()
+    record = journal.get_open(state_journal.KIND_DISPLAY)
+    if record and (record["prev"]["width"], record["prev"]["height"]) == (width, height) and \
+       record["prev"].get("refresh_rate") in (None, refresh_rate):
+        journal.commit(state_journal.KIND_DISPLAY)
+
+_session_mode = None # (width, height) of the active session-scoped change, if any
+
+
+def session_mode_active():
+    """True while a temporary (session-scoped) display change made by set_resolution is active."""
+    return _session_mode is not None
+
+
+@tracing.traced(cat=tracing.CAT_DISPLAY)
+def set_resolution(width, height, refresh_rate=None, temporary=False):
+    """
+    Sets the screen resolution (and optionally the refresh rate) for the primary display.
+    With temporary, the mode is session-scoped (CDS_FULLSCREEN): it is never saved, so
+    Windows puts the saved desktop mode back when this process exits, crashes or the user
+    logs off; revert_resolution() undoes it without a mode scan. Such changes are not
+    journaled, as there is nothing to restore after a crash.
+    """
+    global _session_mode
     # ... (Keep the existing set_resolution function as it was) ...
     if not is_admin():
-        print("Error: Admin privileges required to change screen resolution.")
+        structured_log.error("Admin privileges required to change screen resolution.")
         return False
 
-    devmode = _get_devmode(win32con.ENUM_CURRENT_SETTINGS)
+    devmode = _get_devmode(platform_backend.ENUM_CURRENT_SETTINGS)
     if not devmode:
-        print("Error: Could not get current display settings.")
+        structured_log.error("Could not get current display settings.")
+        metrics.step_failed("set_resolution")
         return False
 
-    if devmode.PelsWidth == width and devmode.PelsHeight == height:
-        print(f"Resolution already {width}x{height}. No change needed.")
+    same_mode = devmode.PelsWidth == width and devmode.PelsHeight == height and refresh_rate in (None, devmode.DisplayFrequency)
+    if same_mode and not temporary and session_mode_active():
+        # Same mode, but only for this session: apply it again without CDS_FULLSCREEN so it outlives the app
+        structured_log.info(f"Resolution {width}x{height} is session-scoped; making it persistent.")
+    elif same_mode:
+        structured_log.info(f"Resolution already {width}x{height}. No change needed.")
+        metrics.set_resolution("current", width, height)
+        _commit_display_if_restored(width, height, devmode.DisplayFrequency)
         return "UNCHANGED"
 
-    print(f"Attempting to change resolution to {width}x{height}")
+    # Recorded (and on disk) before the change, so a crash cannot lose the original mode.
+    # A session-scoped mode is not the original one: the saved desktop mode is.
+    prev = (_get_devmode(platform_backend.ENUM_REGISTRY_SETTINGS) if session_mode_active() else None) or devmode
+    journal_opened = not temporary and state_journal.get_journal().begin(state_journal.KIND_DISPLAY, {
+        "width": prev.PelsWidth, "height": prev.PelsHeight, "refresh_rate": prev.DisplayFrequency})
+
+    structured_log.info(f"Attempting to change resolution to {width}x{height}" + (f"@{refresh_rate}Hz" if refresh_rate else "") +
+                        (" for this session" if temporary else ""))
     devmode.PelsWidth = width
     devmode.PelsHeight = height
-    devmode.Fields = win32con.DM_PELSWIDTH | win32con.DM_PELSHEIGHT
+    devmode.Fields = platform_backend.DM_PELSWIDTH | platform_backend.DM_PELSHEIGHT
+    if refresh_rate:
+        devmode.DisplayFrequency = refresh_rate
+        devmode.Fields |= platform_backend.DM_DISPLAYFREQUENCY
 
     try:
-        result = win32api.ChangeDisplaySettings(devmode, 0)
-        if result == win32con.DISP_CHANGE_SUCCESSFUL:
-            print("Resolution changed successfully.")
+        with tracing.span("ChangeDisplaySettings", tracing.CAT_DISPLAY, width=width, height=height,
+                          refresh_rate=refresh_rate, temporary=temporary) as trace_span:
+            result = platform_backend.get_backend().change_display_settings(
+                devmode, platform_backend.CDS_FULLSCREEN if temporary else 0)
+            trace_span.set(result=result)
+        if result == platform_backend.DISP_CHANGE_SUCCESSFUL:
+            structured_log.info("Resolution changed successfully.")
+            metrics.set_resolution("current", width, height)
+            _session_mode = (width, height) if temporary else None
+            _commit_display_if_restored(width, height, devmode.DisplayFrequency)
             return True
         else:
             error_map = { # Simplified error map
-                win32con.DISP_CHANGE_BADMODE: "Mode not supported.",
-                win32con.DISP_CHANGE_FAILED: "Driver failed the mode.",
-                win32con.DISP_CHANGE_RESTART: "Restart required.",
+                platform_backend.DISP_CHANGE_BADMODE: "Mode not supported.",
+                platform_backend.DISP_CHANGE_FAILED: "Driver failed the mode.",
+                platform_backend.DISP_CHANGE_RESTART: "Restart required.",
             }
             error_msg = error_map.get(result, f"Unknown error code: {result}")
-            print(f"Failed to change resolution. Result: {error_msg}")
-            return False
-    except (pywintypes.error, Exception) as e:
-        print(f"Error calling ChangeDisplaySettings: {e}")
-        traceback.print_exc() # Add traceback for set_resolution errors too
+            structured_log.error(f"Failed to change resolution. Result: {error_msg}")
+    except (platform_backend.BackendError, Exception) as e:
+        structured_log.exception(f"Error calling ChangeDisplaySettings: {e}")
+    metrics.step_failed("set_resolution")
+    if journal_opened:
+        state_journal.get_journal().commit(state_journal.KIND_DISPLAY) # The mode did not change
+    return False
+
+
+@tracing.traced(cat=tracing.CAT_DISPLAY)
+def revert_resolution():
+    """
+    Returns the primary display to its saved desktop mode (ChangeDisplaySettings(NULL, 0)),
+    undoing session-scoped and unsaved changes alike without enumerating modes.
+    Returns True on success, False otherwise.
+    """
+    global _session_mode
+    if not is_admin():
+        structured_log.error("Admin privileges required to change screen resolution.")
+        return False
+    structured_log.info("Reverting to the saved desktop display mode.")
+    try:
+        result = platform_backend.get_backend().reset_display_settings()
+    except (platform_backend.BackendError, Exception) as e:
+        structured_log.exception(f"Error reverting display settings: {e}")
+        result = None
+    if result != platform_backend.DISP_CHANGE_SUCCESSFUL:
+        structured_log.error(f"Failed to revert display settings. Result: {result}")
+        metrics.step_failed("set_resolution")
         return False
+    _session_mode = None
+    devmode = _get_devmode(platform_backend.ENUM_CURRENT_SETTINGS)
+    if devmode:
+        structured_log.info(f"Display reverted to {devmode.PelsWidth}x{devmode.PelsHeight}.")
+        metrics.set_resolution("current", devmode.PelsWidth, devmode.PelsHeight)
+        _commit_display_if_restored(devmode.PelsWidth, devmode.PelsHeight, devmode.DisplayFrequency)
+    return True
 
 # Import constants at the end to avoid circular import issues if utils needs constants early
 from . import constants
\ No newline at end of file